@@ -0,0 +1,152 @@
+import math
+import os
+from array import array
+from collections import Counter, namedtuple
+
+RESOLUTION = 5                 # 링 버퍼 한 칸의 길이 (초) - 칸마다 마지막 체결가 보관
+TIMEFRAMES = (60, 300, 900)    # 수익률을 보는 구간 (초)
+VOL_WINDOW = 3600              # 롤링 변동성 추정 구간 (초)
+MIN_VOL_SAMPLES = 60           # 칸 수익률이 이만큼 쌓이기 전(5분)에는 변동률 임계값으로 판단
+Z_THRESHOLD = float(os.getenv('ANOMALY_Z', '4.0'))   # 롤링 변동성 대비 수익률 z-score 임계값
+MIN_MOVE_PCT = 0.5             # z-score가 커도 이 변동률(%) 미만이면 무시 (변동성이 거의 없는 심볼)
+WARMUP_THRESHOLD = 3.0         # 변동성 추정 전 가장 짧은 구간의 변동률 임계값 (%)
+CONFIRM_TICKS = 2              # 연속 이 틱 수만큼 유지돼야 감지 (한 번 튄 체결은 무시)
+COOLDOWN = 60                  # 감지 후 같은 심볼을 다시 감지하지 않는 시간 (초)
+
+Anomaly = namedtuple('Anomaly', 'symbol timeframe change_pct z')
+
+
+class _Series:
+    """심볼 하나의 가격 링(칸별 종가)과 칸 수익률 링 + 누적 합계"""
+    __slots__ = ('prices', 'rets', 'slot', 'filled', 'count', 'real', 'rsum', 'rsq', 'streak', 'quiet_until')
+
+    def __init__(self, price, slot, size, vol_size):
+        self.prices = array('d', [price]) * size
+        self.rets = array('f', bytes(4 * vol_size))
+        self.slot = slot          # 마지막으로 쓴 칸의 절대 번호 (시각 // RESOLUTION)
+        self.filled = 1           # 유효한 가격 칸 수 (최대 size)
+        self.count = 0            # 지금까지 넣은 칸 수익률 수
+        self.real = 0             # 그중 체결로 생긴 수익률 수 (공백을 메운 0 제외)
+        self.rsum = 0.0
+        self.rsq = 0.0
+        self.streak = 0           # 임계값을 넘은 연속 틱 수
+        self.quiet_until = 0.0
+
+
+class AnomalyDetector:
+    """
+    심볼별 1m/5m/15m 수익률을 롤링 변동성(칸 수익률 표준편차 * sqrt(구간 칸 수))으로 나눈 z-score로 이상 징후를 판단합니다.
+    가격/수익률은 고정 크기 array 링 버퍼에 두고 합계를 누적 갱신하므로 틱 하나의 처리는 O(1)입니다.
+    변동성이 쌓이기 전에는 가장 짧은 구간의 변동률(threshold %)로 판단하고,
+    confirm_ticks 연속으로 유지된 움직임만 감지해 한 번 튄 체결(wick)은 무시합니다.
+    """
+
+    def __init__(self, timeframes=TIMEFRAMES, resolution=RESOLUTION, vol_window=VOL_WINDOW, z_threshold=Z_THRESHOLD,
+                 min_move=MIN_MOVE_PCT, threshold=WARMUP_THRESHOLD, min_samples=MIN_VOL_SAMPLES,
+                 confirm_ticks=CONFIRM_TICKS, cooldown=COOLDOWN):
+        self.timeframes = tuple(timeframes)
+        self.resolution = resolution
+        self.steps = [max(1, round(tf / resolution)) for tf in self.timeframes]
+        self.size = max(self.steps) + 1
+        self.vol_size = max(1, int(vol_window / resolution))
+        # 이보다 긴 공백 뒤에는 이전 가격/변동성을 버리고 새로 시작 (0 수익률로 채우면 sd가 0에 가까워져 z가 폭주)
+        self.max_gap = min(self.size - 1, self.vol_size)
+        self.z_threshold = z_threshold
+        self.min_move = min_move
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.confirm_ticks = confirm_ticks
+        self.cooldown = cooldown
+        self.stats = Counter()
+        self._series = {}
+
+    def __len__(self):
+        return len(self._series)
+
+    def seed(self, symbol, price, now):
+        """REST 스냅샷 가격을 직전 칸의 종가로 기록 (첫 틱부터 비교 기준이 있도록)"""
+        self._series[symbol] = _Series(price, int(now // self.resolution) - 1, self.size, self.vol_size)
+
+    def _push(self, s, r):
+        i = s.count % self.vol_size
+        old = s.rets[i]
+        s.rets[i] = r
+        r = s.rets[i]    # float32로 저장된 값 그대로 합계에 반영
+        s.rsum += r - old
+        s.rsq += r * r - old * old
+        s.count += 1
+        if i == self.vol_size - 1:
+            # 링이 한 바퀴 돌 때마다 누적 오차 제거 (분할 상환 O(1))
+            s.rsum = math.fsum(s.rets)
+            s.rsq = math.fsum(x * x for x in s.rets)
+
+    def _advance(self, s, slot):
+        """새 칸으로 이동 - 마감된 칸의 수익률을 넣고, 체결 없이 지나간 칸은 가격 유지(수익률 0)"""
+        gap = slot - s.slot
+        size = self.size
+        last = s.prices[s.slot % size]
+        if s.filled > 1:
+            self._push(s, math.log(last / s.prices[(s.slot - 1) % size]))
+            s.real += 1
+        for _ in range(min(gap - 1, self.vol_size)):
+            self._push(s, 0.0)
+        for i in range(1, min(gap, size) + 1):
+            s.prices[(s.slot + i) % size] = last
+        s.slot = slot
+        s.filled = min(size, s.filled + gap)
+
+    def _evaluate(self, s, price):
+        """(구간, 변동률 %, z) 중 |z|가 가장 큰 것 (임계값 미만이면 None)"""
+        n = min(s.count, self.vol_size)
+        size = self.size
+        if n < self.min_samples or s.real < self.min_samples:
+            back = min(self.steps[0], s.filled - 1)
+            if back <= 0:
+                return None
+            pct = (price / s.prices[(s.slot - back) % size] - 1) * 100
+            return (self.timeframes[0], pct, None) if abs(pct) >= self.threshold else None
+        var = (s.rsq - s.rsum * s.rsum / n) / (n - 1)
+        sd = math.sqrt(var) if var > 0 else 0.0
+        best = None
+        for tf, k in zip(self.timeframes, self.steps):
+            back = min(k, s.filled - 1)
+            then = s.prices[(s.slot - back) % size]
+            pct = (price / then - 1) * 100
+            if abs(pct) < self.min_move:
+                continue
+            z = math.log(price / then) / (sd * math.sqrt(back)) if sd else math.copysign(math.inf, pct)
+            if abs(z) >= self.z_threshold and (best is None or abs(z) > abs(best[2])):
+                best = (tf, pct, z)
+        return best
+
+    def update(self, symbol, price, now):
+        """틱 하나 반영 - 감지되면 Anomaly, 아니면 None"""
+        self.stats['ticks'] += 1
+        slot = int(now // self.resolution)
+        s = self._series.get(symbol)
+        if s is None or slot - s.slot > self.max_gap:
+            if s is not None:
+                self.stats['reseeds'] += 1
+            s = self._series[symbol] = _Series(price, slot - 1, self.size, self.vol_size)
+        if slot > s.slot:
+            self._advance(s, slot)
+        s.prices[s.slot % self.size] = price
+        if now < s.quiet_until:
+            s.streak = 0
+            return None
+        hit = self._evaluate(s, price)
+        if hit is None:
+            if s.streak:
+                self.stats['wicks'] += 1   # 확인 전에 되돌아간 움직임
+            s.streak = 0
+            return None
+        s.streak += 1
+        if s.streak < self.confirm_ticks:
+            return None
+        s.streak = 0
+        s.quiet_until = now + self.cooldown
+        self.stats['anomalies'] += 1
+        return Anomaly(symbol, *hit)
+
+    def discard(self, symbol):
+        self._series.pop(symbol, None)
@@ -0,0 +1,379 @@
+"""과거 1분봉을 실거래와 같은 시그널/리스크 로직으로 재생하는 백테스트
+
+사용법: python backtest.py data/ [--symbols BTCUSDT,ETHUSDT] [--balance 1000] [--out trades.csv]
+
+데이터는 CSV 또는 Parquet (pyarrow 필요) 파일/디렉터리, 또는 kline_archive 디렉터리.
+컬럼: [symbol,] open_time(ms), open, high, low, close, volume - symbol 컬럼이 없으면 파일 이름이 심볼.
+"""
+import argparse
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from kline_archive import KlineArchive
+from risk_manager import RiskManager
+from signal_generator import (score_batch, detect_spikes, KLINE_LOOKBACK, SPIKE_WINDOW,
+                              SPIKE_FACTOR, CONFIRM_PERIOD, BUY_THRESHOLD, SELL_THRESHOLD)
+
+CHUNK_ROWS = 1_000_000   # 파일을 읽을 때 한 번에 올릴 행 수
+SCORE_CHUNK = 20_000     # score_batch 한 번에 넣을 창 개수 (메모리 제한)
+EXIT_SCAN = 1_440        # 청산 지점을 찾을 때 한 번에 검사할 캔들 수
+# 평가 트리거: None이면 모든 1분봉 평가 (실거래 Screener가 INTERVAL=60초마다 전체를 스코어링하는 것과 동일)
+# 숫자면 직전 캔들 대비 변동률(%)이 그 이상인 캔들만 평가 (고정 THRESHOLD 틱 트리거 모델)
+TRIGGER_THRESHOLD = None
+STOP_LOOKBACK = 5        # 손절가 계산 구간 - main.STOP_LOOKBACK과 동일
+TAKE_PROFIT = 0.10       # 익절 비율 - main.trade_logic과 동일
+ENTRY_TIMEOUT = 5        # 지정가 진입 주문 유효 캔들 수
+FEE_RATE = 0.0004        # 체결 금액당 수수료
+
+KLINE_COLUMNS = ['open_time', 'open', 'high', 'low', 'close', 'volume']
+_FLOAT_COLUMNS = KLINE_COLUMNS[1:]
+
+
+class BacktestConfig:
+    """백테스트 파라미터 - 기본값은 실거래 설정과 동일"""
+
+    def __init__(self, balance=1000.0, spike_factor=SPIKE_FACTOR, confirm_period=CONFIRM_PERIOD,
+                 buy_threshold=BUY_THRESHOLD, sell_threshold=SELL_THRESHOLD,
+                 max_daily=5, max_streak=3, cooldown_m=30, risk=0.02,
+                 trigger_threshold=TRIGGER_THRESHOLD, stop_lookback=STOP_LOOKBACK,
+                 take_profit=TAKE_PROFIT, entry_timeout=ENTRY_TIMEOUT, fee_rate=FEE_RATE,
+                 sentiment=0.0):
+        self.balance = balance
+        self.spike_factor = spike_factor
+        self.confirm_period = confirm_period
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.max_daily = max_daily
+        self.max_streak = max_streak
+        self.cooldown_m = cooldown_m
+        self.risk = risk
+        self.trigger_threshold = trigger_threshold  # None이면 모든 캔들에서 평가 (Screener 주기)
+        self.stop_lookback = stop_lookback
+        self.take_profit = take_profit
+        self.entry_timeout = entry_timeout
+        self.fee_rate = fee_rate
+        self.sentiment = sentiment  # 고정 감성 점수 또는 (symbol, open_times) -> 점수 배열
+
+    def as_dict(self):
+        return {k: v for k, v in vars(self).items() if not callable(v)}
+
+
+def _iter_file(path, chunk_rows):
+    """CSV/Parquet 파일을 청크 단위 DataFrame으로 읽음"""
+    wanted = set(KLINE_COLUMNS) | {'symbol'}
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet 파일을 읽으려면 pyarrow가 필요합니다 (pip install pyarrow)")
+        pf = pq.ParquetFile(path)
+        columns = [c for c in pf.schema_arrow.names if c in wanted]
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=lambda c: c in wanted)
+
+
+def _to_ms(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    return pd.to_datetime(values, utc=True).dt.as_unit('ms').to_numpy().astype(np.int64)
+
+
+def load_klines(path, symbols=None, chunk_rows=CHUNK_ROWS):
+    """파일/디렉터리의 캔들을 청크 단위로 읽어 심볼별 numpy 배열 dict로 반환"""
+    if KlineArchive.is_archive(path):
+        return KlineArchive(path).to_klines(symbols)
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                       if f.endswith(('.csv', '.parquet')))
+    else:
+        files = [path]
+    wanted = {s.upper() for s in symbols} if symbols else None
+    parts = {}
+    for file in files:
+        default_symbol = os.path.basename(file).split('.')[0].upper()
+        for chunk in _iter_file(file, chunk_rows):
+            groups = chunk.groupby('symbol', sort=False) if 'symbol' in chunk else [(default_symbol, chunk)]
+            for sym, df in groups:
+                sym = str(sym).upper()
+                if wanted is not None and sym not in wanted:
+                    continue
+                cols = {'open_time': _to_ms(df['open_time'])}
+                for c in _FLOAT_COLUMNS:
+                    src = c if c in df else 'close'  # high/low가 없으면 종가로 대체
+                    cols[c] = df[src].to_numpy(dtype=np.float64)
+                parts.setdefault(sym, []).append(cols)
+
+    klines = {}
+    for sym, chunks in parts.items():
+        k = {c: np.concatenate([p[c] for p in chunks]) for c in KLINE_COLUMNS}
+        order = np.argsort(k['open_time'], kind='stable')
+        times = k['open_time'][order]
+        keep = np.ones(len(times), dtype=bool)
+        keep[1:] = times[1:] != times[:-1]  # 중복 캔들 제거
+        klines[sym] = {c: v[order][keep] for c, v in k.items()}
+    return klines
+
+
+def generate_signals(symbol, k, cfg):
+    """한 심볼의 전체 기간 시그널 - compute_score/get_signal과 같은 결과를 벡터 연산으로 계산
+
+    평가 시점마다 직전 KLINE_LOOKBACK 캔들 창으로 score_batch를 돌리므로
+    실거래에서 get_klines(limit=KLINE_LOOKBACK)로 계산한 점수와 같다.
+    반환: [(open_time, symbol, side, index), ...]
+    """
+    close, volume = k['close'], k['volume']
+    n = len(close)
+    if n < KLINE_LOOKBACK:
+        return []
+
+    # 1. 평가 시점: 기본은 모든 캔들 (Screener 주기), trigger_threshold가 있으면 가격 변동 트리거
+    idx = np.arange(KLINE_LOOKBACK - 1, n)
+    if cfg.trigger_threshold:
+        change = np.abs(close[idx] / close[idx - 1] - 1) * 100
+        idx = idx[change >= cfg.trigger_threshold]
+    if len(idx) < cfg.confirm_period:
+        return []
+
+    # 2. 스파이크가 난 평가 시점만 점수 계산 (나머지는 compute_score와 같이 0)
+    vol_windows = sliding_window_view(volume, SPIKE_WINDOW + 1)
+    spiking = detect_spikes(vol_windows[idx - SPIKE_WINDOW], cfg.spike_factor)
+    scores = np.zeros(len(idx))
+    pos = np.flatnonzero(spiking)
+    if len(pos):
+        close_windows = sliding_window_view(close, KLINE_LOOKBACK)
+        volume_windows = sliding_window_view(volume, KLINE_LOOKBACK)
+        sentiment = cfg.sentiment
+        if callable(sentiment):
+            sentiment = np.asarray(sentiment(symbol, k['open_time'][idx[pos]]), dtype=np.float64)
+        for start in range(0, len(pos), SCORE_CHUNK):
+            sel = pos[start:start + SCORE_CHUNK]
+            starts = idx[sel] - KLINE_LOOKBACK + 1
+            sent = sentiment[start:start + SCORE_CHUNK] if np.ndim(sentiment) else np.full(len(sel), sentiment)
+            final, _ = score_batch(close_windows[starts], volume_windows[starts], sent, cfg.spike_factor)
+            scores[sel] = final
+
+    # 3. get_signal: 연속 CONFIRM_PERIOD번 평가가 모두 임계값을 넘을 때
+    windows = sliding_window_view(scores, cfg.confirm_period)
+    at = idx[cfg.confirm_period - 1:]
+    buys = at[windows.min(axis=1) >= cfg.buy_threshold]
+    sells = at[windows.max(axis=1) <= cfg.sell_threshold]
+    times = k['open_time']
+    out = [(int(times[i]), symbol, 'buy', int(i)) for i in buys]
+    out += [(int(times[i]), symbol, 'sell', int(i)) for i in sells]
+    return out
+
+
+class SimulatedExecutor:
+    """TradeExecutor와 같은 인터페이스 - 주문을 과거 캔들로 체결
+
+    at(symbol, index)로 현재 캔들을 정한 뒤 trade_logic과 같은 순서로 호출한다.
+    """
+
+    def __init__(self, klines, entry_timeout=ENTRY_TIMEOUT):
+        self.klines = klines
+        self.entry_timeout = entry_timeout
+        self.leverage = {}
+        self.orders = []
+        self._sym = None
+        self._index = None
+
+    def at(self, sym, index):
+        self._sym, self._index = sym, index
+
+    def set_leverage(self, sym, lev):
+        self.leverage[sym] = lev
+
+    def enter_limit(self, sym, side, qty, price):
+        """다음 entry_timeout 캔들 안에 가격이 닿으면 체결"""
+        k = self.klines[sym]
+        lo = self._index + 1
+        hi = min(lo + self.entry_timeout, len(k['close']))
+        touched = k['low'][lo:hi] <= price if side == 'BUY' else k['high'][lo:hi] >= price
+        filled = touched.any()
+        order = {'symbol': sym, 'side': side, 'type': 'LIMIT', 'quantity': qty, 'price': price,
+                 'status': 'FILLED' if filled else 'EXPIRED'}
+        if filled:
+            self._index = lo + int(np.argmax(touched))
+            order['fill_index'] = self._index
+        self.orders.append(order)
+        return order
+
+    def place_oco(self, sym, side, qty, stop, tp):
+        """체결 캔들부터 손절/익절 중 먼저 닿는 쪽으로 청산 (같은 캔들이면 손절 우선)"""
+        k = self.klines[sym]
+        low, high = k['low'], k['high']
+        n = len(low)
+        for lo in range(self._index, n, EXIT_SCAN):
+            hi = min(lo + EXIT_SCAN, n)
+            if side == 'SELL':  # 롱 청산
+                hit_sl, hit_tp = low[lo:hi] <= stop, high[lo:hi] >= tp
+            else:
+                hit_sl, hit_tp = high[lo:hi] >= stop, low[lo:hi] <= tp
+            hit = hit_sl | hit_tp
+            if hit.any():
+                j = int(np.argmax(hit))
+                reason = 'stop' if hit_sl[j] else 'take_profit'
+                result = {'exit_index': lo + j, 'exit': stop if reason == 'stop' else tp, 'reason': reason}
+                break
+        else:
+            result = {'exit_index': n - 1, 'exit': float(k['close'][-1]), 'reason': 'end'}
+        self.orders.append({'symbol': sym, 'side': side, 'type': 'OCO', 'quantity': qty,
+                            'stop': stop, 'tp': tp, **result})
+        return result
+
+
+class BacktestResult:
+    def __init__(self, trades, equity, stats, config):
+        self.trades = trades
+        self.equity = equity
+        self.stats = stats
+        self.config = config
+
+    def summary(self):
+        start = self.config.balance
+        eq = np.concatenate(([start], self.equity['balance'].to_numpy()))
+        peak = np.maximum.accumulate(eq)
+        dd = peak - eq
+        pnl = self.trades['pnl'] if len(self.trades) else pd.Series(dtype=np.float64)
+        return {
+            'trades': len(self.trades),
+            'total_pnl': float(pnl.sum()),
+            'return_pct': float((eq[-1] / start - 1) * 100),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'max_drawdown': float(dd.max()),
+            'max_drawdown_pct': float((dd / peak).max() * 100),
+            **self.stats,
+        }
+
+    def report(self):
+        s = self.summary()
+        report = "📊 *Backtest Report*\n"
+        report += f"• Trades: {s['trades']} (win rate {s['win_rate']:.1%})\n"
+        report += f"• Total PnL: {s['total_pnl']:.2f} USDT ({s['return_pct']:.2f}%)\n"
+        report += f"• Max Drawdown: {s['max_drawdown']:.2f} USDT ({s['max_drawdown_pct']:.2f}%)\n"
+        report += (f"• Signals: {s['signals']} (risk blocked {s['risk_blocked']}, "
+                   f"busy {s['busy']}, unfilled {s['unfilled']}, invalid stop {s['invalid_stop']})\n")
+        return report
+
+
+def collect_signals(klines, cfg):
+    """전체 심볼 시그널을 시간순으로 정렬 (리스크 설정과 무관하므로 재사용 가능)"""
+    signals = []
+    for sym, k in klines.items():
+        signals.extend(generate_signals(sym, k, cfg))
+    signals.sort(key=lambda s: (s[0], s[1]))
+    return signals
+
+
+def run_backtest(klines, config=None, signals=None):
+    """심볼별 시그널을 시간순으로 합쳐 RiskManager/SimulatedExecutor로 재생"""
+    cfg = config or BacktestConfig()
+    if signals is None:
+        signals = collect_signals(klines, cfg)
+
+    now = [signals[0][0] / 1000 if signals else 0.0]
+    risk = RiskManager(max_daily=cfg.max_daily, max_streak=cfg.max_streak,
+                       cooldown_m=cfg.cooldown_m, risk=cfg.risk, clock=lambda: now[0])
+    executor = SimulatedExecutor(klines, cfg.entry_timeout)
+    stats = {'signals': len(signals), 'risk_blocked': 0, 'busy': 0, 'unfilled': 0, 'invalid_stop': 0}
+    balance = cfg.balance
+    open_until = {}   # 심볼 -> 청산 시각 (보유 중에는 같은 심볼 진입 안 함)
+    pending = []      # (청산 시각, 순번, 거래) 힙
+    trades, equity = [], []
+
+    def close_until(t):
+        nonlocal balance
+        while pending and pending[0][0] <= t:
+            exit_time, _, trade = heapq.heappop(pending)
+            now[0] = exit_time / 1000
+            balance += trade['pnl']
+            risk.record_result(trade['pnl'])
+            trades.append(trade)
+            equity.append((exit_time, balance))
+
+    for t, sym, sig, i in signals:
+        close_until(t)
+        now[0] = t / 1000
+        if open_until.get(sym, -1) >= t:
+            stats['busy'] += 1
+            continue
+        # main.trade_logic과 같이 진입 전에 거래 수/쿨다운 자리를 예약 (보유 중인 거래도 일일 한도에 포함)
+        if not risk.try_acquire(sym):
+            stats['risk_blocked'] += 1
+            continue
+
+        k = klines[sym]
+        entry = float(k['close'][i])
+        prev = k['close'][max(0, i - cfg.stop_lookback):i]
+        stop = float(prev.min() if sig == 'buy' else prev.max())
+        # 손절가가 진입가의 반대편에 있으면 거래소가 STOP 주문을 거절
+        if (sig == 'buy' and stop >= entry) or (sig == 'sell' and stop <= entry):
+            stats['invalid_stop'] += 1
+            risk.release(sym)
+            continue
+
+        qty, lev = risk.size_leverage(balance, entry, stop)
+        tp = entry * (1 + cfg.take_profit) if sig == 'buy' else entry * (1 - cfg.take_profit)
+        executor.at(sym, i)
+        executor.set_leverage(sym, lev)
+        order = executor.enter_limit(sym, 'BUY' if sig == 'buy' else 'SELL', qty, entry)
+        if order['status'] != 'FILLED':
+            # 주문은 나갔으므로 실거래와 같이 예약은 유지 (만료된 진입도 거래 수/쿨다운에 포함)
+            stats['unfilled'] += 1
+            continue
+        fill = order['fill_index']
+        result = executor.place_oco(sym, 'SELL' if sig == 'buy' else 'BUY', qty, stop, tp)
+
+        direction = 1 if sig == 'buy' else -1
+        fee = (entry + result['exit']) * qty * cfg.fee_rate
+        pnl = (result['exit'] - entry) * qty * direction - fee
+        exit_time = int(k['open_time'][result['exit_index']])
+        open_until[sym] = exit_time
+        heapq.heappush(pending, (exit_time, len(trades) + len(pending), {
+            'symbol': sym, 'side': sig, 'signal_time': t, 'entry_time': int(k['open_time'][fill]),
+            'exit_time': exit_time, 'entry': entry, 'exit': result['exit'], 'stop': stop, 'tp': tp,
+            'qty': qty, 'leverage': lev, 'fee': fee, 'pnl': pnl, 'reason': result['reason'],
+        }))
+    close_until(float('inf'))
+
+    trades = pd.DataFrame(trades, columns=['symbol', 'side', 'signal_time', 'entry_time', 'exit_time',
+                                           'entry', 'exit', 'stop', 'tp', 'qty', 'leverage', 'fee',
+                                           'pnl', 'reason'])
+    equity = pd.DataFrame(equity, columns=['time', 'balance'])
+    return BacktestResult(trades, equity, stats, cfg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--symbols', default=None, help='쉼표로 구분한 심볼 목록')
+    parser.add_argument('--balance', type=float, default=1000.0)
+    parser.add_argument('--spike-factor', type=float, default=SPIKE_FACTOR)
+    parser.add_argument('--confirm-period', type=int, default=CONFIRM_PERIOD)
+    parser.add_argument('--buy-threshold', type=float, default=BUY_THRESHOLD)
+    parser.add_argument('--sell-threshold', type=float, default=SELL_THRESHOLD)
+    parser.add_argument('--sentiment', type=float, default=0.0, help='과거 트윗 대신 쓸 고정 감성 점수')
+    parser.add_argument('--trigger-threshold', type=float, default=TRIGGER_THRESHOLD,
+                        help='이 변동률(%%) 이상인 캔들만 평가 (기본: 모든 캔들)')
+    parser.add_argument('--out', default=None, help='거래 목록 CSV 경로')
+    args = parser.parse_args()
+
+    klines = load_klines(args.path, args.symbols.split(',') if args.symbols else None)
+    cfg = BacktestConfig(balance=args.balance, spike_factor=args.spike_factor,
+                         confirm_period=args.confirm_period, buy_threshold=args.buy_threshold,
+                         sell_threshold=args.sell_threshold, sentiment=args.sentiment,
+                         trigger_threshold=args.trigger_threshold)
+    result = run_backtest(klines, cfg)
+    print(result.report())
+    if args.out:
+        result.trades.to_csv(args.out, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""AnomalyDetector.update 틱당 처리 시간 및 심볼당 메모리 (1m/5m/15m z-score)
+
+사용법: python benchmarks/bench_anomaly.py [--symbols 500] [--seconds 3600]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+
+from anomaly_detector import AnomalyDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--seconds', type=int, default=3600, help='시뮬레이션할 스트림 길이 (심볼마다 초당 1틱)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    symbols = [f"S{i:03d}USDT" for i in range(args.symbols)]
+    start = rng.uniform(0.1, 50000, args.symbols)
+    prices = (start * np.exp(np.cumsum(rng.normal(0, 0.0005, (args.seconds, args.symbols)), axis=0))).tolist()
+
+    det = AnomalyDetector()
+    update = det.update
+    t0 = time.perf_counter()
+    for t, row in enumerate(prices):
+        for sym, p in zip(symbols, row):
+            update(sym, p, float(t))
+    elapsed = time.perf_counter() - t0
+    ticks = args.seconds * args.symbols
+
+    s = next(iter(det._series.values()))
+    per_symbol = s.prices.itemsize * len(s.prices) + s.rets.itemsize * len(s.rets)
+    print(f"symbols={args.symbols} ticks={ticks:,} (stream time {args.seconds}s)")
+    print(f"update      : {elapsed / ticks * 1e9:7.0f} ns/tick  ({ticks / elapsed / 1e6:.2f}M ticks/s, "
+          f"{ticks / elapsed / args.symbols:,.0f}x a 1 Hz stream)")
+    print(f"ring buffers: {per_symbol / 1024:7.1f} KiB/symbol  ({per_symbol * args.symbols / 2**20:.1f} MiB total)")
+    print(f"anomalies={det.stats['anomalies']} wicks={det.stats['wicks']}")
+
+
+if __name__ == '__main__':
+    main()
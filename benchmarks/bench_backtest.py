@@ -0,0 +1,57 @@
+"""백테스트 처리량: 합성 1분봉 (기본 500 심볼 × 30일) 로딩 + 시그널 + 재생 시간
+
+사용법: python benchmarks/bench_backtest.py [--symbols 500] [--days 30] [--csv]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestConfig, load_klines, run_backtest
+
+
+def make_klines(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    volume = rng.uniform(1, 2, n)
+    volume[rng.random(n) < 0.02] *= 10
+    return {'open_time': 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 60_000,
+            'open': close, 'high': close * 1.003, 'low': close * 0.997, 'close': close, 'volume': volume}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--csv', action='store_true', help='CSV로 저장 후 청크 로딩 시간도 측정')
+    args = parser.parse_args()
+
+    n = args.days * 1440
+    klines = {f'S{i:03d}USDT': make_klines(n, i) for i in range(args.symbols)}
+
+    if args.csv:
+        with tempfile.TemporaryDirectory() as tmp:
+            for sym, k in klines.items():
+                pd.DataFrame(k).to_csv(os.path.join(tmp, f'{sym}.csv'), index=False)
+            t0 = time.perf_counter()
+            klines = load_klines(tmp)
+            print(f"load csv   : {time.perf_counter() - t0:8.2f} s")
+
+    cfg = BacktestConfig(trigger_threshold=0.5, sentiment=1.0)
+    t0 = time.perf_counter()
+    result = run_backtest(klines, cfg)
+    elapsed = time.perf_counter() - t0
+    s = result.summary()
+    print(f"symbols={args.symbols} candles/symbol={n} rows={args.symbols * n:,}")
+    print(f"backtest   : {elapsed:8.2f} s  ({args.symbols * n / elapsed / 1e6:.1f}M candles/s)")
+    print(f"signals={s['signals']} trades={s['trades']} pnl={s['total_pnl']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
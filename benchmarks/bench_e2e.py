@@ -0,0 +1,140 @@
+"""monitor/trade_logic 종단 간 벤치마크 - 로컬 거래소 시뮬레이터(exchange_sim.py) 대상, 네트워크 없음
+
+급등락을 주입한 시각부터 trade_logic 시작(감지 지연), trade_logic 소요 시간, 주문 도착까지의 지연을 측정합니다.
+--force-signal이면 시그널 확인을 건너뛰고 급등락 방향으로 바로 주문해 주문 경로까지 부하를 줍니다.
+
+사용법: python benchmarks/bench_e2e.py [--symbols 500] [--max-symbols 200] [--duration 30] [--bursts-per-sec 2] [--force-signal]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import tempfile
+import threading
+import time
+
+from exchange_sim import ExchangeSim, Faults, PricePath
+
+
+def _pct(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--bursts-per-sec', type=float, default=2.0)
+    parser.add_argument('--burst-size', type=float, default=5.0, help='주입할 급등락 크기 (%%)')
+    parser.add_argument('--tick', type=float, default=0.25)
+    parser.add_argument('--latency', type=float, default=0.0, help='REST 응답 지연 (초)')
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--disconnect-every', type=float, default=None)
+    parser.add_argument('--max-symbols', type=int, default=None, help='감시 대상 상한 (기본: 전체)')
+    parser.add_argument('--force-signal', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sim = ExchangeSim(args.symbols, path=PricePath(args.symbols, seed=args.seed), tick_interval=args.tick,
+                      faults=Faults(latency=args.latency, rate_429=args.rate_429,
+                                    disconnect_every=args.disconnect_every, seed=args.seed),
+                      seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='bench_e2e_')
+    # 봇 모듈은 import 시점에 주소를 읽으므로 먼저 환경 변수를 설정
+    os.environ.update(sim.env())
+    os.environ.update({'TRADE_DB_PATH': os.path.join(workdir, 'trades.db'),
+                       'PNL_SNAPSHOT_PATH': os.path.join(workdir, 'pnl.json'),
+                       'RISK_SNAPSHOT_PATH': os.path.join(workdir, 'risk.json'),
+                       'SLACK_WEBHOOK_URL': '',
+                       # 합성 거래대금이라 하한 없이 순위만 사용
+                       'MIN_QUOTE_VOLUME': '0', 'MAX_SYMBOLS': str(args.max_symbols or args.symbols)})
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main as bot
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    risk = bot.get_risk_manager()
+    risk.max_daily = risk.max_streak = 10**9
+    risk.cooldown = 0
+
+    runs = []   # (symbol, 시작, 종료)
+    trade_logic = bot.trade_logic
+
+    def timed_trade_logic(symbol):
+        start = time.time()
+        try:
+            trade_logic(symbol)
+        finally:
+            runs.append((symbol, start, time.time()))
+    bot.trade_logic = timed_trade_logic
+
+    if args.force_signal:
+        direction = {}
+        bot.get_signal = lambda symbol: (direction.get(symbol, 'buy'), 'forced by benchmark')
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        threading.Thread(target=bot.monitor, name='bench-monitor', daemon=True).start()
+        # 초기 가격/필터 로드, 감시 대상 선정 및 스트림 연결 대기
+        deadline = time.monotonic() + 60
+        while bot.universe.loaded_at is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(2.0)
+        watched = bot.universe.symbols() or sim.symbols
+
+        rng = random.Random(args.seed)
+        bursts = []   # (symbol, 주입 시각)
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            symbol = rng.choice(watched)
+            pct = args.burst_size * rng.choice((-1, 1))
+            if args.force_signal:
+                direction[symbol] = 'buy' if pct > 0 else 'sell'
+            sim.burst(symbol, pct)
+            bursts.append((symbol, time.time()))
+            time.sleep(1.0 / args.bursts_per_sec)
+        time.sleep(2.0)
+
+    detect, handle, to_order = [], [], []
+    started = {}
+    for symbol, start, end in runs:
+        started.setdefault(symbol, []).append(start)
+        handle.append(end - start)
+    orders = {}
+    for t, symbol, otype in list(sim.order_log):
+        if otype == 'LIMIT':
+            orders.setdefault(symbol, []).append(t)
+    for symbol, t in bursts:
+        later = [s for s in started.get(symbol, []) if s >= t]
+        if later:
+            detect.append(min(later) - t)
+        placed = [o for o in orders.get(symbol, []) if o >= t]
+        if placed:
+            to_order.append(min(placed) - t)
+
+    elapsed = args.duration
+    print(f"symbols={args.symbols} duration={elapsed:.0f}s bursts={len(bursts)} "
+          f"latency={args.latency * 1000:.0f}ms 429={args.rate_429:.0%}")
+    print(f"watched symbols: {len(watched)}")
+    print(f"trade_logic runs: {len(runs)} ({len(detect)}/{len(bursts)} bursts detected)")
+    for label, values in (('burst -> trade_logic', detect), ('trade_logic', handle), ('burst -> order', to_order)):
+        print(f"  {label:22s} p50={_pct(values, 0.5):8.1f} ms  p95={_pct(values, 0.95):8.1f} ms  "
+              f"max={_pct(values, 1.0):8.1f} ms  n={len(values)}")
+    requests_total = sum(sim.requests.values())
+    print(f"REST requests: {requests_total} ({requests_total / elapsed:.1f}/s), 429s: {sim.stats['429']}")
+    for (method, path), n in sim.requests.most_common(8):
+        print(f"  {method:6s} {path:28s} {n}")
+    print(f"orders={sim.stats['orders']} fills={sim.stats['fills']} ws_messages={sim.stats['ws_messages']} "
+          f"ws_connections={sim.stats['ws_connections']} disconnects={sim.stats['disconnects']}")
+    sim.stop()
+
+
+if __name__ == "__main__":
+    main()
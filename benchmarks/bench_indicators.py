@@ -0,0 +1,64 @@
+"""apply_indicators(전체 재계산) vs IndicatorEngine(증분 갱신) 비교
+
+사용법: python benchmarks/bench_indicators.py [--symbols 500] [--history 100] [--candles 20]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from technical_analysis import apply_indicators, IndicatorEngine
+
+
+def make_closes(symbols, length, seed=0):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.1, 50000, size=(symbols, 1))
+    return start * np.exp(np.cumsum(rng.normal(0, 0.002, size=(symbols, length)), axis=1))
+
+
+def bench_full(closes, history, candles):
+    """새 캔들마다 최근 history개로 apply_indicators 재계산 (기존 경로)"""
+    t0 = time.perf_counter()
+    for j in range(history, history + candles):
+        for row in closes:
+            apply_indicators(pd.DataFrame({'close': row[j - history + 1:j + 1]}))
+    return time.perf_counter() - t0
+
+
+def bench_incremental(closes, history, candles):
+    """초기 시드 후 새 캔들마다 O(1) 갱신"""
+    engine = IndicatorEngine()
+    symbols = [f"SYM{i}USDT" for i in range(len(closes))]
+    for sym, row in zip(symbols, closes):
+        engine.seed(sym, row[:history])
+    t0 = time.perf_counter()
+    for j in range(history, history + candles):
+        for sym, row in zip(symbols, closes):
+            engine.update(sym, row[j])
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--history', type=int, default=100)
+    parser.add_argument('--candles', type=int, default=20)
+    args = parser.parse_args()
+
+    closes = make_closes(args.symbols, args.history + args.candles)
+    full = bench_full(closes, args.history, args.candles)
+    inc = bench_incremental(closes, args.history, args.candles)
+    per_cycle_full = full / args.candles * 1000
+    per_cycle_inc = inc / args.candles * 1000
+    print(f"symbols={args.symbols} history={args.history} candles={args.candles}")
+    print(f"apply_indicators : {per_cycle_full:9.2f} ms/cycle")
+    print(f"IndicatorEngine  : {per_cycle_inc:9.2f} ms/cycle  ({per_cycle_full / per_cycle_inc:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""RiskManager.can_trade 호출 지연: 쿨다운 중인 심볼 수에 따른 변화
+
+사용법: python benchmarks/bench_risk.py [--symbols 5000] [--calls 200000]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from risk_manager import RiskManager
+from pnl_aggregates import PnlAggregates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--calls', type=int, default=200_000)
+    args = parser.parse_args()
+
+    now = [1_700_000_000.0]
+    clock = lambda: now[0]
+    symbols = [f'S{i:05d}USDT' for i in range(args.symbols)]
+
+    cases = (('empty', 0, None), ('cooldowns', args.symbols, None),
+             ('aggregates', args.symbols, PnlAggregates(clock=clock)))
+    for label, size, aggregates in cases:
+        rm = RiskManager(max_daily=10**9, max_streak=10**9, clock=clock, aggregates=aggregates)
+        for sym in symbols[:size]:
+            rm.register(1.0, sym)
+        n = len(symbols)
+        t0 = time.perf_counter()
+        for i in range(args.calls):
+            rm.can_trade(symbols[i % n])
+        elapsed = time.perf_counter() - t0
+        print(f"can_trade ({label:10s}, {len(rm.last):5d} in cooldown): {elapsed / args.calls * 1e9:7.0f} ns/call")
+
+    # 전체 쿨다운이 한꺼번에 만료될 때 (힙에서 한 번씩만 꺼냄)
+    now[0] += rm.cooldown + 1
+    t0 = time.perf_counter()
+    rm.can_trade(symbols[0])
+    print(f"expire {args.symbols} cooldowns           : {(time.perf_counter() - t0) * 1e3:7.2f} ms total")
+
+
+if __name__ == '__main__':
+    main()
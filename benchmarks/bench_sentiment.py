@@ -0,0 +1,73 @@
+"""VADER 채점: 트윗별 polarity_scores vs 캐시/배치(compound_scores) 비교
+
+사용법: python benchmarks/bench_sentiment.py [--tweets 10000] [--unique 0.3] [--processes N]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+import sentiment_analysis
+from sentiment_analysis import compound_scores, clear_cache
+
+WORDS = ("bitcoin eth moon pump dump scam great awful bullish bearish rally crash hodl "
+         "buy sell whale breakout support resistance love hate wow ugh profit loss").split()
+
+
+def make_corpus(n, unique_ratio, seed=0):
+    """고정 시드 트윗 코퍼스 - 일부는 리트윗/링크만 다른 중복"""
+    rng = random.Random(seed)
+    base = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20))) + rng.choice(["!", ".", " #BTC", " #ETH"])
+            for _ in range(max(1, int(n * unique_ratio)))]
+    corpus = []
+    for _ in range(n):
+        text = rng.choice(base)
+        r = rng.random()
+        if r < 0.3:
+            text = f"RT @user{rng.randint(1, 500)}: {text}"
+        elif r < 0.4:
+            text = f"{text} https://t.co/{rng.randint(10**6, 10**7)}"
+        corpus.append(text)
+    return corpus
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tweets', type=int, default=10_000)
+    parser.add_argument('--unique', type=float, default=0.3)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.tweets, args.unique)
+    analyzer = sentiment_analysis._analyzer
+
+    baseline = timed(lambda: [analyzer.polarity_scores(t)['compound'] for t in corpus])
+
+    clear_cache()
+    sentiment_analysis.PROCESS_BATCH_MIN = float('inf')
+    cold = timed(lambda: compound_scores(corpus))
+    warm = timed(lambda: compound_scores(corpus))
+
+    clear_cache()
+    sentiment_analysis.PROCESS_BATCH_MIN = 0
+    sentiment_analysis._get_pool(args.processes or os.cpu_count())  # 풀 기동 비용 제외
+    pooled = timed(lambda: compound_scores(corpus, processes=args.processes))
+
+    print(f"tweets={args.tweets} unique≈{args.unique:.0%}")
+    print(f"per-tweet polarity_scores : {baseline * 1000:8.1f} ms")
+    print(f"memoized (cold)           : {cold * 1000:8.1f} ms  ({baseline / cold:.1f}x)")
+    print(f"memoized (warm)           : {warm * 1000:8.1f} ms  ({baseline / warm:.1f}x)")
+    print(f"process pool (cold)       : {pooled * 1000:8.1f} ms  ({baseline / pooled:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""tracing span 오버헤드: 비활성화 / 활성화 상태에서 span 하나당 비용
+
+사용법: python benchmarks/bench_tracing.py [--calls 1000000]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from tracing import Tracer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    for _ in range(args.calls):
+        pass
+    base = time.perf_counter() - t0
+
+    for enabled in (False, True):
+        tracer = Tracer(enabled=enabled)
+        t0 = time.perf_counter()
+        for _ in range(args.calls):
+            with tracer.span('order_submit'):
+                pass
+        elapsed = time.perf_counter() - t0 - base
+        print(f"span ({'enabled' if enabled else 'disabled':8s}): {elapsed / args.calls * 1e9:6.0f} ns/span")
+
+    print(f"summary: {tracer.summary()['order_submit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""시그널 핫패스 벤치마크 모음 - 고정 시드 합성 입력, JSON 기준선 저장 및 회귀 비교
+
+심볼 1/100/500개 (get_klines, apply_indicators, compute_score, sentiment_score, RiskManager)와
+거래 기록 10k/1M행 (logger.daily_report)에서 측정합니다. 네트워크는 쓰지 않습니다.
+
+사용법:
+  python benchmarks/suite.py run [--quick] [--only compute_score] [--out benchmarks/baseline.json]
+  python benchmarks/suite.py compare benchmarks/baseline.json [current.json] [--threshold 0.2]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+SYMBOL_SIZES = (1, 100, 500)
+LOG_SIZES = (10_000, 1_000_000)
+QUICK_SYMBOL_SIZES = (1, 100)
+QUICK_LOG_SIZES = (10_000,)
+TWEETS_PER_SYMBOL = 50      # 심볼당 감성 분석 트윗 수
+REPEAT = 5                  # 측정 반복 횟수 (최소값을 비교에 사용)
+MIN_SAMPLE_TIME = 0.05      # 한 번 측정할 때 최소 소요 시간 (짧은 케이스는 여러 번 돌려 잼)
+THRESHOLD = 0.2             # 기준선 대비 이 비율 이상 느려지면 회귀
+SEED = 0
+
+WORDS = ("bitcoin eth moon pump dump scam great awful bullish bearish rally crash hodl "
+         "buy sell whale breakout support resistance love hate wow ugh profit loss").split()
+
+
+def _symbols(n):
+    return [f"S{i:03d}USDT" for i in range(n)]
+
+
+def make_kline_arrays(n, length, seed=SEED):
+    """심볼별 1분봉 컬럼 배열 - 마지막 캔들은 거래량 스파이크 (compute_score가 끝까지 진행하도록)"""
+    rng = np.random.default_rng(seed)
+    now_ms = int(time.time() * 1000) // 60_000 * 60_000
+    open_time = now_ms - np.arange(length, 0, -1, dtype=np.int64) * 60_000
+    out = {}
+    for sym in _symbols(n):
+        close = rng.uniform(0.1, 50000) * np.exp(np.cumsum(rng.normal(0, 0.002, length)))
+        volume = rng.uniform(1, 2, length)
+        volume[-1] *= 10
+        out[sym] = {'open_time': open_time, 'open': close, 'high': close * 1.001, 'low': close * 0.999,
+                    'close': close, 'volume': volume, 'close_time': open_time + 59_999}
+    return out
+
+
+def make_tweets(n, seed=SEED):
+    rng = random.Random(seed)
+    return [{'id': str(10**15 + i),
+             'text': " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20))) + f" #{rng.randint(0, 10**6)}"}
+            for i in range(n)]
+
+
+def _seeded_store(n):
+    """합성 캔들로 채운 KlineStore - 갱신 주기를 무한대로 두어 REST를 호출하지 않음"""
+    from kline_store import KlineStore
+    from signal_generator import KLINE_LOOKBACK
+
+    def fetch(*args, **kwargs):
+        raise RuntimeError("benchmark kline store must not fetch")
+    store = KlineStore(fetch, max_age=float('inf'), default_limit=KLINE_LOOKBACK)
+    for sym, arrays in make_kline_arrays(n, KLINE_LOOKBACK).items():
+        store.seed(sym, '1m', arrays, KLINE_LOOKBACK)
+    return store
+
+
+# 각 케이스: setup(size) -> (run, 연산 수, reset 또는 None). reset이 있으면 매 측정 전에 호출 (콜드 측정)
+
+def bench_get_klines(n):
+    import data_fetcher
+    from signal_generator import KLINE_LOOKBACK
+    data_fetcher.kline_store = _seeded_store(n)
+    symbols = _symbols(n)
+    return (lambda: [data_fetcher.get_klines(s, limit=KLINE_LOOKBACK) for s in symbols]), n, None
+
+
+def bench_apply_indicators(n):
+    from technical_analysis import apply_indicators
+    from signal_generator import KLINE_LOOKBACK
+    frames = [pd.DataFrame({'close': a['close'], 'volume': a['volume']})
+              for a in make_kline_arrays(n, KLINE_LOOKBACK).values()]
+    return (lambda: [apply_indicators(df.copy()) for df in frames]), n, None
+
+
+def bench_compute_score(n):
+    import data_fetcher
+    import signal_generator
+    data_fetcher.kline_store = _seeded_store(n)
+    from sentiment_analysis import sentiment_score
+    tweets = make_tweets(TWEETS_PER_SYMBOL)
+    cached = (tweets, sentiment_score([t['text'] for t in tweets]))   # 감성 서비스 캐시 적중
+    signal_generator.get_sentiment = lambda symbol: cached
+    signal_generator.notify_slack = lambda message: None
+    symbols = _symbols(n)
+    return (lambda: [signal_generator.compute_score(s) for s in symbols]), n, None
+
+
+def bench_sentiment_score(n):
+    """심볼마다 서로 다른 트윗 - 캐시를 비운 상태에서 측정"""
+    import sentiment_analysis
+    from sentiment_analysis import sentiment_score, clear_cache
+    sentiment_analysis.PROCESS_BATCH_MIN = float('inf')
+    batches = [[t['text'] for t in make_tweets(TWEETS_PER_SYMBOL, seed=i)] for i in range(n)]
+    return (lambda: [sentiment_score(b) for b in batches]), n, clear_cache
+
+
+def _risk_manager(n):
+    from risk_manager import RiskManager
+    from pnl_aggregates import PnlAggregates
+    now = [1_700_000_000.0]
+    clock = lambda: now[0]
+    rm = RiskManager(max_daily=10**9, max_streak=10**9, clock=clock, aggregates=PnlAggregates(clock=clock))
+    symbols = _symbols(n)
+    for sym in symbols[::2]:   # 절반은 쿨다운 중
+        rm.register(1.0, sym)
+    return rm, symbols
+
+
+def bench_can_trade(n):
+    rm, symbols = _risk_manager(n)
+    return (lambda: [rm.can_trade(s) for s in symbols]), n, None
+
+
+def bench_size_leverage(n):
+    from symbol_meta import SymbolMeta
+    rm, symbols = _risk_manager(n)
+    rng = np.random.default_rng(SEED)
+    entries = rng.uniform(0.1, 50000, n)
+    args = [(1000.0, e, e * (1 - rng.uniform(0.002, 0.03)), SymbolMeta(s, tick=0.01, step=0.001))
+            for s, e in zip(symbols, entries)]
+    return (lambda: [rm.size_leverage(*a) for a in args]), n, None
+
+
+def _write_trade_log(path, rows, seed=SEED):
+    """30일에 걸친 거래 기록 (마지막 날이 오늘)을 저장소 형식 그대로 한 번에 기록"""
+    from trade_store import TradeStore
+    store = TradeStore(path)
+    rng = np.random.default_rng(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = 30
+    day_idx = np.sort(rng.integers(0, days, rows))
+    offsets = rng.integers(0, 86_400_000, rows)
+    pnl = rng.normal(0.5, 5.0, rows).round(4)
+    symbols = _symbols(500)
+    starts = [(today - timedelta(days=days - 1 - d)) for d in range(days)]
+    labels = [s.strftime('%Y-%m-%d') for s in starts]
+    starts_ms = [int(s.timestamp() * 1000) for s in starts]
+    # 오늘 기록은 현재 시각 이전으로 제한
+    today_span = max(1, int(time.time() * 1000) - starts_ms[-1])
+    batch = []
+    conn = store._connect()
+    with conn:
+        for i in range(rows):
+            d = int(day_idx[i])
+            off = int(offsets[i]) % today_span if d == days - 1 else int(offsets[i])
+            batch.append((starts_ms[d] + off, labels[d], symbols[i % 500], 'buy' if i % 2 else 'sell',
+                          100.0, 101.0, float(pnl[i])))
+            if len(batch) >= 50_000:
+                store._write(conn, batch)
+                batch = []
+        if batch:
+            store._write(conn, batch)
+    conn.close()
+    store.stop()
+
+
+def _point_logger(workdir):
+    import logger
+    logger.TRADE_DB_PATH = os.path.join(workdir, 'trades.db')
+    logger.PNL_SNAPSHOT_PATH = os.path.join(workdir, 'pnl_snapshot.json')
+    logger.LEGACY_CSV_PATH = os.path.join(workdir, 'trade_log.csv')
+    logger.notify_slack = lambda message: None
+    return logger
+
+
+def _reset_logger(logger):
+    if logger._store is not None:
+        logger._store.stop()
+    logger._store = None
+    logger._aggregates = None
+
+
+def bench_daily_report(rows):
+    """집계가 복원된 상태에서의 보고서 (매일 호출되는 경로)"""
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    _write_trade_log(os.path.join(workdir, 'trades.db'), rows)
+    logger = _point_logger(workdir)
+    _reset_logger(logger)
+    logger.get_aggregates()
+    _cleanup.append(workdir)
+    return logger.daily_report, 1, None
+
+
+def bench_daily_report_cold(rows):
+    """재시작 직후 첫 보고서 - 스냅샷 복원 + 이후 기록 재반영 포함"""
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    _write_trade_log(os.path.join(workdir, 'trades.db'), rows)
+    logger = _point_logger(workdir)
+    _reset_logger(logger)
+    logger.get_aggregates().save()    # 마지막 거래까지 반영된 스냅샷
+    _cleanup.append(workdir)
+    return logger.daily_report, 1, lambda: _reset_logger(logger)
+
+
+CASES = (
+    ('get_klines', SYMBOL_SIZES, bench_get_klines),
+    ('apply_indicators', SYMBOL_SIZES, bench_apply_indicators),
+    ('compute_score', SYMBOL_SIZES, bench_compute_score),
+    ('sentiment_score', SYMBOL_SIZES, bench_sentiment_score),
+    ('risk.can_trade', SYMBOL_SIZES, bench_can_trade),
+    ('risk.size_leverage', SYMBOL_SIZES, bench_size_leverage),
+    ('daily_report', LOG_SIZES, bench_daily_report),
+    ('daily_report_cold', LOG_SIZES, bench_daily_report_cold),
+)
+_cleanup = []
+
+
+def measure(run, reset=None, repeat=REPEAT, min_time=MIN_SAMPLE_TIME):
+    """(한 번 실행 시간 목록, 측정당 실행 횟수) - 짧은 케이스는 min_time을 넘도록 여러 번 돌림"""
+    if reset:
+        reset()
+    t0 = time.perf_counter()
+    run()   # 워밍업 (import, 캐시 생성)
+    once = time.perf_counter() - t0
+    number = 1 if reset else max(1, int(min_time / max(once, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        if reset:
+            reset()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            run()
+        samples.append((time.perf_counter() - t0) / number)
+    return samples, number
+
+
+def case_names(quick=False):
+    out = []
+    for name, sizes, _ in CASES:
+        if quick:
+            sizes = [s for s in sizes if s in QUICK_SYMBOL_SIZES + QUICK_LOG_SIZES]
+        out.extend(f"{name}[{s}]" for s in sizes)
+    return out
+
+
+def run_suite(names=None, quick=False, only=None, repeat=REPEAT, verbose=True):
+    """케이스별 {min_s, median_s, per_op_us, ops, number, repeat}"""
+    wanted = set(names) if names is not None else set(case_names(quick))
+    results = {}
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        for name, sizes, setup in CASES:
+            if only and not any(o in name for o in only):
+                continue
+            for size in sizes:
+                key = f"{name}[{size}]"
+                if key not in wanted:
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run, ops, reset = setup(size)
+                    samples, number = measure(run, reset, repeat)
+                best = min(samples)
+                results[key] = {'min_s': best, 'median_s': statistics.median(samples),
+                                'per_op_us': best / ops * 1e6, 'ops': ops, 'number': number, 'repeat': repeat}
+                if verbose:
+                    print(f"{key:32s} {_fmt(best)}  {best / ops * 1e6:10.2f} µs/op", flush=True)
+    finally:
+        while _cleanup:
+            shutil.rmtree(_cleanup.pop(), ignore_errors=True)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment():
+    return {'created': datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': np.__version__, 'pandas': pd.__version__}
+
+
+def save(path, results, quick=False):
+    """기준선 JSON 저장 (임시 파일에 쓴 뒤 교체)"""
+    data = {'version': 1, **environment(), 'quick': quick, 'results': results}
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return data
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=THRESHOLD, stat='min_s'):
+    """[(케이스, 기준 초, 현재 초, 비율, 상태)] - 상태: slower / faster / ok / new / missing"""
+    base, cur = baseline['results'], current['results']
+    rows = []
+    for key in sorted(set(base) | set(cur)):
+        if key not in cur:
+            rows.append((key, base[key][stat], None, None, 'missing'))
+            continue
+        if key not in base:
+            rows.append((key, None, cur[key][stat], None, 'new'))
+            continue
+        ratio = cur[key][stat] / base[key][stat] if base[key][stat] else float('inf')
+        status = 'slower' if ratio > 1 + threshold else ('faster' if ratio < 1 / (1 + threshold) else 'ok')
+        rows.append((key, base[key][stat], cur[key][stat], ratio, status))
+    return rows
+
+
+def _fmt(seconds):
+    if seconds is None:
+        return f"{'-':>13s}"
+    return f"{seconds * 1e6:10.2f} µs" if seconds < 1e-3 else f"{seconds * 1000:10.3f} ms"
+
+
+def print_comparison(rows, threshold=THRESHOLD):
+    marks = {'slower': '❌', 'faster': '🚀', 'ok': '  ', 'new': '➕', 'missing': '➖'}
+    for key, b, c, ratio, status in rows:
+        change = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else f"{'':8s}"
+        print(f"{marks[status]} {key:32s} {_fmt(b)} -> {_fmt(c)}  {change}  {status}")
+    slower = [r for r in rows if r[4] == 'slower']
+    print(f"{len(slower)} regression(s) beyond {threshold:.0%}" if slower else f"no regressions beyond {threshold:.0%}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    run_p = sub.add_parser('run', help='벤치마크 실행 (--out이면 JSON 기준선 저장)')
+    run_p.add_argument('--out')
+    run_p.add_argument('--quick', action='store_true', help='큰 입력(500 심볼, 1M행) 제외')
+    run_p.add_argument('--only', nargs='+', help='이름에 이 문자열이 들어간 케이스만')
+    run_p.add_argument('--repeat', type=int, default=REPEAT)
+    cmp_p = sub.add_parser('compare', help='기준선과 비교 (current를 생략하면 같은 케이스를 지금 실행)')
+    cmp_p.add_argument('baseline')
+    cmp_p.add_argument('current', nargs='?')
+    cmp_p.add_argument('--threshold', type=float, default=THRESHOLD)
+    cmp_p.add_argument('--stat', choices=('min_s', 'median_s'), default='min_s')
+    cmp_p.add_argument('--repeat', type=int, default=REPEAT)
+    cmp_p.add_argument('--out', help='이번 실행 결과 저장 경로')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_suite(quick=args.quick, only=args.only, repeat=args.repeat)
+        if args.out:
+            save(args.out, results, args.quick)
+            print(f"saved {len(results)} results to {args.out}")
+        return 0
+
+    baseline = load(args.baseline)
+    if args.current:
+        current = load(args.current)
+    else:
+        current = {'results': run_suite(names=list(baseline['results']), repeat=args.repeat)}
+        if args.out:
+            save(args.out, current['results'], baseline.get('quick', False))
+    print(f"baseline: {args.baseline} ({baseline.get('commit')}, {baseline.get('created')})")
+    slower = print_comparison(compare(baseline, current, args.threshold, args.stat), args.threshold)
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
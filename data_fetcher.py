@@ -1,31 +1,49 @@
-import os
 import pandas as pd
-from binance.client import Client
-import tweepy
 from dotenv import load_dotenv
 
+from http_client import binance_client
+from kline_store import KlineStore
+from symbol_meta import SymbolMetaCache
+from technical_analysis import required_candles
+from universe import Universe
+
 load_dotenv()
 
-client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_API_SECRET'))
-twitter_client = tweepy.Client(bearer_token=os.getenv('TWITTER_BEARER_TOKEN'))
+client = binance_client()
+
+# 심볼별 거래소 필터 캐시 (get_symbols와 같은 exchangeInfo 응답으로 채움)
+symbol_meta = SymbolMetaCache(lambda: client.futures_exchange_info())
 
 def get_symbols():
     print("📥 Fetching tradable symbols...")
-    exchange_info = client.futures_exchange_info()
-    symbols = [s['symbol'] for s in exchange_info['symbols'] if s['status'] == 'TRADING']
+    symbol_meta.refresh()
+    symbols = symbol_meta.trading_symbols()
     print(f"✅ {len(symbols)} tradable symbols fetched")
     return symbols
 
-def get_klines(symbol, interval='1m', limit=6):
-    cols = ['open_time','open','high','low','close','volume','close_time',
-            'quote_vol','trades','taker_buy_base','taker_buy_quote','ignore']
-    data = client.futures_klines(symbol=symbol, interval=interval, limit=limit)
-    df = pd.DataFrame(data, columns=cols)
-    df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-    df['close'] = df['close'].astype(float)
-    df['volume'] = df['volume'].astype(float)
-    return df[['open_time','close','volume']]
-
-def get_tweets(query, max_results=50):
-    tweets = twitter_client.search_recent_tweets(query=query, max_results=max_results)
-    return [t.text for t in tweets.data] if tweets.data else []
+def _fetch_klines(symbol, interval, limit, start_time=None):
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    if start_time is not None:
+        params['startTime'] = start_time
+    return client.futures_klines(**params)
+
+# 24시간 거래대금/실현 변동성 상위 심볼만 감시 대상으로 유지 (거래 가능한 심볼 중에서)
+universe = Universe(lambda: client.futures_ticker(), _fetch_klines, allowed=symbol_meta.trading_symbols)
+
+# 지표 계산에 필요한 캔들 수 (기본 조회 구간)
+KLINE_LIMIT = required_candles()
+
+# 심볼별 롤링 캔들 캐시 (최초 1회 필요한 구간만 조회 후 새 캔들만 추가)
+kline_store = KlineStore(_fetch_klines, default_limit=KLINE_LIMIT)
+
+def get_kline_arrays(symbol, interval='1m', limit=KLINE_LIMIT):
+    """캐시된 캔들 버퍼의 컬럼별 NumPy 뷰 (복사 없음)"""
+    return kline_store.get(symbol, interval, limit)
+
+def get_klines(symbol, interval='1m', limit=KLINE_LIMIT):
+    v = get_kline_arrays(symbol, interval, limit)
+    return pd.DataFrame({
+        'open_time': v['open_time'].view('datetime64[ms]'),
+        'close': v['close'],
+        'volume': v['volume'],
+    }, copy=False)
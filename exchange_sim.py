@@ -0,0 +1,877 @@
+"""
+로컬 바이낸스 선물 거래소 시뮬레이터 - 네트워크 없이 봇 전체를 부하/지연 테스트
+
+REST (/fapi/...)와 웹소켓 (시장 결합 스트림 /stream, user-data 스트림 /ws/<listenKey>)을 제공하고,
+랜덤워크 가격으로 주문을 체결합니다. 지연/429/연결 끊김을 주입할 수 있습니다.
+
+사용법:
+  python exchange_sim.py --symbols 500 --port 18080 --ws-port 18081
+  BINANCE_FUTURES_URL=http://127.0.0.1:18080 BINANCE_FUTURES_WS_URL=ws://127.0.0.1:18081 \\
+  BINANCE_API_KEY=sim BINANCE_API_SECRET=sim python main.py
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import numpy as np
+from websockets.asyncio.server import serve
+
+TICK_INTERVAL = 0.25      # 가격 갱신 주기 (초)
+CANDLE_SECONDS = 60       # 캔들 하나가 닫히는 실제 시간 (줄이면 시간 압축)
+HISTORY_CANDLES = 500     # 시작 시 미리 만드는 1분봉 수
+MAX_CANDLES = 1500        # 보관할 최대 캔들 수 (klines limit 최대값)
+MARK_PRICE_EVERY = 4      # 이 틱마다 !markPrice@arr 전송
+TAKER_FEE = 0.0004
+MAKER_FEE = 0.0002
+START_BALANCE = 10_000.0
+MIN_NOTIONAL = 5.0
+# main.get_cached_balance가 잔고 목록의 7번째 항목을 USDT로 읽으므로 실제 응답 순서를 흉내 냄
+BALANCE_ASSETS = ('FDUSD', 'BTC', 'BNB', 'ETH', 'BFUSD', 'USDC', 'USDT')
+CONDITIONAL = ('STOP_MARKET', 'TAKE_PROFIT_MARKET')   # /fapi/v1/algoOrder로만 접수 (/order, batchOrders는 -4120)
+
+
+class SimError(Exception):
+    """바이낸스 형식 오류 응답 ({"code": ..., "msg": ...})"""
+
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class Faults:
+    """주입할 장애 - REST 지연, 429 비율, 주기적 웹소켓 연결 끊김"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, disconnect_every=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.disconnect_every = disconnect_every
+        self.force_429 = 0   # 다음 N개 요청은 무조건 429
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._rng.uniform(0, self.jitter))
+
+    def throttled(self):
+        with self._lock:
+            if self.force_429:
+                self.force_429 -= 1
+                return True
+            return self.rate_429 > 0 and self._rng.random() < self.rate_429
+
+
+class PricePath:
+    """심볼별 기하 랜덤워크 가격 - burst()나 burst_prob로 급등락 주입"""
+
+    def __init__(self, n, start=None, vol=0.0005, drift=0.0, burst_prob=0.0, burst_size=5.0, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.n = n
+        self.prices = (np.asarray(start, dtype=float).copy() if start is not None
+                       else np.exp(self.rng.uniform(np.log(0.05), np.log(50_000), n)))
+        self.vol = vol
+        self.drift = drift
+        self.burst_prob = burst_prob
+        self.burst_size = burst_size
+        self._pending = np.zeros(n)
+
+    def burst(self, idx, pct):
+        """다음 틱에 idx 심볼 가격을 pct% 움직임"""
+        self._pending[idx] += math.log1p(pct / 100)
+
+    def step(self):
+        r = self.rng.normal(self.drift, self.vol, self.n)
+        if self.burst_prob:
+            mask = self.rng.random(self.n) < self.burst_prob
+            if mask.any():
+                signs = self.rng.choice((-1.0, 1.0), mask.sum())
+                r[mask] += np.log1p(signs * self.burst_size / 100)
+        r += self._pending
+        moved = self._pending != 0
+        self._pending[:] = 0
+        self.prices *= np.exp(r)
+        return self.prices, moved
+
+
+def _tick_size(price):
+    return 10.0 ** (math.floor(math.log10(price)) - 5)
+
+def _step_size(price):
+    return min(1.0, 10.0 ** math.floor(math.log10(10 / price)))
+
+def _decimals(step):
+    return max(0, -math.floor(math.log10(step) + 1e-9))
+
+
+class ExchangeSim:
+    """
+    인프로세스 바이낸스 선물 시뮬레이터.
+    start()가 REST(HTTP) 서버, 웹소켓 서버, 가격 틱 스레드를 띄우고 rest_url / ws_url을 돌려줍니다.
+    """
+
+    def __init__(self, symbols=500, host='127.0.0.1', port=0, ws_port=0, path=None, faults=None,
+                 tick_interval=TICK_INTERVAL, candle_seconds=CANDLE_SECONDS, history=HISTORY_CANDLES, seed=0):
+        if isinstance(symbols, int):
+            symbols = [f"SIM{i:04d}USDT" for i in range(symbols)]
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.path = path or PricePath(len(self.symbols), seed=seed)
+        self.faults = faults or Faults(seed=seed)
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.tick_interval = tick_interval
+        self.candle_seconds = candle_seconds
+        self.stats = Counter()
+        self.requests = Counter()      # (method, path) -> 요청 수
+        self.order_log = deque(maxlen=100_000)  # (수신 시각, symbol, type)
+        self.bursts = {}               # symbol -> 마지막 burst() 시각
+        self.balance = START_BALANCE
+        self.positions = {}            # symbol -> [amt, entry]
+        self.leverage = {}             # symbol -> leverage
+        self.margin_type = {}          # symbol -> 'ISOLATED' | 'CROSSED'
+        self.orders = {}               # orderId -> order dict
+        self.open_orders = {}          # orderId -> order dict (미체결)
+        self.by_client_id = {}
+        self.algo_orders = {}          # algoId -> 조건부(algo) 주문 dict
+        self.open_algo = {}            # algoId -> 트리거 대기 중인 algo 주문
+        self.by_client_algo_id = {}
+        self.listen_keys = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._ticks = 0
+        self._prices = self.path.prices.copy()
+        self._day_open = self._prices.copy()
+        self._init_filters()
+        self._init_candles(history)
+        self._http = None
+        self._loop = None
+        self._ws_server = None
+        self._market_clients = {}      # websocket -> 구독 스트림 set
+        self._user_clients = {}        # websocket -> listenKey
+        self._threads = []
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+
+    # --- 시장 데이터 ---
+
+    def _init_filters(self):
+        self.ticks = np.array([_tick_size(p) for p in self._prices])
+        self.steps = np.array([_step_size(p) for p in self._prices])
+        self.price_decimals = [_decimals(t) for t in self.ticks]
+        self.qty_decimals = [_decimals(s) for s in self.steps]
+
+    def _init_candles(self, history):
+        """과거 1분봉을 랜덤워크로 만들고 마지막 종가를 현재 가격으로 맞춤"""
+        n = len(self.symbols)
+        rng = self.path.rng
+        minute = int(time.time() // 60 * 60 * 1000)
+        self._candles = deque(maxlen=MAX_CANDLES)   # (open_time, ohlcv[5, n])
+        if history:
+            steps = rng.normal(0, self.path.vol * 8, (history, n))
+            closes = self._prices * np.exp(steps[::-1].cumsum(axis=0)[::-1] - steps[-1])
+            opens = np.vstack([closes[:1], closes[:-1]])
+            spread = np.abs(rng.normal(0, self.path.vol * 4, (history, n)))
+            highs = np.maximum(opens, closes) * (1 + spread)
+            lows = np.minimum(opens, closes) * (1 - spread)
+            vols = rng.gamma(2.0, 500.0, (history, n))
+            for i in range(history):
+                t = minute - (history - i) * 60_000
+                self._candles.append((t, np.vstack([opens[i], highs[i], lows[i], closes[i], vols[i]])))
+        self._candle_time = minute
+        self._candle_started = time.monotonic()
+        p = self._prices
+        self._current = np.vstack([p, p, p, p, np.zeros(n)])
+
+    def burst(self, symbol, pct):
+        """다음 틱에 symbol 가격을 pct% 급변 (거래량도 함께 급증)"""
+        with self._lock:
+            self.path.burst(self.index[symbol], pct)
+            self.bursts[symbol] = time.time()
+
+    def step(self):
+        """가격 한 틱 진행 - 캔들 갱신, 주문 체결, 스트림 전송"""
+        with self._lock:
+            prices, moved = self.path.step()
+            self._prices = prices.copy()
+            cur = self._current
+            cur[1] = np.maximum(cur[1], prices)
+            cur[2] = np.minimum(cur[2], prices)
+            cur[3] = prices
+            vol = self.path.rng.gamma(2.0, 500.0 / max(1, self.candle_seconds / self.tick_interval), len(prices))
+            vol[moved] *= 50
+            cur[4] += vol
+            if time.monotonic() - self._candle_started >= self.candle_seconds:
+                self._candles.append((self._candle_time, cur.copy()))
+                self._candle_time += 60_000
+                self._candle_started = time.monotonic()
+                self._current = np.vstack([prices, prices, prices, prices, np.zeros(len(prices))])
+            self._ticks += 1
+            self._emit(self._match())
+        self.stats['ticks'] += 1
+        self._publish_market(prices)
+
+    # --- 주문/체결 ---
+
+    def _order_event(self, o, exec_type, last_qty=0.0, last_price=0.0, rp=0.0, fee=0.0):
+        now = int(time.time() * 1000)
+        return {'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': {
+            's': o['symbol'], 'c': o['clientOrderId'], 'S': o['side'], 'o': o['type'], 'f': o['timeInForce'],
+            'q': o['origQty'], 'p': o['price'], 'ap': o['avgPrice'], 'sp': o['stopPrice'],
+            'x': exec_type, 'X': o['status'], 'i': o['orderId'], 'l': str(last_qty), 'z': o['executedQty'],
+            'L': str(last_price), 'N': 'USDT', 'n': str(fee), 'T': now, 'rp': str(rp),
+            'R': o['reduceOnly'], 'cp': o['closePosition'], 'ps': 'BOTH', 'wt': o['workingType']}}
+
+    def _algo_event(self, a):
+        now = int(time.time() * 1000)
+        return {'e': 'ALGO_UPDATE', 'E': now, 'T': now, 'o': {
+            's': a['symbol'], 'caid': a['clientAlgoId'], 'aid': a['algoId'], 'at': a['algoType'],
+            'o': a['orderType'], 'S': a['side'], 'ps': 'BOTH', 'f': a['timeInForce'], 'q': a['quantity'],
+            'X': a['algoStatus'], 'ai': a['actualOrderId'], 'ap': a['actualPrice'], 'aq': a['actualQty'],
+            'tp': a['triggerPrice'], 'p': a['price'], 'wt': a['workingType'], 'cp': a['closePosition'],
+            'R': a['reduceOnly'], 'T': now}}
+
+    def _account_event(self, symbol):
+        amt, entry = self.positions.get(symbol, (0.0, 0.0))
+        now = int(time.time() * 1000)
+        return {'e': 'ACCOUNT_UPDATE', 'E': now, 'T': now, 'a': {
+            'm': 'ORDER',
+            'B': [{'a': 'USDT', 'wb': f"{self.balance:.8f}", 'cw': f"{self.balance:.8f}", 'bc': '0'}],
+            'P': [{'s': symbol, 'pa': str(amt), 'ep': str(entry), 'mt': self.margin_type.get(symbol, 'cross').lower(),
+                   'ps': 'BOTH'}]}}
+
+    def _would_trigger(self, a, price):
+        stop = float(a['triggerPrice'])
+        if a['orderType'] == 'STOP_MARKET':
+            return price >= stop if a['side'] == 'BUY' else price <= stop
+        return price <= stop if a['side'] == 'BUY' else price >= stop
+
+    def _fill(self, o, price, maker):
+        """주문 체결 - 포지션/잔고 갱신 후 이벤트 목록 반환"""
+        sym = o['symbol']
+        amt, entry = self.positions.get(sym, (0.0, 0.0))
+        signed = 1.0 if o['side'] == 'BUY' else -1.0
+        qty = float(o['origQty'] or 0)
+        reducing = amt * signed < 0
+        # closePosition/reduceOnly 주문은 포지션을 줄이는 만큼만 체결 (줄일 포지션이 없으면 만료)
+        if o['closePosition']:
+            qty = abs(amt) if reducing else 0.0
+        elif o['reduceOnly']:
+            qty = min(qty, abs(amt)) if reducing else 0.0
+        if qty <= 0:
+            o['status'] = 'EXPIRED'
+            self.open_orders.pop(o['orderId'], None)
+            return [self._order_event(o, 'EXPIRED')]
+        rp = 0.0
+        if reducing:
+            closed = min(qty, abs(amt))
+            rp = closed * (price - entry) * (1 if amt > 0 else -1)
+        new_amt = amt + signed * qty
+        if abs(new_amt) < 1e-12:
+            new_amt, entry = 0.0, 0.0
+        elif amt == 0 or amt * signed > 0:
+            entry = (abs(amt) * entry + qty * price) / abs(new_amt)
+        elif new_amt * amt < 0:
+            entry = price
+        fee = qty * price * (MAKER_FEE if maker else TAKER_FEE)
+        self.balance += rp - fee
+        self.positions[sym] = (new_amt, entry)
+        o['status'] = 'FILLED'
+        o['executedQty'] = str(qty)
+        o['avgPrice'] = str(price)
+        o['updateTime'] = int(time.time() * 1000)
+        self.open_orders.pop(o['orderId'], None)
+        self.stats['fills'] += 1
+        return [self._order_event(o, 'TRADE', qty, price, rp, fee), self._account_event(sym)]
+
+    def _match(self):
+        """열린 주문/조건부 주문을 현재 가격과 대조 - 체결 이벤트 목록"""
+        events = []
+        for o in list(self.open_orders.values()):
+            price = float(self._prices[self.index[o['symbol']]])
+            limit = float(o['price'])
+            if (o['side'] == 'BUY' and price <= limit) or (o['side'] == 'SELL' and price >= limit):
+                events += self._fill(o, limit, maker=True)
+        for a in list(self.open_algo.values()):
+            price = float(self._prices[self.index[a['symbol']]])
+            if self._would_trigger(a, price):
+                events += self._trigger(a, price)
+        return events
+
+    def _trigger(self, a, price):
+        """조건부 주문 트리거 - 실제 시장가 주문을 만들어 체결하고 algo 주문은 FINISHED로"""
+        del self.open_algo[a['algoId']]
+        o = self._record({'symbol': a['symbol'], 'side': a['side'], 'type': 'MARKET', 'quantity': a['quantity'],
+                          'reduceOnly': str(a['reduceOnly']).lower(), 'workingType': a['workingType']},
+                         f"sim-{next(self._ids)}", a['closePosition'])
+        a['algoStatus'] = 'TRIGGERED'
+        a['actualOrderId'] = str(o['orderId'])
+        events = [self._algo_event(a), self._order_event(o, 'NEW')] + self._fill(o, price, maker=False)
+        a['algoStatus'] = 'FINISHED'
+        a['actualQty'] = o['executedQty']
+        a['actualPrice'] = o['avgPrice']
+        a['updateTime'] = int(time.time() * 1000)
+        return events + [self._algo_event(a)]
+
+    def _check_order(self, p, types):
+        """주문 공통 검증 -> (symbol, side, type, closePosition)"""
+        sym = p.get('symbol')
+        if sym not in self.index:
+            raise SimError(-1121, 'Invalid symbol.')
+        otype = p.get('type', '').upper()
+        side = p.get('side', '').upper()
+        if otype in CONDITIONAL and types != CONDITIONAL:
+            raise SimError(-4120, 'Order type not supported for this endpoint. '
+                                  'Please use the Algo Order API endpoints instead.')
+        if side not in ('BUY', 'SELL') or otype not in types:
+            raise SimError(-1116, 'Invalid orderType.')
+        close_position = str(p.get('closePosition', '')).lower() == 'true'
+        if close_position and (p.get('quantity') or p.get('reduceOnly')):
+            raise SimError(-1106, "Parameter 'quantity' sent when not required.")
+        return sym, side, otype, close_position
+
+    def _record(self, p, client_id, close_position=False):
+        """일반 주문 dict 생성/등록"""
+        o = {
+            'orderId': next(self._ids), 'clientOrderId': client_id, 'symbol': p['symbol'], 'side': p['side'],
+            'type': p['type'], 'status': 'NEW', 'timeInForce': p.get('timeInForce', 'GTC'),
+            'price': str(p.get('price', '0')), 'stopPrice': '0', 'origQty': str(p.get('quantity', '0')),
+            'executedQty': '0', 'avgPrice': '0', 'reduceOnly': str(p.get('reduceOnly', '')).lower() == 'true',
+            'closePosition': close_position, 'workingType': p.get('workingType', 'CONTRACT_PRICE'),
+            'updateTime': int(time.time() * 1000),
+        }
+        self.orders[o['orderId']] = o
+        self.by_client_id[client_id] = o
+        self.stats['orders'] += 1
+        self.order_log.append((time.time(), o['symbol'], o['type']))
+        return o
+
+    def _new_order(self, p):
+        sym, side, otype, close_position = self._check_order(p, ('LIMIT', 'MARKET'))
+        client_id = p.get('newClientOrderId') or f"sim-{next(self._ids)}"
+        if client_id in self.by_client_id:
+            raise SimError(-4015, 'Client order id is not valid.')
+        limit = float(p.get('price') or 0)
+        if otype == 'LIMIT' and not limit:
+            raise SimError(-1102, "Mandatory parameter 'price' was not sent.")
+        reduce_only = str(p.get('reduceOnly', '')).lower() == 'true'
+        if not close_position and otype == 'LIMIT':
+            qty = float(p.get('quantity') or 0)
+            if qty <= 0 or (not reduce_only and qty * limit < MIN_NOTIONAL):
+                raise SimError(-4164, f"Order's notional must be no smaller than {MIN_NOTIONAL}")
+        price = float(self._prices[self.index[sym]])
+        o = self._record({**p, 'side': side, 'type': otype}, client_id, close_position)
+        events = [self._order_event(o, 'NEW')]
+        if otype == 'MARKET':
+            events += self._fill(o, price, maker=False)
+        elif (side == 'BUY' and price <= limit) or (side == 'SELL' and price >= limit):
+            events += self._fill(o, price, maker=False)
+        else:
+            self.open_orders[o['orderId']] = o
+        return o, events
+
+    def _new_algo_order(self, p):
+        if p.get('algoType', 'CONDITIONAL').upper() != 'CONDITIONAL':
+            raise SimError(-1116, 'Invalid algoType.')
+        sym, side, otype, close_position = self._check_order(p, CONDITIONAL)
+        client_id = p.get('clientAlgoId') or f"sim-{next(self._ids)}"
+        if client_id in self.by_client_algo_id:
+            raise SimError(-4015, 'Client order id is not valid.')
+        if not p.get('triggerPrice'):
+            raise SimError(-1102, "Mandatory parameter 'triggerPrice' was not sent.")
+        a = {
+            'algoId': next(self._ids), 'clientAlgoId': client_id, 'algoType': 'CONDITIONAL', 'orderType': otype,
+            'symbol': sym, 'side': side, 'timeInForce': p.get('timeInForce', 'GTC'),
+            'quantity': str(p.get('quantity', '0')), 'algoStatus': 'NEW', 'triggerPrice': str(p['triggerPrice']),
+            'price': str(p.get('price', '0')), 'reduceOnly': str(p.get('reduceOnly', '')).lower() == 'true',
+            'closePosition': close_position, 'workingType': p.get('workingType', 'CONTRACT_PRICE'),
+            'actualOrderId': '', 'actualQty': '0', 'actualPrice': '0', 'updateTime': int(time.time() * 1000),
+        }
+        if self._would_trigger(a, float(self._prices[self.index[sym]])):
+            raise SimError(-2021, 'Order would immediately trigger.')
+        if not close_position:
+            qty = float(a['quantity'])
+            if qty <= 0 or (not a['reduceOnly'] and qty * float(a['triggerPrice']) < MIN_NOTIONAL):
+                raise SimError(-4164, f"Order's notional must be no smaller than {MIN_NOTIONAL}")
+        self.algo_orders[a['algoId']] = a
+        self.open_algo[a['algoId']] = a
+        self.by_client_algo_id[client_id] = a
+        self.stats['algo_orders'] += 1
+        self.order_log.append((time.time(), sym, otype))
+        return a, [self._algo_event(a)]
+
+    def _find(self, p):
+        o = None
+        if p.get('orderId'):
+            o = self.orders.get(int(p['orderId']))
+        elif p.get('origClientOrderId'):
+            o = self.by_client_id.get(p['origClientOrderId'])
+        if o is None or o['symbol'] != p.get('symbol'):
+            raise SimError(-2013, 'Order does not exist.')
+        return o
+
+    def _find_algo(self, p):
+        a = None
+        if p.get('algoId'):
+            a = self.algo_orders.get(int(p['algoId']))
+        elif p.get('clientAlgoId'):
+            a = self.by_client_algo_id.get(p['clientAlgoId'])
+        if a is None or (p.get('symbol') and a['symbol'] != p['symbol']):
+            raise SimError(-2013, 'Order does not exist.')
+        return a
+
+    # --- REST 엔드포인트 ---
+
+    def _ep_ping(self, p):
+        return {}
+
+    def _ep_time(self, p):
+        return {'serverTime': int(time.time() * 1000)}
+
+    def _ep_ticker_price(self, p):
+        now = int(time.time() * 1000)
+        prices = self._prices
+        if p.get('symbol'):
+            i = self.index.get(p['symbol'])
+            if i is None:
+                raise SimError(-1121, 'Invalid symbol.')
+            return {'symbol': p['symbol'], 'price': f"{prices[i]:.{self.price_decimals[i]}f}", 'time': now}
+        return [{'symbol': s, 'price': f"{prices[i]:.{self.price_decimals[i]}f}", 'time': now}
+                for i, s in enumerate(self.symbols)]
+
+    def _ep_ticker_24hr(self, p):
+        """최근 1440개 1분봉 기준 24시간 통계 (기록이 짧으면 거래량을 24시간으로 환산)"""
+        now = int(time.time() * 1000)
+        candles = list(self._candles)[-1439:] + [(self._candle_time, self._current)]
+        ohlcv = np.stack([c for _, c in candles])     # (캔들, 5, 심볼)
+        scale = 1440 / len(candles)
+        volume = ohlcv[:, 4].sum(axis=0) * scale
+        quote_volume = (ohlcv[:, 4] * ohlcv[:, 3]).sum(axis=0) * scale
+        high, low, first = ohlcv[:, 1].max(axis=0), ohlcv[:, 2].min(axis=0), ohlcv[0, 0]
+        prices = self._prices
+
+        def row(i, s):
+            d = self.price_decimals[i]
+            return {'symbol': s, 'priceChange': f"{prices[i] - first[i]:.{d}f}",
+                    'priceChangePercent': f"{(prices[i] / first[i] - 1) * 100:.3f}",
+                    'lastPrice': f"{prices[i]:.{d}f}", 'openPrice': f"{first[i]:.{d}f}",
+                    'highPrice': f"{max(high[i], prices[i]):.{d}f}", 'lowPrice': f"{min(low[i], prices[i]):.{d}f}",
+                    'volume': f"{volume[i]:.3f}", 'quoteVolume': f"{quote_volume[i]:.2f}",
+                    'openTime': candles[0][0], 'closeTime': now}
+        if p.get('symbol'):
+            i = self.index.get(p['symbol'])
+            if i is None:
+                raise SimError(-1121, 'Invalid symbol.')
+            return row(i, p['symbol'])
+        return [row(i, s) for i, s in enumerate(self.symbols)]
+
+    def _ep_exchange_info(self, p):
+        out = []
+        for i, s in enumerate(self.symbols):
+            tick, step = self.ticks[i], self.steps[i]
+            out.append({'symbol': s, 'status': 'TRADING', 'quoteAsset': 'USDT', 'contractType': 'PERPETUAL',
+                        'pricePrecision': self.price_decimals[i], 'quantityPrecision': self.qty_decimals[i],
+                        'filters': [
+                            {'filterType': 'PRICE_FILTER', 'tickSize': f"{tick:.{self.price_decimals[i]}f}",
+                             'minPrice': f"{tick:.{self.price_decimals[i]}f}", 'maxPrice': '10000000'},
+                            {'filterType': 'LOT_SIZE', 'stepSize': f"{step:.{self.qty_decimals[i]}f}",
+                             'minQty': f"{step:.{self.qty_decimals[i]}f}", 'maxQty': '10000000'},
+                            {'filterType': 'MIN_NOTIONAL', 'notional': str(MIN_NOTIONAL)},
+                        ]})
+        return {'timezone': 'UTC', 'serverTime': int(time.time() * 1000), 'symbols': out}
+
+    def _ep_klines(self, p):
+        if p.get('interval', '1m') != '1m':
+            raise SimError(-1120, 'Invalid interval.')
+        i = self.index.get(p.get('symbol'))
+        if i is None:
+            raise SimError(-1121, 'Invalid symbol.')
+        limit = min(int(p.get('limit', 500)), MAX_CANDLES)
+        start = int(p['startTime']) if p.get('startTime') else None
+        end = int(p['endTime']) if p.get('endTime') else None
+        candles = list(self._candles) + [(self._candle_time, self._current)]
+        if start is not None:
+            candles = [c for c in candles if c[0] >= start][:limit]
+        else:
+            candles = candles[-limit:]
+        if end is not None:
+            candles = [c for c in candles if c[0] <= end]
+        d = self.price_decimals[i]
+        rows = []
+        for t, c in candles:
+            o, h, l, cl, v = c[:, i]
+            rows.append([t, f"{o:.{d}f}", f"{h:.{d}f}", f"{l:.{d}f}", f"{cl:.{d}f}", f"{v:.3f}", t + 59_999,
+                         f"{v * cl:.4f}", int(v // 10) + 1, f"{v / 2:.3f}", f"{v * cl / 2:.4f}", "0"])
+        return rows
+
+    def _ep_new_order(self, p):
+        o, events = self._new_order(p)
+        self._emit(events)
+        return dict(o)
+
+    def _ep_algo_order(self, p):
+        a, events = self._new_algo_order(p)
+        self._emit(events)
+        return dict(a)
+
+    def _ep_batch_orders(self, p):
+        orders = json.loads(p.get('batchOrders', '[]'))
+        if len(orders) > 5:
+            raise SimError(-1130, 'Data sent for parameter batchOrders is not valid.')
+        out, events = [], []
+        for params in orders:
+            try:
+                o, ev = self._new_order({k: str(v) for k, v in params.items()})
+                out.append(dict(o))
+                events += ev
+            except SimError as e:
+                out.append({'code': e.code, 'msg': e.msg})
+        self._emit(events)
+        return out
+
+    def _ep_get_order(self, p):
+        return dict(self._find(p))
+
+    def _ep_cancel_order(self, p):
+        o = self._find(p)
+        if o['orderId'] not in self.open_orders:
+            raise SimError(-2011, 'Unknown order sent.')
+        del self.open_orders[o['orderId']]
+        o['status'] = 'CANCELED'
+        o['updateTime'] = int(time.time() * 1000)
+        self._emit([self._order_event(o, 'CANCELED')])
+        return dict(o)
+
+    def _ep_get_algo_order(self, p):
+        return dict(self._find_algo(p))
+
+    def _ep_cancel_algo_order(self, p):
+        a = self._find_algo(p)
+        if a['algoId'] not in self.open_algo:
+            raise SimError(-2011, 'Unknown order sent.')
+        del self.open_algo[a['algoId']]
+        a['algoStatus'] = 'CANCELED'
+        a['updateTime'] = int(time.time() * 1000)
+        self._emit([self._algo_event(a)])
+        return {'algoId': a['algoId'], 'clientAlgoId': a['clientAlgoId'], 'code': '200', 'msg': 'success'}
+
+    def _ep_leverage(self, p):
+        lev = int(p['leverage'])
+        if not 1 <= lev <= 125:
+            raise SimError(-4028, f"Leverage {lev} is not valid")
+        self.leverage[p['symbol']] = lev
+        return {'symbol': p['symbol'], 'leverage': lev, 'maxNotionalValue': '1000000'}
+
+    def _ep_margin_type(self, p):
+        margin = p['marginType'].upper()
+        if self.margin_type.get(p['symbol'], 'CROSSED') == margin:
+            raise SimError(-4046, 'No need to change margin type.')
+        self.margin_type[p['symbol']] = margin
+        return {'code': 200, 'msg': 'success'}
+
+    def _ep_balance(self, p):
+        now = int(time.time() * 1000)
+        return [{'accountAlias': 'sim', 'asset': a, 'balance': f"{self.balance if a == 'USDT' else 0:.8f}",
+                 'crossWalletBalance': f"{self.balance if a == 'USDT' else 0:.8f}",
+                 'availableBalance': f"{self.balance if a == 'USDT' else 0:.8f}", 'updateTime': now}
+                for a in BALANCE_ASSETS]
+
+    def _ep_position_risk(self, p):
+        out = []
+        for sym, (amt, entry) in self.positions.items():
+            if amt and (not p.get('symbol') or p['symbol'] == sym):
+                mark = float(self._prices[self.index[sym]])
+                out.append({'symbol': sym, 'positionSide': 'BOTH', 'positionAmt': str(amt), 'entryPrice': str(entry),
+                            'markPrice': str(mark), 'unRealizedProfit': str((mark - entry) * amt)})
+        return out
+
+    def _ep_symbol_config(self, p):
+        return [{'symbol': s, 'marginType': self.margin_type.get(s, 'CROSSED'), 'isAutoAddMargin': 'false',
+                 'leverage': self.leverage.get(s, 20), 'maxNotionalValue': '1000000'}
+                for s in self.symbols if not p.get('symbol') or p['symbol'] == s]
+
+    def _ep_listen_key_new(self, p):
+        key = f"simkey{next(self._ids)}"
+        self.listen_keys.add(key)
+        return {'listenKey': key}
+
+    def _ep_listen_key_keepalive(self, p):
+        return {}
+
+    def _ep_listen_key_close(self, p):
+        self.listen_keys.discard(p.get('listenKey'))
+        return {}
+
+    ROUTES = {
+        ('GET', '/fapi/v1/ping'): '_ep_ping',
+        ('GET', '/fapi/v1/time'): '_ep_time',
+        ('GET', '/fapi/v1/ticker/price'): '_ep_ticker_price',
+        ('GET', '/fapi/v2/ticker/price'): '_ep_ticker_price',
+        ('GET', '/fapi/v1/ticker/24hr'): '_ep_ticker_24hr',
+        ('GET', '/fapi/v1/exchangeInfo'): '_ep_exchange_info',
+        ('GET', '/fapi/v1/klines'): '_ep_klines',
+        ('POST', '/fapi/v1/order'): '_ep_new_order',
+        ('POST', '/fapi/v1/algoOrder'): '_ep_algo_order',
+        ('POST', '/fapi/v1/batchOrders'): '_ep_batch_orders',
+        ('GET', '/fapi/v1/order'): '_ep_get_order',
+        ('DELETE', '/fapi/v1/order'): '_ep_cancel_order',
+        ('GET', '/fapi/v1/algoOrder'): '_ep_get_algo_order',
+        ('DELETE', '/fapi/v1/algoOrder'): '_ep_cancel_algo_order',
+        ('POST', '/fapi/v1/leverage'): '_ep_leverage',
+        ('POST', '/fapi/v1/marginType'): '_ep_margin_type',
+        ('GET', '/fapi/v2/balance'): '_ep_balance',
+        ('GET', '/fapi/v3/balance'): '_ep_balance',
+        ('GET', '/fapi/v2/positionRisk'): '_ep_position_risk',
+        ('GET', '/fapi/v3/positionRisk'): '_ep_position_risk',
+        ('GET', '/fapi/v1/symbolConfig'): '_ep_symbol_config',
+        ('POST', '/fapi/v1/listenKey'): '_ep_listen_key_new',
+        ('PUT', '/fapi/v1/listenKey'): '_ep_listen_key_keepalive',
+        ('DELETE', '/fapi/v1/listenKey'): '_ep_listen_key_close',
+    }
+
+    def handle(self, method, path, params):
+        """REST 요청 하나 처리 -> (status, headers, body)"""
+        self.requests[(method, path)] += 1
+        self.faults.delay()
+        if self.faults.throttled():
+            self.stats['429'] += 1
+            return 429, {'Retry-After': '1'}, {'code': -1003, 'msg': 'Too many requests; simulated.'}
+        name = self.ROUTES.get((method, path))
+        if name is None:
+            return 404, {}, {'code': -5000, 'msg': f'Path {path} not simulated.'}
+        try:
+            with self._lock:
+                return 200, {}, getattr(self, name)(params)
+        except SimError as e:
+            return e.status, {}, {'code': e.code, 'msg': e.msg}
+        except (KeyError, ValueError) as e:
+            return 400, {}, {'code': -1102, 'msg': f'Bad parameter: {e}'}
+
+    # --- 웹소켓 ---
+
+    def _emit(self, events):
+        for event in events:
+            for key in list(self.listen_keys):
+                self._publish_user(key, event)
+
+    def _broadcast(self, payload, stream=None, key=None):
+        """스트림 구독자 또는 listenKey 연결에 전송 - 연결 목록은 이벤트 루프 스레드에서만 읽음"""
+        if self._loop is None:
+            return
+        def send_all():
+            if key is None:
+                clients = [ws for ws, subs in self._market_clients.items() if stream in subs]
+            else:
+                clients = [ws for ws, k in self._user_clients.items() if k == key]
+            for ws in clients:
+                self._loop.create_task(self._safe_send(ws, payload))
+        try:
+            self._loop.call_soon_threadsafe(send_all)
+        except RuntimeError:
+            pass  # 종료된 루프
+
+    async def _safe_send(self, ws, payload):
+        try:
+            await ws.send(payload)
+            self.stats['ws_messages'] += 1
+        except Exception:
+            pass
+
+    def _publish_market(self, prices):
+        if not self._market_clients:
+            return
+        now = int(time.time() * 1000)
+        tick = [{'e': '24hrMiniTicker', 'E': now, 's': s, 'c': f"{prices[i]:.{self.price_decimals[i]}f}",
+                 'o': f"{self._day_open[i]:.{self.price_decimals[i]}f}"} for i, s in enumerate(self.symbols)]
+        frames = {'!miniTicker@arr': json.dumps({'stream': '!miniTicker@arr', 'data': tick})}
+        if self._ticks % MARK_PRICE_EVERY == 0:
+            mark = [{'e': 'markPriceUpdate', 'E': now, 's': s, 'p': f"{prices[i]:.{self.price_decimals[i]}f}",
+                     'r': '0.0001'} for i, s in enumerate(self.symbols)]
+            frames['!markPrice@arr'] = json.dumps({'stream': '!markPrice@arr', 'data': mark})
+        for stream, payload in frames.items():
+            self._broadcast(payload, stream=stream)
+
+    def _publish_user(self, key, event):
+        self._broadcast(json.dumps(event), key=key)
+
+    def expire_listen_key(self, key):
+        """listenKey 만료 이벤트 전송 후 키 폐기"""
+        self._publish_user(key, {'e': 'listenKeyExpired', 'E': int(time.time() * 1000)})
+        self.listen_keys.discard(key)
+
+    async def _ws_handler(self, ws):
+        path = urlparse(ws.request.path).path
+        self.stats['ws_connections'] += 1
+        if path.startswith('/ws/'):
+            key = path[4:]
+            if key not in self.listen_keys:
+                await ws.close(4001, 'Invalid listenKey')
+                return
+            self._user_clients[ws] = key
+        else:
+            self._market_clients[ws] = set()
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get('method') == 'SUBSCRIBE' and ws in self._market_clients:
+                    self._market_clients[ws].update(msg.get('params', []))
+                    await ws.send(json.dumps({'result': None, 'id': msg.get('id')}))
+        except Exception:
+            pass
+        finally:
+            self._market_clients.pop(ws, None)
+            self._user_clients.pop(ws, None)
+
+    def disconnect_all(self):
+        """모든 웹소켓 연결을 끊음 (재접속 테스트용)"""
+        if self._loop is None:
+            return
+        def close_all():
+            clients = list(self._market_clients) + list(self._user_clients)
+            self.stats['disconnects'] += len(clients)
+            for ws in clients:
+                self._loop.create_task(ws.close(1001, 'Simulated disconnect'))
+        self._loop.call_soon_threadsafe(close_all)
+
+    async def _ws_main(self):
+        self._loop = asyncio.get_running_loop()
+        async with serve(self._ws_handler, self.host, self.ws_port, max_size=None) as server:
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self._ws_server = server
+            self._ready.set()
+            while not self._stopping.is_set():
+                await asyncio.sleep(0.05)
+
+    # --- 실행 ---
+
+    def _ticker(self):
+        last_disconnect = time.monotonic()
+        next_tick = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                logging.error(f"시뮬레이터 틱 오류: {e}")
+            every = self.faults.disconnect_every
+            if every and time.monotonic() - last_disconnect >= every:
+                self.disconnect_all()
+                last_disconnect = time.monotonic()
+            next_tick += self.tick_interval
+            self._stopping.wait(max(0.0, next_tick - time.monotonic()))
+
+    @property
+    def rest_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.ws_port}"
+
+    def env(self):
+        """봇을 시뮬레이터로 향하게 하는 환경 변수"""
+        return {'BINANCE_FUTURES_URL': self.rest_url, 'BINANCE_FUTURES_WS_URL': self.ws_url,
+                'BINANCE_API_KEY': 'sim', 'BINANCE_API_SECRET': 'sim'}
+
+    def start(self, ticker=True):
+        sim = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    params.update(parse_qsl(self.rfile.read(length).decode()))
+                status, headers, body = sim.handle(self.command, url.path, params)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._http.daemon_threads = True
+        self.port = self._http.server_address[1]
+        targets = [('sim-http', self._http.serve_forever), ('sim-ws', lambda: asyncio.run(self._ws_main()))]
+        if ticker:
+            targets.append(('sim-ticker', self._ticker))
+        for name, target in targets:
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._ready.wait(5)
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._http:
+            self._http.shutdown()
+            self._http.server_close()
+        for t in self._threads:
+            t.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 바이낸스 선물 시뮬레이터")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--ws-port', type=int, default=18081)
+    parser.add_argument('--tick', type=float, default=TICK_INTERVAL)
+    parser.add_argument('--vol', type=float, default=0.0005, help='틱당 로그 수익률 표준편차')
+    parser.add_argument('--burst-prob', type=float, default=0.0, help='틱당 심볼별 급등락 확률')
+    parser.add_argument('--burst-size', type=float, default=5.0, help='급등락 크기 (%%)')
+    parser.add_argument('--latency', type=float, default=0.0, help='REST 응답 지연 (초)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='429 응답 비율')
+    parser.add_argument('--disconnect-every', type=float, default=None, help='웹소켓 강제 끊김 주기 (초)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    path = PricePath(args.symbols, vol=args.vol, burst_prob=args.burst_prob, burst_size=args.burst_size,
+                     seed=args.seed)
+    faults = Faults(latency=args.latency, rate_429=args.rate_429, disconnect_every=args.disconnect_every,
+                    seed=args.seed)
+    sim = ExchangeSim(args.symbols, host=args.host, port=args.port, ws_port=args.ws_port, path=path,
+                      faults=faults, tick_interval=args.tick, seed=args.seed).start()
+    print(f"REST {sim.rest_url}  WS {sim.ws_url}")
+    for k, v in sim.env().items():
+        print(f"export {k}={v}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"ticks={sim.stats['ticks']} orders={sim.stats['orders']} fills={sim.stats['fills']} "
+                  f"requests={sum(sim.requests.values())} 429={sim.stats['429']}")
+    except KeyboardInterrupt:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
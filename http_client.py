@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from binance.client import Client
+
+POOL_CONNECTIONS = 4   # 세션당 유지할 호스트 풀 수
+POOL_MAXSIZE = 16      # 호스트당 keep-alive 연결 수 (트레이드 워커 + 스트림/알림 여유)
+DEFAULT_TIMEOUT = (3.05, 10)  # (연결, 읽기) 초
+HOST_TIMEOUTS = {
+    'fapi.binance.com': (3.05, 5),
+    'api.binance.com': (3.05, 5),
+    'api.twitter.com': (3.05, 10),
+    'hooks.slack.com': (3.05, 10),
+}
+LATENCY_SAMPLES = 1000  # 호스트별 보관할 최근 지연 시간 수
+
+# 선물 REST / 웹소켓 기본 주소 - 로컬 거래소 시뮬레이터(exchange_sim.py)로 바꿀 수 있음
+FUTURES_REST_URL = os.getenv('BINANCE_FUTURES_URL', 'https://fapi.binance.com').rstrip('/')
+FUTURES_WS_BASE = os.getenv('BINANCE_FUTURES_WS_URL', 'wss://fstream.binance.com').rstrip('/')
+BINANCE_FUTURES_HOST = urlparse(FUTURES_REST_URL).hostname
+
+
+def host_of(url_or_host):
+    return urlparse(url_or_host).hostname if '://' in url_or_host else url_or_host
+
+def timeout_for(host):
+    return HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+
+
+class _HostMetrics:
+    __slots__ = ('requests', 'errors', 'latencies')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """연결 풀 크기 조정, 호스트별 기본 타임아웃, 요청 지연 시간 기록"""
+
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        kwargs.setdefault('pool_connections', POOL_CONNECTIONS)
+        kwargs.setdefault('pool_maxsize', POOL_MAXSIZE)
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        host = urlparse(request.url).hostname
+        if timeout is None:
+            timeout = timeout_for(host)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+        except Exception:
+            self.registry.record(host, None)
+            raise
+        self.registry.record(host, time.perf_counter() - start)
+        return response
+
+    def new_connections(self):
+        """이 어댑터가 호스트별로 새로 연 연결 수 (TLS 핸드셰이크 횟수)"""
+        out = {}
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                out[pool.host] = out.get(pool.host, 0) + pool.num_connections
+        return out
+
+
+class Transport:
+    """호스트별 keep-alive 세션 공유 및 연결 재사용/지연 시간 지표"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._adapters = []
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, host, elapsed):
+        with self._lock:
+            m = self._metrics.setdefault(host, _HostMetrics())
+            if elapsed is None:
+                m.errors += 1
+            else:
+                m.requests += 1
+                m.latencies.append(elapsed)
+
+    def session(self, url_or_host):
+        """호스트별 공유 세션 (없으면 생성)"""
+        host = host_of(url_or_host)
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                sess = self._sessions[host] = self._new_session()
+            return sess
+
+    def _new_session(self):
+        sess = requests.Session()
+        adapter = InstrumentedAdapter(self)
+        sess.mount('https://', adapter)
+        sess.mount('http://', adapter)
+        self._adapters.append(adapter)
+        return sess
+
+    def metrics(self):
+        """호스트별 요청 수, 새 연결 수, 재사용률, 지연 시간(p50/p99, ms)"""
+        connections = {}
+        for adapter in list(self._adapters):
+            for host, n in adapter.new_connections().items():
+                connections[host] = connections.get(host, 0) + n
+        out = {}
+        with self._lock:
+            for host, m in self._metrics.items():
+                lat = sorted(m.latencies)
+                new = connections.get(host, 0)
+                out[host] = {
+                    'requests': m.requests,
+                    'errors': m.errors,
+                    'new_connections': new,
+                    'reuse_ratio': (1 - new / m.requests) if m.requests else 0.0,
+                    'p50_ms': lat[len(lat) // 2] * 1000 if lat else None,
+                    'p99_ms': lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000 if lat else None,
+                }
+        return out
+
+    def close(self):
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+
+transport = Transport()
+_binance_client = None
+_binance_lock = threading.Lock()
+
+def session_for(url_or_host):
+    return transport.session(url_or_host)
+
+def metrics():
+    return transport.metrics()
+
+def binance_client():
+    """data_fetcher/trade_executor가 함께 쓰는 바이낸스 클라이언트 (공유 keep-alive 세션)"""
+    global _binance_client
+    with _binance_lock:
+        if _binance_client is None:
+            # 시작 시 ping 생략 - 백테스트 등 오프라인 도구도 시그널 모듈을 import할 수 있게
+            client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_API_SECRET'), ping=False)
+            sess = session_for(BINANCE_FUTURES_HOST)
+            sess.headers.update(client.session.headers)
+            client.session.close()
+            client.session = sess
+            client.REQUEST_TIMEOUT = timeout_for(BINANCE_FUTURES_HOST)
+            client.FUTURES_URL = f"{FUTURES_REST_URL}/fapi"
+            _binance_client = client
+        return _binance_client
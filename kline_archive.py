@@ -0,0 +1,267 @@
+"""심볼별 컬럼 배열로 저장하는 선물 캔들 아카이브 + 증분 다운로더
+
+디렉터리 구조: <root>/<interval>/<SYMBOL>/<column>.bin (리틀 엔디언 int64/float64 원시 배열)
+읽기는 np.memmap으로 열어 복사 없이 구간을 잘라 쓴다.
+
+사용법: python kline_archive.py <root> [--symbols BTCUSDT,ETHUSDT] [--interval 1m] [--days 30]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from http_client import FUTURES_REST_URL, session_for
+from kline_store import COLUMNS, TIME_COLUMNS, INTERVAL_MS, parse_kline
+
+KLINES_PATH = '/fapi/v1/klines'
+BATCH_LIMIT = 1000        # 요청당 캔들 수 (500~1000은 가중치 5로 가장 효율적)
+WEIGHT_LIMIT = 2400       # 분당 요청 가중치 한도 (IP 기준)
+WEIGHT_SAFETY = 0.8       # 한도의 이 비율까지만 사용 (실거래 봇 몫 남김)
+MAX_RETRIES = 5
+MARKER = 'archive.json'
+
+_DTYPES = {c: np.dtype('<i8') if c in TIME_COLUMNS else np.dtype('<f8') for c in COLUMNS}
+
+
+def kline_weight(limit):
+    """/fapi/v1/klines 요청 가중치"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class KlineArchive:
+    """추가 전용 컬럼형 캔들 저장소 (쓰기는 프로세스 하나, 읽기는 여러 곳에서 mmap)"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        marker = os.path.join(root, MARKER)
+        if not os.path.exists(marker):
+            with open(marker, 'w') as f:
+                json.dump({'version': 1, 'columns': list(COLUMNS)}, f)
+
+    @staticmethod
+    def is_archive(path):
+        return os.path.exists(os.path.join(path, MARKER))
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.upper())
+
+    def _path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f'{column}.bin')
+
+    def symbols(self, interval='1m'):
+        base = os.path.join(self.root, interval)
+        return sorted(os.listdir(base)) if os.path.isdir(base) else []
+
+    def __len__(self):
+        return len(self.symbols())
+
+    def length(self, symbol, interval='1m'):
+        """저장된 캔들 수 - 쓰기 도중 중단돼 컬럼 길이가 다르면 가장 짧은 컬럼 기준"""
+        sizes = []
+        for c in COLUMNS:
+            path = self._path(symbol, interval, c)
+            sizes.append(os.path.getsize(path) // 8 if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def _column(self, symbol, interval, column, n):
+        if n == 0:
+            return np.empty(0, dtype=_DTYPES[column])
+        return np.memmap(self._path(symbol, interval, column), dtype=_DTYPES[column], mode='r', shape=(n,))
+
+    def last_open_time(self, symbol, interval='1m'):
+        n = self.length(symbol, interval)
+        return int(self._column(symbol, interval, 'open_time', n)[-1]) if n else None
+
+    def read(self, symbol, interval='1m', start=None, end=None):
+        """[start, end) open_time(ms) 구간의 컬럼별 읽기 전용 memmap 뷰"""
+        n = self.length(symbol, interval)
+        times = self._column(symbol, interval, 'open_time', n)
+        lo = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+        hi = n if end is None else int(np.searchsorted(times, end, 'left'))
+        return {c: self._column(symbol, interval, c, n)[lo:hi] for c in COLUMNS}
+
+    def tail(self, symbol, interval='1m', n=None):
+        """최근 n개 캔들 뷰"""
+        total = self.length(symbol, interval)
+        n = total if n is None else min(n, total)
+        return {c: self._column(symbol, interval, c, total)[total - n:] for c in COLUMNS}
+
+    def to_klines(self, symbols=None, interval='1m', start=None, end=None):
+        """backtest.load_klines와 같은 형식의 심볼별 배열 dict (memmap 뷰)"""
+        symbols = [s.upper() for s in symbols] if symbols else self.symbols(interval)
+        out = {}
+        for sym in symbols:
+            k = self.read(sym, interval, start, end)
+            if len(k['open_time']):
+                out[sym] = {c: k[c] for c in COLUMNS if c != 'close_time'}
+        return out
+
+    def _repair(self, symbol, interval):
+        """중단된 쓰기로 길어진 컬럼을 가장 짧은 길이에 맞춤"""
+        n = self.length(symbol, interval)
+        for c in COLUMNS:
+            path = self._path(symbol, interval, c)
+            if os.path.exists(path) and os.path.getsize(path) != n * 8:
+                with open(path, 'r+b') as f:
+                    f.truncate(n * 8)
+        return n
+
+    def append(self, symbol, interval, rows):
+        """마감된 캔들 행(REST 형식 또는 parse_kline 튜플) 추가 - 이미 있는 open_time은 건너뜀"""
+        with self._lock:
+            os.makedirs(self._dir(symbol, interval), exist_ok=True)
+            self._repair(symbol, interval)
+            last = self.last_open_time(symbol, interval)
+            parsed = [r if isinstance(r, tuple) else parse_kline(r) for r in rows]
+            parsed = [r for r in parsed if last is None or r[0] > last]
+            if not parsed:
+                return 0
+            parsed.sort(key=lambda r: r[0])
+            data = list(zip(*parsed))
+            for i, c in enumerate(COLUMNS):
+                with open(self._path(symbol, interval, c), 'ab') as f:
+                    f.write(np.asarray(data[i], dtype=_DTYPES[c]).tobytes())
+            return len(parsed)
+
+
+class WeightBudget:
+    """분당 요청 가중치 예산 - 모자라면 충전될 때까지 대기"""
+
+    def __init__(self, limit=int(WEIGHT_LIMIT * WEIGHT_SAFETY), window=60.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.limit = limit
+        self.rate = limit / window
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(limit)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.limit, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, weight):
+        """weight만큼 차감 (대기한 시간 반환)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return waited
+                wait = (weight - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def sync(self, used, server_limit=WEIGHT_LIMIT):
+        """서버가 알려준 사용량(x-mbx-used-weight-1m)으로 보정"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(self.limit - used * self.limit / server_limit))
+
+
+class KlineDownloader:
+    """아카이브의 마지막 open_time부터 이어서 마감 캔들을 받아 저장"""
+
+    def __init__(self, archive, base_url=FUTURES_REST_URL, session=None, budget=None,
+                 batch_limit=BATCH_LIMIT, clock=time.time, sleep=time.sleep):
+        self.archive = archive
+        self.url = base_url.rstrip('/') + KLINES_PATH
+        self.session = session or session_for(base_url)
+        self.budget = budget or WeightBudget(sleep=sleep)
+        self.batch_limit = batch_limit
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = {'requests': 0, 'candles': 0, 'retries': 0}
+
+    def _get(self, params):
+        for attempt in range(MAX_RETRIES):
+            self.budget.acquire(kline_weight(params['limit']))
+            self.stats['requests'] += 1
+            response = self.session.get(self.url, params=params)
+            used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+            if used is not None:
+                self.budget.sync(int(used))
+            if response.status_code in (418, 429):
+                # 한도 초과 - Retry-After 만큼 쉬고 재시도
+                delay = float(response.headers.get('Retry-After', 2 ** attempt))
+                logging.warning(f"Kline download rate limited ({response.status_code}), retry in {delay}s")
+                self.stats['retries'] += 1
+                self.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError(f"Kline download failed after {MAX_RETRIES} retries: {params}")
+
+    def sync(self, symbol, interval='1m', start_time=None, end_time=None):
+        """symbol의 캔들을 end_time(기본: 현재)까지 받아 저장하고 추가된 개수 반환"""
+        symbol = symbol.upper()
+        step = INTERVAL_MS[interval]
+        last = self.archive.last_open_time(symbol, interval)
+        start = last + step if last is not None else start_time
+        if start is None:
+            raise ValueError(f"{symbol}: 아카이브가 비어 있으면 start_time이 필요합니다")
+        end = int(self.clock() * 1000) if end_time is None else end_time
+        added = 0
+        while start < end:
+            rows = self._get({'symbol': symbol, 'interval': interval, 'startTime': start,
+                              'endTime': end - 1, 'limit': self.batch_limit})
+            now_ms = int(self.clock() * 1000)
+            closed = [r for r in rows if int(r[6]) < now_ms]  # 형성 중인 캔들은 저장하지 않음
+            added += self.archive.append(symbol, interval, closed)
+            if len(rows) < self.batch_limit or not closed:
+                break
+            start = int(closed[-1][0]) + step
+        self.stats['candles'] += added
+        return added
+
+    def sync_all(self, symbols, interval='1m', start_time=None, end_time=None):
+        """여러 심볼을 차례로 동기화 - 실패한 심볼은 건너뛰고 다음 실행에서 이어받음"""
+        result = {}
+        for sym in symbols:
+            try:
+                result[sym] = self.sync(sym, interval, start_time, end_time)
+            except Exception as e:
+                logging.error(f"Kline download failed for {sym}: {e}")
+                print(f"⚠️ Kline download failed for {sym}: {e}")
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root')
+    parser.add_argument('--symbols', default=None, help='쉼표로 구분 (기본: 거래 중인 전체 심볼)')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--days', type=int, default=30, help='처음 받을 때의 기간')
+    parser.add_argument('--url', default=FUTURES_REST_URL)
+    args = parser.parse_args()
+
+    if args.symbols:
+        symbols = args.symbols.split(',')
+    else:
+        from data_fetcher import get_symbols
+        symbols = get_symbols()
+    downloader = KlineDownloader(KlineArchive(args.root), base_url=args.url)
+    start = int((time.time() - args.days * 86400) * 1000)
+    started = time.monotonic()
+    result = downloader.sync_all(symbols, args.interval, start_time=start)
+    print(f"✅ {sum(result.values())} candles for {len(result)} symbols "
+          f"in {time.monotonic() - started:.1f}s ({downloader.stats['requests']} requests)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import threading
+import time
+
+import numpy as np
+
+COLUMNS = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+TIME_COLUMNS = ('open_time', 'close_time')
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000,
+}
+
+
+def parse_kline(row):
+    """REST 캔들 행 -> (open_time, open, high, low, close, volume, close_time)"""
+    return (int(row[0]), float(row[1]), float(row[2]), float(row[3]),
+            float(row[4]), float(row[5]), int(row[6]))
+
+
+class KlineBuffer:
+    """고정 크기 캔들 링 버퍼
+
+    모든 값을 i, i+slots 두 위치에 기록(미러링)해서 최근 N개 캔들을
+    항상 연속된 NumPy 뷰로 꺼낼 수 있다. 마지막 슬롯 하나는 아직
+    마감되지 않은(형성 중인) 캔들용이다.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = capacity + 1
+        self._data = {
+            c: np.zeros(2 * self._slots, dtype=np.int64 if c in TIME_COLUMNS else np.float64)
+            for c in COLUMNS
+        }
+        self._head = 0      # 다음 마감 캔들이 들어갈 슬롯
+        self._count = 0     # 보관 중인 마감 캔들 수
+        self._live = False  # 형성 중인 캔들 존재 여부
+
+    def __len__(self):
+        return self._count
+
+    def _write(self, i, row):
+        j = i + self._slots
+        for c, v in zip(COLUMNS, row):
+            arr = self._data[c]
+            arr[i] = v
+            arr[j] = v
+
+    def append(self, row):
+        """마감된 캔들 추가 (가장 오래된 캔들은 덮어씀)"""
+        self._write(self._head, row)
+        self._head = (self._head + 1) % self._slots
+        self._count = min(self._count + 1, self.capacity)
+        self._live = False
+
+    def set_live(self, row):
+        """형성 중인 캔들 갱신 (버퍼 위치는 그대로)"""
+        self._write(self._head, row)
+        self._live = True
+
+    @property
+    def last_open_time(self):
+        """마지막 마감 캔들의 open_time (없으면 None)"""
+        if not self._count:
+            return None
+        return int(self._data['open_time'][self._head + self._slots - 1])
+
+    def view(self, n=None, include_live=True):
+        """최근 n개 캔들(형성 중인 캔들 포함)의 컬럼별 읽기 전용 뷰
+
+        복사하지 않으므로 다음 갱신 전까지만 유효하다.
+        """
+        live = include_live and self._live
+        stop = self._head + self._slots + (1 if live else 0)
+        total = self._count + (1 if live else 0)
+        n = total if n is None else min(n, total)
+        start = stop - n
+        out = {}
+        for c, arr in self._data.items():
+            v = arr[start:stop]
+            v.flags.writeable = False
+            out[c] = v
+        return out
+
+
+class KlineStore:
+    """심볼별 롤링 캔들 캐시 - 최초 1회 REST로 채우고 이후에는 새 캔들만 추가"""
+
+    def __init__(self, fetch, max_age=1.0, default_limit=500):
+        # fetch(symbol, interval, limit, start_time=None) -> REST 캔들 행 목록
+        self.fetch = fetch
+        self.max_age = max_age
+        self.default_limit = default_limit
+        self._buffers = {}
+        self._updated = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, symbol, interval='1m', limit=None, now=None):
+        """캔들 뷰 반환 - 필요한 경우에만 REST 호출"""
+        key = (symbol, interval)
+        with self._key_lock(key):
+            now = time.time() if now is None else now
+            buf = self._buffers.get(key)
+            if buf is None or (limit and limit > buf.capacity):
+                # 요청한 구간만큼만 조회하고 그 크기로 보관
+                buf = self._fill(key, limit or self.default_limit, now)
+            elif now - self._updated.get(key, 0) >= self.max_age:
+                buf = self._refresh(key, buf, now)
+            return buf.view(limit)
+
+    def buffer(self, symbol, interval='1m'):
+        return self._buffers.get((symbol, interval))
+
+    def seed(self, symbol, interval, arrays, capacity=None):
+        """아카이브 등에서 읽은 마감 캔들(컬럼별 배열)로 버퍼를 미리 채움 (웜 스타트)
+
+        다음 get()에서 마지막 캔들 이후 구간만 REST로 받는다.
+        """
+        key = (symbol, interval)
+        capacity = capacity or self.default_limit
+        with self._key_lock(key):
+            buf = KlineBuffer(capacity)
+            n = len(arrays['open_time'])
+            cols = [arrays[c][max(0, n - capacity):] for c in COLUMNS]
+            for row in zip(*cols):
+                buf.append(row)
+            self._buffers[key] = buf
+            self._updated[key] = 0
+            return len(buf)
+
+    def _ingest_rows(self, buf, rows, now_ms):
+        last = buf.last_open_time
+        for row in rows:
+            row = parse_kline(row)
+            if last is not None and row[0] <= last:
+                continue
+            if row[6] < now_ms:
+                buf.append(row)
+                last = row[0]
+            else:
+                buf.set_live(row)
+
+    def _fill(self, key, capacity, now):
+        symbol, interval = key
+        buf = KlineBuffer(capacity)
+        rows = self.fetch(symbol, interval, capacity)
+        self._ingest_rows(buf, rows, int(now * 1000))
+        self._buffers[key] = buf
+        self._updated[key] = now
+        return buf
+
+    def _refresh(self, key, buf, now):
+        symbol, interval = key
+        step = INTERVAL_MS[interval]
+        last = buf.last_open_time
+        now_ms = int(now * 1000)
+        if last is None or (now_ms - last) // step > buf.capacity:
+            # 공백이 버퍼보다 길면 새로 채움
+            return self._fill(key, buf.capacity, now)
+        rows = self.fetch(symbol, interval, min(buf.capacity, 1500), start_time=last + step)
+        self._ingest_rows(buf, rows, now_ms)
+        self._updated[key] = now
+        return buf
+
+    def on_kline(self, symbol, k, now=None):
+        """kline 스트림 이벤트(k 페이로드) 반영 - REST 호출 없이 버퍼 갱신"""
+        key = (symbol, k['i'])
+        with self._key_lock(key):
+            buf = self._buffers.get(key)
+            if buf is None:
+                return
+            row = (int(k['t']), float(k['o']), float(k['h']), float(k['l']),
+                   float(k['c']), float(k['v']), int(k['T']))
+            last = buf.last_open_time
+            if last is not None and row[0] <= last:
+                return
+            if k['x']:
+                buf.append(row)
+            else:
+                buf.set_live(row)
+            self._updated[key] = time.time() if now is None else now
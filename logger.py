@@ -1,61 +1,76 @@
-import csv
+import atexit
 import os
+import threading
 from datetime import datetime
 from notifier import notify_slack
+from trade_store import TradeStore
+from pnl_aggregates import PnlAggregates
 
-def ensure_log_file():
-    """trade_log.csv 파일이 존재하는지 확인하고 없으면 생성"""
-    if not os.path.exists('trade_log.csv'):
-        try:
-            with open('trade_log.csv', 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'symbol', 'side', 'entry', 'exit', 'pnl'])
-            notify_slack("📝 Created new trade_log.csv file")
-        except Exception as e:
-            notify_slack(f"❌ Failed to create trade_log.csv: {str(e)}")
-            raise
+TRADE_DB_PATH = os.getenv('TRADE_DB_PATH', 'trades.db')
+PNL_SNAPSHOT_PATH = os.getenv('PNL_SNAPSHOT_PATH', 'pnl_snapshot.json')
+LEGACY_CSV_PATH = 'trade_log.csv'  # 이전 버전의 CSV 거래 기록 (최초 1회 가져옴)
+
+_store = None
+_store_lock = threading.Lock()
+_aggregates = None
+_aggregates_lock = threading.Lock()
+
+def get_store():
+    """거래 기록 저장소 (최초 호출 시 생성하고 기존 CSV 기록을 가져옴)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TradeStore(TRADE_DB_PATH)
+            atexit.register(_store.stop)
+            try:
+                imported = _store.import_csv(LEGACY_CSV_PATH)
+                if imported:
+                    notify_slack(f"📝 Imported {imported} trades from {LEGACY_CSV_PATH}")
+            except Exception as e:
+                notify_slack(f"❌ Failed to import {LEGACY_CSV_PATH}: {str(e)}")
+        return _store
+
+def get_aggregates():
+    """PnL 집계 (스냅샷 복원 후 그 이후 거래만 저장소에서 다시 반영)"""
+    global _aggregates
+    with _aggregates_lock:
+        if _aggregates is None:
+            store = get_store()
+            store.flush(timeout=5)
+            _aggregates = PnlAggregates(PNL_SNAPSHOT_PATH).restore(store)
+        return _aggregates
 
 def log_trade(trade):
-    """거래 기록을 CSV 파일에 저장"""
+    """거래 기록 저장 (백그라운드에서 배치로 기록) 및 PnL 집계 갱신"""
     try:
-        ensure_log_file()
-        
-        with open('trade_log.csv', 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                trade['symbol'],
-                trade['side'],
-                trade['entry'],
-                trade['exit'],
-                trade['pnl']
-            ])
+        ts, *_ = get_store().add(trade)
+        get_aggregates().add({**trade, 'ts': ts})
     except Exception as e:
         notify_slack(f"❌ Failed to log trade: {str(e)}")
 
+def flush(timeout=5):
+    """대기 중인 거래 기록 저장 및 PnL 스냅샷 저장 (종료 시 사용)"""
+    if _aggregates:
+        _aggregates.save()
+    return _store.flush(timeout) if _store else True
+
 def daily_report():
     """일일 거래 보고서 생성"""
     try:
-        ensure_log_file()
-        
+        store = get_store()
         today = datetime.now().strftime('%Y-%m-%d')
-        trades = []
-        total_pnl = 0
-        
-        with open('trade_log.csv', 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['timestamp'].startswith(today):
-                    trades.append(row)
-                    total_pnl += float(row['pnl'])
-        
-        if trades:
+        stats = get_aggregates().day(today)
+
+        if stats['trades']:
+            store.flush(timeout=5)
             report = f"📊 *Daily Trading Report ({today})*\n"
-            report += f"• Total Trades: {len(trades)}\n"
-            report += f"• Total PnL: {total_pnl:.2f} USDT\n"
+            report += f"• Total Trades: {stats['trades']}\n"
+            report += f"• Total PnL: {stats['pnl']:.2f} USDT\n"
+            report += f"• Win Rate: {stats['win_rate']:.1%}\n"
+            report += f"• Max Drawdown: {stats['max_drawdown']:.2f} USDT\n"
             report += "\nRecent Trades:\n"
             
-            for trade in trades[-5:]:  # 최근 5개 거래만 표시
+            for trade in store.recent(today, 5):  # 최근 5개 거래만 표시
                 report += f"• {trade['symbol']} {trade['side']} @{trade['entry']} -> {trade['exit']} ({trade['pnl']} USDT)\n"
             
             notify_slack(report)
@@ -3,15 +3,22 @@ import time
 import logging
 import requests
 import atexit
-from datetime import datetime, timedelta
+import queue
+import threading
+from datetime import datetime
 from dotenv import load_dotenv
 
-from data_fetcher import get_symbols, get_klines
-from signal_generator import get_signal, cleanup_history
+from data_fetcher import get_klines, symbol_meta, universe
+from signal_generator import get_signal, Screener
 from risk_manager import RiskManager
-from trade_executor import TradeExecutor
-from logger import log_trade, daily_report
-from notifier import notify
+from trade_executor import TradeExecutor, BracketOrderError
+from logger import log_trade, daily_report, get_aggregates, flush as flush_trades
+from notifier import notify, notify_slack as queue_slack, flush as flush_slack
+from market_stream import MarketStream
+from order_tracker import OrderTracker
+from trade_pipeline import TradePipeline
+from http_client import FUTURES_REST_URL, session_for
+from tracing import tracer
 
 # 환경 변수 설정
 def setup_environment():
@@ -71,17 +78,32 @@ def setup_environment():
 env_config = setup_environment()
 SLACK_WEBHOOK_URL = env_config["SLACK_WEBHOOK_URL"]
 IS_AZURE_VM = env_config["IS_AZURE_VM"]
-THRESHOLD = 3.0  # 가격 변동 감지 임계값 (%)
+THRESHOLD = 3.0  # 가격 변동 감지 임계값 (%) - 롤링 변동성이 쌓이기 전까지 사용 (이후 z-score)
 INTERVAL = 60    # 모니터링 간격 (초)
-MAX_SYMBOLS = 500  # 최대 모니터링 심볼 수
+MAX_CONCURRENT_TRADES = 8  # 동시에 분석/주문하는 최대 심볼 수
+TRADE_QUEUE_SIZE = 100     # 처리 대기 트리거 최대 개수
+STOP_LOOKBACK = 5          # 손절가 계산에 쓰는 직전 캔들 수
+RISK_SNAPSHOT_PATH = os.getenv('RISK_SNAPSHOT_PATH', 'risk_state.json')
+
 
 # 글로벌 변수
-session = requests.Session()
+session = session_for(FUTURES_REST_URL)  # 공유 keep-alive 세션
 last_prices = {}
+anomalies = queue.Queue()  # 스트림 스레드 -> 메인 루프 이상 징후 전달
 balance_cache = {'value': None, 'timestamp': None}
 balance_cache_duration = 300  # 5분
 last_cleanup_time = datetime.now()
 cleanup_interval = 3600  # 1시간마다 메모리 정리
+_risk = None
+_risk_lock = threading.Lock()
+
+def get_risk_manager():
+    """모든 트레이드 워커가 공유하는 리스크 관리자 (스냅샷에서 복원)"""
+    global _risk
+    with _risk_lock:
+        if _risk is None:
+            _risk = RiskManager(aggregates=get_aggregates(), snapshot_path=RISK_SNAPSHOT_PATH)
+        return _risk
 
 # 슬랙 연결 테스트
 def test_slack_connection():
@@ -91,7 +113,7 @@ def test_slack_connection():
         return False
         
     try:
-        r = requests.post(SLACK_WEBHOOK_URL, json={"text": "🚀 AutoBot 시작 테스트 메시지"}, timeout=10)
+        r = session_for(SLACK_WEBHOOK_URL).post(SLACK_WEBHOOK_URL, json={"text": "🚀 AutoBot 시작 테스트 메시지"})
         status = r.status_code
         logging.info(f"Slack 테스트 요청 응답: {status} {r.text}")
         if status != 200:
@@ -106,8 +128,13 @@ def cleanup_resources():
     """프로그램 종료 시 리소스 정리"""
     if session:
         session.close()
+    try:
+        flush_trades(timeout=5)
+    except Exception as e:
+        logging.error(f"거래 기록 저장 중 오류: {e}")
     try:
         notify_slack("🛑 Bot shutting down, cleaning up resources")
+        flush_slack(timeout=5)
     except Exception as e:
         logging.error(f"종료 알림 전송 중 오류: {e}")
 
@@ -145,27 +172,22 @@ def perform_periodic_cleanup():
         balance_cache['balance'] = None
         notify_slack("🧹 Balance cache cleared after 24 hours")
 
-def notify_slack(message):
-    """슬랙으로 메시지 전송"""
+def notify_slack(message, priority=None):
+    """슬랙으로 메시지 전송 (백그라운드 큐 - 호출 스레드를 막지 않음)"""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     log = f"[{timestamp}] {message}"
     print(log)
     
-    if not SLACK_WEBHOOK_URL:
-        logging.warning("Slack 메시지 전송 실패: Webhook URL이 설정되지 않았습니다.")
-        return
-        
     try:
-        response = session.post(SLACK_WEBHOOK_URL, json={"text": log}, timeout=10)
-        if response.status_code != 200:
-            logging.error(f"Slack 전송 실패: 상태 코드 {response.status_code}, 응답: {response.text}")
+        with tracer.span('notify'):
+            queue_slack(message, priority=priority)
     except Exception as e:
         logging.error(f"Slack 알림 전송 중 오류: {e}")
 
 def fetch_all_prices():
     """모든 USDT 페어의 현재 가격 조회"""
     print("\n🔍 Fetching all prices...")
-    url = 'https://fapi.binance.com/fapi/v1/ticker/price'
+    url = f'{FUTURES_REST_URL}/fapi/v1/ticker/price'
     try:
         res = session.get(url, timeout=5)
         res.raise_for_status()
@@ -181,28 +203,41 @@ def fetch_all_prices():
         logging.error(f"가격 조회 오류: {e}")
         return {}
 
-def trade_logic(trigger_symbol):
-    """트레이딩 로직 실행 - 특정 심볼에 대해서만 실행"""
+def trade_logic(trigger_symbol, signal=None):
+    """트레이딩 로직 실행 - 특정 심볼에 대해서만 실행 (signal: 스크리너가 이미 확정한 신호)"""
+    try:
+        _trade_logic(trigger_symbol, signal)
+    finally:
+        # 주문 없이 끝난 경로(한도, 신호 없음, 거부, 오류)의 틱 -> 주문 접수 구간 정리 (주문하면 이미 소비됨)
+        tracer.discard(trigger_symbol)
+
+def _trade_logic(trigger_symbol, signal=None):
     if not trigger_symbol:
         return
         
     notify_slack(f"🔄 Starting trade logic for {trigger_symbol}...")
-    risk = RiskManager()
+    risk = get_risk_manager()
     
     # 거래 가능 여부 확인
-    if not risk.can_trade(trigger_symbol):
+    with tracer.span('risk_check'):
+        allowed = risk.can_trade(trigger_symbol)
+    if not allowed:
         notify_slack(f"⏭️ Skipping {trigger_symbol} - trading not allowed")
         return
     
-    # 시그널 확인
-    notify_slack(f"📡 Analyzing {trigger_symbol}...")
-    try:
-        sig, reason = get_signal(trigger_symbol)
-        notify_slack(f"📊 Signal for {trigger_symbol}: {sig}")
-        notify_slack(f"📈 Reason: {reason}")
-    except Exception as e:
-        notify_slack(f"❌ Signal generation error for {trigger_symbol}: {str(e)}")
-        return
+    # 시그널 확인 (스크리너가 확정한 신호는 다시 계산하지 않음 - 점수 기록에 중복으로 쌓이지 않도록)
+    if signal is not None:
+        sig = signal
+    else:
+        notify_slack(f"📡 Analyzing {trigger_symbol}...")
+        try:
+            with tracer.span('signal'):
+                sig, reason = get_signal(trigger_symbol)
+            notify_slack(f"📊 Signal for {trigger_symbol}: {sig}")
+            notify_slack(f"📈 Reason: {reason}")
+        except Exception as e:
+            notify_slack(f"❌ Signal generation error for {trigger_symbol}: {str(e)}")
+            return
         
     # 매수/매도 신호가 없으면 종료
     if sig not in ('buy', 'sell'):
@@ -211,118 +246,205 @@ def trade_logic(trigger_symbol):
     # 실행 단계
     notify_slack(f"🎯 Trade signal detected for {trigger_symbol}: {sig}")
     
-    # 트레이드 실행기 초기화 및 재시도 로직
-    max_retries = 3
-    retry_delay = 5  # seconds
+    # 일일 거래 수/쿨다운 자리를 한 번의 잠금으로 예약 (여러 워커가 남은 한 자리를 동시에 통과하지 않도록)
+    if not risk.try_acquire(trigger_symbol):
+        notify_slack(f"⏭️ Skipping {trigger_symbol} - trading not allowed")
+        return
+    placed = False
+    try:
+        # 트레이드 실행기 초기화 및 재시도 로직
+        max_retries = 3
+        retry_delay = 5  # seconds
     
-    for attempt in range(max_retries):
-        try:
-            exec = TradeExecutor()
-            balance = get_cached_balance(exec)
-            notify_slack(f"💰 Current balance: {balance:.2f} USDT")
+        for attempt in range(max_retries):
+            try:
+                exec = TradeExecutor()
+                with tracer.span('balance'):
+                    balance = get_cached_balance(exec)
+                notify_slack(f"💰 Current balance: {balance:.2f} USDT")
             
-            # 가격 데이터 조회
-            df = get_klines(trigger_symbol)
-            entry = df['close'].iloc[-1]
-            stop = df['close'][:-1].min() if sig == 'buy' else df['close'][:-1].max()
-            notify_slack(f"📈 Entry price: {entry:.2f}, Stop price: {stop:.2f}")
+                # 가격 데이터 조회
+                with tracer.span('data_fetch'):
+                    df = get_klines(trigger_symbol, limit=STOP_LOOKBACK + 1)
+                entry = df['close'].iloc[-1]
+                stop = df['close'][:-1].min() if sig == 'buy' else df['close'][:-1].max()
+                meta = symbol_meta.get(trigger_symbol)
+                if meta is not None:
+                    # 거래소 PRICE_FILTER에 맞춤 - 손절가는 진입가에서 먼 쪽으로
+                    entry = meta.price(entry)
+                    stop = meta.price(stop, 'down' if sig == 'buy' else 'up')
+                notify_slack(f"📈 Entry price: {entry:.2f}, Stop price: {stop:.2f}")
             
-            # 포지션 크기 및 레버리지 계산
-            qty, lev = risk.size_leverage(balance, entry, stop)
-            notify_slack(f"📊 Position size: {qty:.3f}, Leverage: {lev}x")
+                # 포지션 크기 및 레버리지 계산
+                qty, lev = risk.size_leverage(balance, entry, stop, meta)
+                if meta is not None and not meta.is_valid(qty, entry):
+                    notify_slack(f"⏭️ Skipping {trigger_symbol} - order below exchange minimum "
+                                 f"(qty={qty}, minQty={meta.min_qty}, minNotional={meta.min_notional})")
+                    return
+                notify_slack(f"📊 Position size: {qty:.3f}, Leverage: {lev}x")
             
-            # 레버리지 설정
-            exec.set_leverage(trigger_symbol, lev)
-            notify_slack(f"⚙️ Set leverage for {trigger_symbol} to {lev}x")
+                # 레버리지 설정
+                with tracer.span('leverage'):
+                    exec.set_leverage(trigger_symbol, lev)
+                notify_slack(f"⚙️ Set leverage for {trigger_symbol} to {lev}x")
             
-            # 주문 실행
-            order_side = 'BUY' if sig == 'buy' else 'SELL'
-            exec.enter_limit(trigger_symbol, order_side, qty, entry)
-            notify_slack(f"✅ Entered {sig} order for {trigger_symbol} at {entry:.2f}")
-            
-            # TP/SL 설정
-            tp = entry * 1.10 if sig == 'buy' else entry * 0.90
-            exec.place_oco(trigger_symbol, 'SELL' if sig == 'buy' else 'BUY', qty, stop, tp)
-            notify_slack(f"✅ Placed OCO order - TP: {tp:.2f}, SL: {stop:.2f}")
+                # TP/SL 계산
+                tp = entry * 1.10 if sig == 'buy' else entry * 0.90
+                if meta is not None:
+                    tp = meta.price(tp)
+
+                # 진입 후 익절/손절 조건부 주문 (하나라도 거부되면 전체 롤백)
+                order_side = 'BUY' if sig == 'buy' else 'SELL'
+                try:
+                    with tracer.span('order_submit'):
+                        exec.open_bracket(trigger_symbol, order_side, qty, entry, stop, tp)
+                    placed = True
+                    # 이상 징후 감지 틱부터 주문 접수까지
+                    tracer.observe_since(trigger_symbol, 'tick_to_order')
+                except BracketOrderError as e:
+                    notify_slack(f"❌ Bracket order rejected for {trigger_symbol}, rolled back {e.rolled_back}: {str(e)}",
+                                 priority=True)
+                    return
+                notify_slack(f"✅ Entered {sig} order for {trigger_symbol} at {entry:.2f} "
+                             f"with TP: {tp:.2f}, SL: {stop:.2f}", priority=True)
             
-            # 예상 PnL 계산 및 등록
-            pnl = (tp - entry) / entry * qty * lev
-            risk.register(pnl, trigger_symbol)
-            notify_slack(f"📊 Expected PnL: {pnl:.2f} USDT")
+                # 예상 PnL 알림 (거래 수/쿨다운은 try_acquire에서 등록, 실현 손익은 주문 추적기가 청산 시 기록)
+                pnl = (tp - entry) / entry * qty * lev
+                notify_slack(f"📊 Expected PnL: {pnl:.2f} USDT")
             
-            # 로그 기록 및 알림
-            log_trade({'symbol': trigger_symbol, 'side': sig, 'entry': entry, 'exit': tp, 'pnl': pnl})
-            notify(f"{trigger_symbol} {sig}@{entry:.2f}, qty={qty:.3f}, lev={lev}x")
-            notify_slack(f"📝 Trade logged and notification sent")
+                notify(f"{trigger_symbol} {sig}@{entry:.2f}, qty={qty:.3f}, lev={lev}x")
             
-            # 성공적으로 완료되면 루프 종료
-            break
+                # 성공적으로 완료되면 루프 종료
+                break
             
-        except (requests.exceptions.RequestException, ConnectionError) as e:
-            if attempt < max_retries - 1:
-                notify_slack(f"⚠️ Connection error (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                time.sleep(retry_delay)
-                continue
-            else:
-                notify_slack(f"❌ Trading error for {trigger_symbol}: Max retries exceeded. Last error: {str(e)}")
+            except (requests.exceptions.RequestException, ConnectionError) as e:
+                if attempt < max_retries - 1:
+                    notify_slack(f"⚠️ Connection error (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                    time.sleep(retry_delay)
+                    continue
+                else:
+                    notify_slack(f"❌ Trading error for {trigger_symbol}: Max retries exceeded. Last error: {str(e)}")
+                    return
+            except Exception as e:
+                notify_slack(f"❌ Trading error for {trigger_symbol}: {str(e)}")
                 return
-        except Exception as e:
-            notify_slack(f"❌ Trading error for {trigger_symbol}: {str(e)}")
-            return
+    finally:
+        # 주문이 나가지 않았으면 (신호 이후 건너뜀, 브래킷 거부/롤백, 오류) 예약 취소
+        if not placed:
+            risk.release(trigger_symbol)
+
+def record_closed_trade(trade):
+    """주문 추적기가 브래킷 청산을 확인하면 실현 손익 기록"""
+    log_trade(trade)
+    notify_slack(f"💵 Closed {trade['symbol']} {trade['side']} @{trade['entry']} -> {trade['exit']}, "
+                 f"realized PnL: {trade['pnl']:.2f} USDT", priority=True)
 
 def monitor():
-    """가격 모니터링 및 이상 징후 감지"""
+    """실시간 가격 스트림 모니터링 및 이상 징후 감지"""
     global last_prices
     
     notify_slack("\n🚀 Starting Binance anomaly monitor + trader")
     
-    # 초기 가격 데이터 로드
+    # 초기 가격 데이터 로드 (스트림 기준 가격)
     last_prices = fetch_all_prices()
     if not last_prices:
         notify_slack("❌ Initial fetch failed. Exit.")
         return
 
+    # 심볼별 거래소 필터 로드 (이후 백그라운드에서 주기적으로 갱신)
+    try:
+        symbol_meta.refresh()
+    except Exception as e:
+        notify_slack(f"⚠️ Failed to load exchange filters: {str(e)}")
+    symbol_meta.start()
+
+    # 거래대금/변동성 상위 MAX_SYMBOLS개만 감시 (느린 주기로 재선정, 실패하면 전체 감시)
+    try:
+        universe.refresh()
+        notify_slack(f"🔭 Watching {len(universe)} of {len(last_prices)} symbols")
+    except Exception as e:
+        notify_slack(f"⚠️ Failed to rank symbol universe, watching all symbols: {str(e)}")
+    universe.start()
+
+    # 현재 마진 타입/레버리지를 한 번에 읽어 주문마다 변경 호출을 생략
+    try:
+        seeded = TradeExecutor().sync_state()
+        logging.info(f"레버리지 캐시: {seeded}개 심볼 로드")
+    except Exception as e:
+        notify_slack(f"⚠️ Failed to load leverage state: {str(e)}")
+
+    # 주문/체결 추적 (user-data 스트림) - 익절/손절 체결 시 반대 주문 취소 및 실현 손익 기록
+    tracker = OrderTracker(TradeExecutor().cli, on_close=record_closed_trade)
+    try:
+        tracker.start()
+    except Exception as e:
+        notify_slack(f"❌ Failed to start order tracker: {str(e)}")
+
+    # 가격 스트림 시작 - 틱마다 THRESHOLD 확인
+    def on_anomaly(symbol, change_pct):
+        anomalies.put((symbol, change_pct, time.perf_counter()))
+
+    stream = MarketStream(
+        on_anomaly=on_anomaly,
+        threshold=THRESHOLD,
+        window=INTERVAL,
+        symbols=universe
+    )
+    stream.seed(last_prices)
+    last_prices = stream.prices
+    # 감시 대상에서 빠진 심볼의 가격/감지기 상태는 바로 정리 (다시 들어오면 새로 시작)
+    universe.listeners.append(lambda added, removed: stream.discard(removed))
+    stream.start()
+
+    # 트리거 처리 워커 풀 시작 - 처리 중에도 감지는 계속됨
+    pipeline = TradePipeline(trade_logic, max_workers=MAX_CONCURRENT_TRADES, max_queue=TRADE_QUEUE_SIZE)
+    pipeline.start()
+
+    # INTERVAL마다 감시 대상 전체를 한 번에 스코어링 - 신호가 확정된 심볼은 같은 파이프라인으로 전달
+    screener = Screener(lambda: [s for s in list(stream.prices) if s in universe],
+                        on_signal=lambda symbol, sig: pipeline.submit(symbol, signal=sig), interval=INTERVAL)
+    screener.start()
+
+    # 단계별 지연 시간 메트릭 내보내기 (METRICS_PATH 파일, METRICS_PORT가 있으면 /metrics)
+    tracer.start_exporter()
+
     # 매일 보고서 날짜 추적
     last_report_day = datetime.now().day
     
     # 메인 모니터링 루프
-    while True:
-        # 주기적 데일리 리포트 생성
-        current_day = datetime.now().day
-        if current_day != last_report_day:
-            daily_report()
-            last_report_day = current_day
-        
-        # 주기적 메모리 정리
-        perform_periodic_cleanup()
-        
-        print("\n🔁 Monitoring prices...")
-        time.sleep(INTERVAL)
-        
-        # 최신 가격 조회
-        current_prices = fetch_all_prices()
-        if not current_prices:
-            continue
-
-        # 가격 변동 확인
-        for symbol in current_prices:
-            old = last_prices.get(symbol)
-            if old is None:
-                continue
-                
-            new = current_prices[symbol]
-            change_pct = (new - old) / old * 100
+    try:
+        while True:
+            # 주기적 데일리 리포트 생성
+            current_day = datetime.now().day
+            if current_day != last_report_day:
+                daily_report()
+                last_report_day = current_day
             
-            # 이상 징후 감지
-            if abs(change_pct) >= THRESHOLD:
-                notify_slack("\n")
-                notify_slack(f"🚨 Anomaly detected: {symbol} {change_pct:+.2f}%")
-                
-                # 해당 심볼에 대해 트레이딩 로직 실행
-                trade_logic(symbol)
+            # 주기적 메모리 정리
+            perform_periodic_cleanup()
+            
+            # 스트림에서 감지된 이상 징후 대기
+            try:
+                symbol, change_pct, detected = anomalies.get(timeout=1)
+            except queue.Empty:
+                continue
 
-        # 가격 데이터 업데이트
-        last_prices = current_prices
+            notify_slack("\n")
+            notify_slack(f"🚨 Anomaly detected: {symbol} {change_pct:+.2f}%")
+            
+            # 해당 심볼에 대한 트레이딩 로직을 워커 풀에 전달 - 접수된 트리거만 감지 틱부터 주문 접수 구간 시작
+            # (이미 처리 중인 같은 심볼의 구간 시작 시각은 덮어쓰지 않음)
+            if not pipeline.submit(symbol, on_accept=lambda: tracer.mark(symbol, at=detected)):
+                logging.info(f"{symbol} 트리거 건너뜀 (이미 처리 중이거나 큐 가득 참)")
+            logging.info(f"트레이드 파이프라인 상태: {pipeline.metrics()}")
+    finally:
+        stream.stop()
+        screener.stop()
+        pipeline.stop()
+        tracker.stop()
+        symbol_meta.stop()
+        universe.stop()
+        tracer.stop()
 
 if __name__ == "__main__":
     notify_slack("🤖 AutoBot이 시작되었습니다!")
@@ -0,0 +1,158 @@
+import abc
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import websockets
+from websockets.asyncio.client import connect
+
+from anomaly_detector import AnomalyDetector
+from http_client import FUTURES_WS_BASE
+
+FUTURES_WS_URL = f"{FUTURES_WS_BASE}/stream"
+MARKET_STREAMS = ["!markPrice@arr", "!miniTicker@arr"]
+
+
+class WebSocketStream(abc.ABC):
+    """바이낸스 결합(combined) 스트림 연결 - 끊기면 재접속 후 재구독 (on_message는 하위 클래스가 구현)"""
+
+    def __init__(self, url=FUTURES_WS_URL, streams=None, reconnect_delay=1.0, max_reconnect_delay=60.0):
+        self.url = url
+        self.streams = list(streams or [])
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.messages = 0
+        self._stopping = False
+        self._ws = None
+        self._loop = None
+        self._thread = None
+        self._sub_id = 0
+
+    @abc.abstractmethod
+    def on_message(self, msg):
+        """수신 메시지 처리 - 구현하지 않은 하위 클래스는 생성 시 TypeError"""
+
+    async def _subscribe(self, ws):
+        if not self.streams:
+            return
+        self._sub_id += 1
+        await ws.send(json.dumps({"method": "SUBSCRIBE", "params": self.streams, "id": self._sub_id}))
+
+    async def run(self):
+        """연결 유지 루프 - 연결이 끊기면 지수 백오프로 재접속"""
+        self._loop = asyncio.get_running_loop()
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with connect(self.url, ping_interval=20, ping_timeout=20, max_size=None) as ws:
+                    self._ws = ws
+                    await self._subscribe(ws)
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    async for raw in ws:
+                        self.messages += 1
+                        try:
+                            self.on_message(json.loads(raw))
+                        except Exception as e:
+                            logging.error(f"스트림 메시지 처리 오류: {e}")
+            except (OSError, asyncio.TimeoutError, websockets.ConnectionClosed, websockets.InvalidHandshake) as e:
+                logging.warning(f"스트림 연결 끊김 ({self.url}): {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+            if self._stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self):
+        """백그라운드 스레드에서 스트림 실행"""
+        self._stopping = False
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=5):
+        """스트림 종료"""
+        self._stopping = True
+        if self._loop and self._ws is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+            except RuntimeError:
+                pass
+        if self._thread:
+            self._thread.join(timeout)
+
+
+class MarketStream(WebSocketStream):
+    """!markPrice@arr / !miniTicker@arr 기반 실시간 가격 테이블 및 이상 징후 감지"""
+
+    def __init__(self, on_anomaly=None, threshold=3.0, window=60, quote='USDT', url=FUTURES_WS_URL, symbols=None,
+                 detector=None, **kwargs):
+        super().__init__(url=url, streams=MARKET_STREAMS, **kwargs)
+        self.on_anomaly = on_anomaly
+        self.threshold = threshold
+        self.window = window
+        self.quote = quote
+        self.symbols = symbols  # 감시 대상 (in을 지원하는 컨테이너, 예: Universe) - None이면 전체
+        # 1m/5m/15m 롤링 z-score 감지 (변동성이 쌓이기 전에는 threshold %, 감지 후 window초 동안 재감지 안 함)
+        self.detector = detector or AnomalyDetector(threshold=threshold, cooldown=window)
+        self.prices = {}       # 심볼별 최근 체결가
+        self.mark_prices = {}  # 심볼별 최근 마크 가격
+        self._lock = threading.Lock()
+
+    def seed(self, prices, now=None):
+        """REST 스냅샷으로 가격 테이블과 기준 가격 초기화"""
+        now = time.time() if now is None else now
+        symbols = self.symbols
+        with self._lock:
+            for sym, price in prices.items():
+                if symbols is not None and sym not in symbols:
+                    continue
+                self.prices[sym] = price
+                self.detector.seed(sym, price, now)
+
+    def on_message(self, msg):
+        data = msg.get('data')
+        if data is None:
+            return  # 구독 응답 등
+        stream = msg.get('stream', '')
+        items = data if isinstance(data, list) else [data]
+        symbols = self.symbols
+        if stream.startswith('!markPrice'):
+            for item in items:
+                sym = item['s']
+                if sym.endswith(self.quote) and (symbols is None or sym in symbols):
+                    self.mark_prices[sym] = float(item['p'])
+        else:
+            for item in items:
+                sym = item['s']
+                if sym.endswith(self.quote) and (symbols is None or sym in symbols):
+                    self.on_price(sym, float(item['c']))
+
+    def discard(self, symbols):
+        """감시 대상에서 빠진 심볼의 가격과 감지기 상태 정리"""
+        with self._lock:
+            for sym in symbols:
+                self.prices.pop(sym, None)
+                self.mark_prices.pop(sym, None)
+                self.detector.discard(sym)
+
+    def on_price(self, symbol, price, now=None):
+        """틱마다 이상 징후 감지기에 반영하고 감지되면 콜백 호출 (변동률 % 반환)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.prices[symbol] = price
+            anomaly = self.detector.update(symbol, price, now)
+        if anomaly is None:
+            return None
+        logging.info(f"이상 징후 {symbol}: {anomaly.timeframe}s {anomaly.change_pct:+.2f}%"
+                     + (f" z={anomaly.z:.1f}" if anomaly.z is not None else ""))
+        if self.on_anomaly:
+            self.on_anomaly(symbol, anomaly.change_pct)
+        return anomaly.change_pct
@@ -1,33 +1,196 @@
 import os
-import requests
+import time
+import atexit
 import logging
+import threading
+from collections import deque
 from datetime import datetime
 
-def notify_slack(message: str):
+from http_client import session_for
+from tracing import tracer
+
+COALESCE_WINDOW = 2.0     # 이 시간 동안 들어온 일반 메시지를 하나로 묶어 전송 (초)
+QUEUE_SIZE = 1000         # 대기 메시지 최대 개수 (초과 시 가장 오래된 일반 메시지 삭제)
+MAX_POST_CHARS = 3500     # Slack 전송 1건의 최대 길이
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0    # 재시도 기본 대기 (초, 지수 증가)
+PRIORITY_PREFIXES = ('❌',)  # 자동으로 우선 전송할 메시지 (오류)
+
+class SlackNotifier:
+    """
+    백그라운드 스레드에서 Slack으로 메시지를 전송합니다.
+    send()는 큐에 넣기만 하므로 웹훅이 느리거나 응답이 없어도 호출 스레드를 막지 않습니다.
+    """
+
+    def __init__(self, webhook_url=None, coalesce_window=COALESCE_WINDOW, max_queue=QUEUE_SIZE,
+                 session=None, timeout=None, sleep=time.sleep):
+        self.webhook_url = webhook_url
+        self.coalesce_window = coalesce_window
+        self.max_queue = max_queue
+        self.session = session  # None이면 웹훅 호스트의 공유 세션 사용
+        self.timeout = timeout
+        self.sleep = sleep
+        self.stats = {'queued': 0, 'posts': 0, 'dropped': 0, 'retries': 0, 'failed': 0}
+        self._normal = deque()
+        self._priority = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flushing = False
+        self._stopping = False
+        self._thread = None
+
+    def _url(self):
+        return self.webhook_url or os.getenv("SLACK_WEBHOOK_URL")
+
+    def send(self, message, priority=False):
+        """메시지를 큐에 넣고 즉시 반환 (버려진 경우 False)"""
+        with self._cond:
+            accepted = True
+            if len(self._normal) + len(self._priority) >= self.max_queue:
+                # 가득 차면 가장 오래된 일반 메시지부터 버림
+                if self._normal:
+                    self._normal.popleft()
+                elif priority:
+                    self._priority.popleft()
+                else:
+                    accepted = False
+                self.stats['dropped'] += 1
+            if accepted:
+                (self._priority if priority else self._normal).append(message)
+                self.stats['queued'] += 1
+                self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slack-notifier", daemon=True)
+                self._thread.start()
+        return accepted
+
+    @property
+    def queue_depth(self):
+        return len(self._normal) + len(self._priority)
+
+    def _next_batch(self):
+        with self._cond:
+            while not (self._normal or self._priority or self._stopping):
+                self._cond.wait()
+            if not self._priority and self._normal and not self._stopping:
+                # 묶음 창 동안 추가 메시지 대기 (우선 메시지가 오면 바로 전송)
+                deadline = time.monotonic() + self.coalesce_window
+                while not (self._priority or self._flushing or self._stopping):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch = list(self._priority) + list(self._normal)
+            self._priority.clear()
+            self._normal.clear()
+            self._busy = bool(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            try:
+                for text in self._chunks(batch):
+                    self._post(text)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _chunks(messages):
+        chunk, size = [], 0
+        for m in messages:
+            if chunk and size + len(m) + 1 > MAX_POST_CHARS:
+                yield "\n".join(chunk)
+                chunk, size = [], 0
+            chunk.append(m)
+            size += len(m) + 1
+        if chunk:
+            yield "\n".join(chunk)
+
+    def _post(self, text):
+        url = self._url()
+        if not url:
+            logging.warning("❌ SLACK_WEBHOOK_URL이 설정되지 않았습니다.")
+            return False
+        for attempt in range(MAX_RETRIES):
+            delay = RETRY_BASE_DELAY * 2 ** attempt
+            try:
+                session = self.session or session_for(url)
+                with tracer.span('slack_post'):
+                    response = session.post(url, json={"text": text}, timeout=self.timeout)
+                if response.status_code == 200:
+                    self.stats['posts'] += 1
+                    return True
+                if response.status_code == 429:
+                    delay = float(response.headers.get('Retry-After', delay))
+                elif response.status_code < 500:
+                    logging.error(f"❌ Slack 전송 실패: {response.status_code} - {response.text}")
+                    break
+            except Exception as e:
+                logging.error(f"❌ Slack 알림 오류: {str(e)}")
+            if attempt < MAX_RETRIES - 1:
+                self.stats['retries'] += 1
+                self.sleep(delay)
+        self.stats['failed'] += 1
+        return False
+
+    def flush(self, timeout=None):
+        """큐에 남은 메시지를 묶음 창을 기다리지 않고 전송한 뒤 반환"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._normal or self._priority or self._busy:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing = False
+        return True
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+_notifier = SlackNotifier()
+atexit.register(lambda: _notifier.stop())
+
+def notify_slack(message: str, priority=None):
     """
-    Slack으로 메시지를 전송합니다.
+    Slack으로 메시지를 전송합니다 (백그라운드 큐).
     오류 발생 시 로깅만 하고 예외를 발생시키지 않습니다.
+    priority가 None이면 오류 메시지(❌)만 우선 전송합니다.
     """
-    webhook_url = os.getenv("SLACK_WEBHOOK_URL")
-    if not webhook_url:
+    if not _notifier._url():
         logging.warning("❌ SLACK_WEBHOOK_URL이 설정되지 않았습니다.")
         print("❌ SLACK_WEBHOOK_URL이 설정되지 않았습니다.")
         return
-    
+
+    if priority is None:
+        priority = message.lstrip().startswith(PRIORITY_PREFIXES)
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     formatted_message = f"[{timestamp}] {message}"
-    payload = {"text": formatted_message}
-    
-    try:
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        if response.status_code != 200:
-            error_msg = f"❌ Slack 전송 실패: {response.status_code} - {response.text}"
-            logging.error(error_msg)
-            print(error_msg)
-    except Exception as e:
-        error_msg = f"❌ Slack 알림 오류: {str(e)}"
-        logging.error(error_msg)
-        print(error_msg)
+
+    if not _notifier.send(formatted_message, priority=priority):
+        logging.warning(f"Slack 큐가 가득 차 메시지를 버렸습니다: {message[:50]}")
+
+def flush(timeout=5):
+    """대기 중인 Slack 메시지 전송 완료까지 대기 (종료 시 사용)"""
+    return _notifier.flush(timeout)
 
 def notify(message: str):
     """
@@ -36,10 +199,10 @@ def notify(message: str):
     """
     logging.info(f"📢 {message}")
     print(f"📢 {message}")
-    
-    # Slack으로도 알림 (중요 거래 정보이므로)
-    notify_slack(f"🔔 거래 알림: {message}")
-    
+
+    # Slack으로도 알림 (중요 거래 정보이므로 우선 전송)
+    notify_slack(f"🔔 거래 알림: {message}", priority=True)
+
     # 추가 알림 채널은 여기에 구현 (이메일, 텔레그램 등)
     # 예시: send_email(message)
-    # 예시: send_telegram(message)
\ No newline at end of file
+    # 예시: send_telegram(message)
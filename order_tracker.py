@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from http_client import FUTURES_WS_BASE
+from market_stream import WebSocketStream
+from trade_executor import bracket_ids, parse_bracket_id
+
+USER_WS_URL = f"{FUTURES_WS_BASE}/ws"
+KEEPALIVE_INTERVAL = 1800   # listenKey 유효 시간(60분)의 절반마다 연장
+QUOTE_ASSET = 'USDT'        # 이 자산으로 낸 수수료만 PnL에서 차감
+TERMINAL = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+# ALGO_UPDATE 조건부 주문 상태 -> 주문 상태 (FINISHED는 트리거된 실제 주문의 ORDER_TRADE_UPDATE로 판단)
+ALGO_STATUS = {'NEW': 'NEW', 'TRIGGERING': 'TRIGGERED', 'TRIGGERED': 'TRIGGERED', 'CANCELED': 'CANCELED',
+               'EXPIRED': 'EXPIRED', 'REJECTED': 'REJECTED'}
+UNLINKED_LIMIT = 256        # algo 주문과 아직 연결되지 않은 실제 주문 이벤트 보관 수
+
+
+class OrderState:
+    """user-data 스트림으로 갱신되는 주문 하나의 상태"""
+    __slots__ = ('symbol', 'client_id', 'order_id', 'side', 'type', 'status', 'filled', 'avg_price',
+                 'realized', 'commission', 'updated')
+
+    def __init__(self, symbol, client_id, order_id=None, side=None, type=None):
+        self.symbol = symbol
+        self.client_id = client_id
+        self.order_id = order_id
+        self.side = side
+        self.type = type
+        self.status = 'NEW'
+        self.filled = 0.0
+        self.avg_price = 0.0
+        self.realized = 0.0
+        self.commission = 0.0
+        self.updated = None
+
+
+class Bracket:
+    """진입 + 익절/손절 주문 묶음 (clientOrderId/clientAlgoId의 bracket id로 연결)"""
+    __slots__ = ('id', 'symbol', 'legs', 'closed')
+
+    def __init__(self, bracket_id, symbol):
+        self.id = bracket_id
+        self.symbol = symbol
+        self.legs = {}   # 'e' / 'tp' / 'sl' -> OrderState
+        self.closed = False
+
+
+class OrderTracker(WebSocketStream):
+    """
+    선물 user-data 스트림(listenKey) 기반 주문/체결 추적.
+    익절·손절 중 하나가 체결되면 반대쪽 주문을 취소하고 실현 손익을 on_close로 넘깁니다.
+    익절/손절은 algoOrder 조건부 주문이라 ALGO_UPDATE로 따라가고, 트리거로 생긴 실제 주문의
+    ORDER_TRADE_UPDATE는 algo 이벤트의 orderId(ai)로 해당 leg에 연결합니다.
+    REST 폴링 없이 이벤트만으로 상태를 유지합니다.
+    """
+
+    def __init__(self, client, on_close=None, keepalive_interval=KEEPALIVE_INTERVAL, base_url=USER_WS_URL,
+                 **kwargs):
+        super().__init__(url=base_url, **kwargs)
+        self.cli = client
+        self.on_close = on_close  # on_close(trade) - trade: symbol, side, entry, exit, pnl, ts
+        self.keepalive_interval = keepalive_interval
+        self.base_url = base_url
+        self.listen_key = None
+        self.orders = {}     # clientOrderId/clientAlgoId -> OrderState (미체결 주문만)
+        self.triggered = {}  # 트리거된 algo 주문의 실제 orderId -> clientAlgoId
+        self._unlinked = {}  # 연결 전에 도착한 실제 주문 orderId -> [ORDER_TRADE_UPDATE, ...]
+        self.brackets = {}   # bracket id -> Bracket (청산 전까지)
+        self.balances = {}   # ACCOUNT_UPDATE의 지갑 잔고
+        self.stats = {'events': 0, 'fills': 0, 'closed': 0, 'sibling_cancels': 0, 'keepalive_failed': 0}
+        self._lock = threading.Lock()
+        self._actions = ThreadPoolExecutor(max_workers=2, thread_name_prefix="order-tracker")
+        self._pending = set()
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread = None
+
+    # --- listenKey 관리 ---
+
+    def _renew_listen_key(self):
+        """새 listenKey 발급 후 다음 (재)접속 URL 교체"""
+        self.listen_key = self.cli.futures_stream_get_listen_key()
+        self.url = f"{self.base_url}/{self.listen_key}"
+        return self.listen_key
+
+    def _reconnect(self):
+        """현재 연결을 닫아 run() 루프가 새 URL로 재접속하게 함"""
+        if self._loop and self._ws is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+            except RuntimeError:
+                pass
+
+    def _keepalive(self):
+        while not self._keepalive_stop.wait(self.keepalive_interval):
+            try:
+                self.cli.futures_stream_keepalive(listenKey=self.listen_key)
+            except Exception as e:
+                self.stats['keepalive_failed'] += 1
+                logging.warning(f"listenKey 연장 실패, 새로 발급합니다: {e}")
+                try:
+                    self._renew_listen_key()
+                    self._reconnect()
+                except Exception as e:
+                    logging.error(f"listenKey 발급 실패: {e}")
+
+    def start(self):
+        self._renew_listen_key()
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(target=self._keepalive, name="listen-key", daemon=True)
+        self._keepalive_thread.start()
+        return super().start()
+
+    def stop(self, timeout=5):
+        self._keepalive_stop.set()
+        super().stop(timeout)
+        self.drain(timeout)
+        if self.listen_key:
+            try:
+                self.cli.futures_stream_close(listenKey=self.listen_key)
+            except Exception as e:
+                logging.warning(f"listenKey 종료 실패: {e}")
+
+    # --- 이벤트 처리 ---
+
+    def on_message(self, msg):
+        event = msg.get('e')
+        self.stats['events'] += 1
+        if event == 'ORDER_TRADE_UPDATE':
+            self.on_order_update(msg['o'], msg.get('E'))
+        elif event == 'ALGO_UPDATE':
+            self.on_algo_update(msg['o'], msg.get('E'))
+        elif event == 'ACCOUNT_UPDATE':
+            for b in msg.get('a', {}).get('B', []):
+                self.balances[b['a']] = float(b['wb'])
+        elif event == 'listenKeyExpired':
+            logging.warning("listenKey 만료 - 재발급 후 재접속")
+            self._submit(self._expired)
+
+    def _expired(self):
+        self._renew_listen_key()
+        self._reconnect()
+
+    def on_order_update(self, o, event_time=None):
+        """ORDER_TRADE_UPDATE 한 건 반영 - 체결/종료에 따라 후속 조치"""
+        with self._lock:
+            client_id = o['c']
+            if parse_bracket_id(client_id) is None:
+                linked = self.triggered.get(str(o.get('i')))
+                if linked is not None:
+                    client_id = linked
+                else:
+                    self._stash(o, event_time)
+            action = self._apply_order(client_id, o, event_time)
+        if action:
+            self._submit(*action)
+
+    def on_algo_update(self, o, event_time=None):
+        """ALGO_UPDATE(조건부 주문) 한 건 반영 - 트리거 전 상태 갱신과 실제 주문 연결"""
+        client_id = o['caid']
+        actions = []
+        with self._lock:
+            order = self.orders.get(client_id) or self._leg(client_id)
+            if order is None:
+                if o['X'] == 'FINISHED':
+                    return   # 이미 정리된 주문의 늦은 종료 알림
+                order = self.orders[client_id] = OrderState(o['s'], client_id, o.get('aid'), o.get('S'), o.get('o'))
+            order.updated = o.get('T') or event_time
+            status = ALGO_STATUS.get(o['X'])
+            if o['X'] == 'FINISHED' and order.status not in TERMINAL and not float(o.get('aq') or 0):
+                status = 'EXPIRED'   # 트리거됐지만 체결 없이 끝남 (예: 청산할 포지션 없음)
+            if status is not None and order.status not in TERMINAL:
+                order.status = status
+            actions.append(self._track(client_id, order))
+            if o.get('ai') and order.status not in TERMINAL:
+                # 트리거로 생긴 실제 주문 - 먼저 도착해 보관된 이벤트가 있으면 이 leg로 다시 반영
+                self.triggered[str(o['ai'])] = client_id
+                for ev, ev_time in self._unlinked.pop(str(o['ai']), []):
+                    self.orders.pop(ev['c'], None)
+                    actions.append(self._apply_order(client_id, ev, ev_time))
+        for action in actions:
+            if action:
+                self._submit(*action)
+
+    def _leg(self, client_id):
+        """이미 종료돼 orders에서 빠진 브래킷 leg 상태 (없으면 None)"""
+        parsed = parse_bracket_id(client_id)
+        bracket = self.brackets.get(parsed[0]) if parsed else None
+        return bracket.legs.get(parsed[1]) if bracket else None
+
+    def _stash(self, o, event_time):
+        """algo 주문과 연결되기 전에 도착했을 수 있는 실제 주문 이벤트 보관 (오래된 것부터 버림)"""
+        self._unlinked.setdefault(str(o.get('i')), []).append((o, event_time))
+        while len(self._unlinked) > UNLINKED_LIMIT:
+            del self._unlinked[next(iter(self._unlinked))]
+
+    def _apply_order(self, client_id, o, event_time):
+        """ORDER_TRADE_UPDATE를 client_id 주문 상태에 반영 (잠금 안에서 호출)"""
+        order = self.orders.get(client_id)
+        if order is None:
+            order = self.orders[client_id] = OrderState(o['s'], client_id, o.get('i'), o.get('S'), o.get('o'))
+        order.status = o['X']
+        order.updated = o.get('T') or event_time
+        if o.get('x') == 'TRADE':
+            self.stats['fills'] += 1
+            order.filled = float(o['z'])
+            order.avg_price = float(o['ap'])
+            order.realized += float(o.get('rp') or 0)
+            if o.get('N') == QUOTE_ASSET:
+                order.commission += float(o.get('n') or 0)
+        if order.status in TERMINAL and client_id != o['c']:
+            self.triggered.pop(str(o.get('i')), None)
+        return self._track(client_id, order)
+
+    def _track(self, client_id, order):
+        """종료된 주문 정리 후 브래킷 leg면 상태 전이 (잠금 안에서 호출)"""
+        if order.status in TERMINAL:
+            self.orders.pop(client_id, None)
+        parsed = parse_bracket_id(client_id)
+        if parsed is None:
+            return None
+        bracket_id, leg = parsed
+        bracket = self.brackets.get(bracket_id)
+        if bracket is None:
+            bracket = self.brackets[bracket_id] = Bracket(bracket_id, order.symbol)
+        bracket.legs[leg] = order
+        return self._bracket_action(bracket, leg, order)
+
+    def _bracket_action(self, bracket, leg, order):
+        """브래킷 상태 전이 - 필요한 REST 작업 (함수, 인자...) 반환"""
+        if bracket.closed:
+            if all(o.status in TERMINAL for o in bracket.legs.values()):
+                del self.brackets[bracket.id]
+            return None
+        if leg in ('tp', 'sl') and order.status == 'FILLED':
+            bracket.closed = True
+            sibling = 'sl' if leg == 'tp' else 'tp'
+            return self._close_bracket, bracket, sibling
+        if leg == 'e' and order.status in ('CANCELED', 'EXPIRED') and not order.filled:
+            # 진입이 체결 없이 끝나면 보호 주문도 필요 없음
+            bracket.closed = True
+            return self._cancel_legs, bracket, ('tp', 'sl')
+        return None
+
+    def _close_bracket(self, bracket, sibling):
+        self._cancel_legs(bracket, (sibling,))
+        entry, exit_ = bracket.legs.get('e'), bracket.legs['tp' if sibling == 'sl' else 'sl']
+        legs = [o for o in (entry, exit_) if o is not None]
+        pnl = sum(o.realized for o in legs) - sum(o.commission for o in legs)
+        if entry is not None:
+            side = entry.side
+        else:
+            side = 'SELL' if exit_.side == 'BUY' else 'BUY'
+        trade = {
+            'symbol': bracket.symbol,
+            'side': side.lower(),
+            'entry': entry.avg_price if entry else None,
+            'exit': exit_.avg_price,
+            'pnl': pnl,
+            'ts': exit_.updated,
+        }
+        self.stats['closed'] += 1
+        with self._lock:
+            if all(o.status in TERMINAL for o in bracket.legs.values()):
+                self.brackets.pop(bracket.id, None)
+        if self.on_close:
+            self.on_close(trade)
+        return trade
+
+    def _cancel_legs(self, bracket, legs):
+        ids = dict(zip(('e', 'tp', 'sl'), bracket_ids(bracket.id)))
+        for leg in legs:
+            order = bracket.legs.get(leg)
+            if order is not None and order.status in TERMINAL:
+                continue
+            try:
+                if leg == 'e':
+                    self.cli.futures_cancel_order(symbol=bracket.symbol, origClientOrderId=ids[leg])
+                else:
+                    self.cli.futures_cancel_algo_order(symbol=bracket.symbol, clientAlgoId=ids[leg])
+                self.stats['sibling_cancels'] += 1
+            except Exception as e:
+                # 이미 체결/취소된 주문이면 거래소가 거부함 - 상태는 스트림으로 들어옴
+                logging.warning(f"{bracket.symbol} 브래킷 {leg} 취소 실패: {e}")
+
+    # --- REST 작업 ---
+
+    def _submit(self, fn, *args):
+        """REST 호출은 스트림 스레드를 막지 않도록 작업 스레드에서 실행"""
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.error(f"주문 추적 작업 실패 ({fn.__name__}): {e}")
+        future = self._actions.submit(run)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda f: self._discard(f))
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def drain(self, timeout=None):
+        """대기 중인 취소/기록 작업 완료까지 대기"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            wait(pending, timeout=remaining)
@@ -0,0 +1,236 @@
+"""전략 상수(그리드/랜덤) 병렬 탐색 - 백테스트를 프로세스 풀로 돌려 결과 순위표 생성
+
+사용법:
+  python param_sweep.py data/ --grid spike_factor=2,3,4 confirm_period=2,3 \\
+      [--random 500 --space buy_threshold=0.3:0.7] [--processes 8] \\
+      [--checkpoint sweep.jsonl] [--out sweep.csv] [--metric total_pnl]
+
+캔들은 한 번만 .npy 파일로 저장하고 각 워커가 mmap으로 열어 공유한다 (작업마다 피클링하지 않음).
+체크포인트(JSONL)에 이미 있는 조합은 다시 계산하지 않는다.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestConfig, collect_signals, load_klines, run_backtest, KLINE_COLUMNS
+
+# 시그널 생성에만 영향을 주는 파라미터 (나머지는 리스크/체결 재생에만 사용)
+SIGNAL_PARAMS = ('spike_factor', 'confirm_period', 'buy_threshold', 'sell_threshold',
+                 'trigger_threshold', 'sentiment')
+SIGNAL_CACHE_SIZE = 8   # 워커별로 보관할 시그널 목록 수
+DEFAULT_METRIC = 'total_pnl'
+
+_klines = None
+_signal_cache = {}
+
+
+def save_shared(klines, directory):
+    """심볼별 배열을 컬럼별 연속 .npy 파일 하나로 저장 (워커가 mmap으로 공유)"""
+    os.makedirs(directory, exist_ok=True)
+    symbols = list(klines)
+    lengths = [len(klines[s]['close']) for s in symbols]
+    for col in KLINE_COLUMNS:
+        np.save(os.path.join(directory, f'{col}.npy'),
+                np.concatenate([klines[s][col] for s in symbols]) if symbols else np.empty(0))
+    with open(os.path.join(directory, 'index.json'), 'w') as f:
+        json.dump({'symbols': symbols, 'offsets': np.cumsum([0] + lengths).tolist()}, f)
+    return directory
+
+
+def load_shared(directory):
+    """save_shared 결과를 mmap으로 열어 심볼별 배열 view dict로 반환 (복사 없음)"""
+    with open(os.path.join(directory, 'index.json')) as f:
+        index = json.load(f)
+    arrays = {col: np.load(os.path.join(directory, f'{col}.npy'), mmap_mode='r') for col in KLINE_COLUMNS}
+    offsets = index['offsets']
+    return {sym: {col: arr[offsets[i]:offsets[i + 1]] for col, arr in arrays.items()}
+            for i, sym in enumerate(index['symbols'])}
+
+
+def _init_worker(directory):
+    global _klines
+    _klines = load_shared(directory)
+    _signal_cache.clear()
+
+
+def _signals_for(cfg):
+    key = tuple(getattr(cfg, p) for p in SIGNAL_PARAMS)
+    signals = _signal_cache.get(key)
+    if signals is None:
+        if len(_signal_cache) >= SIGNAL_CACHE_SIZE:
+            _signal_cache.pop(next(iter(_signal_cache)))
+        signals = _signal_cache[key] = collect_signals(_klines, cfg)
+    return signals
+
+
+def evaluate(params):
+    """워커에서 조합 하나를 백테스트해 요약 지표 반환"""
+    cfg = BacktestConfig(**params)
+    return run_backtest(_klines, cfg, signals=_signals_for(cfg)).summary()
+
+
+def grid(space):
+    """{이름: [값, ...]} -> 모든 조합"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space, n, seed=0):
+    """{이름: (lo, hi) 또는 [값, ...]} -> 무작위 조합 n개 (정수 범위는 정수로 추출)"""
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(n):
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple):
+                lo, hi = spec
+                params[name] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) \
+                    else round(rng.uniform(lo, hi), 6)
+            else:
+                params[name] = rng.choice(spec)
+        combos.append(params)
+    return combos
+
+
+def _key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def read_checkpoint(path):
+    """체크포인트 JSONL -> {조합 키: 결과 행} (마지막 줄이 잘려 있으면 무시)"""
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[_key(row['params'])] = row
+    return done
+
+
+def _open_checkpoint(path):
+    """이어쓰기용으로 열기 - 중단으로 잘린 마지막 줄은 잘라냄"""
+    with open(path, 'a+b') as f:
+        f.seek(0)
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+    return open(path, 'a')
+
+
+def rank(rows, metric=DEFAULT_METRIC):
+    """결과 행 -> 지표 기준 내림차순 순위표"""
+    table = pd.DataFrame([{**row['params'], **row['result']} for row in rows])
+    if table.empty:
+        return table
+    table = table.sort_values(metric, ascending=False, kind='stable').reset_index(drop=True)
+    table.index += 1
+    table.index.name = 'rank'
+    return table
+
+
+def run_sweep(klines, combos, processes=None, checkpoint=None, metric=DEFAULT_METRIC,
+              data_dir=None, progress_every=50):
+    """조합 목록을 프로세스 풀로 평가해 순위표 반환
+
+    klines는 심볼별 배열 dict 또는 save_shared로 만든 디렉터리 경로.
+    """
+    done = read_checkpoint(checkpoint)
+    todo, seen = [], set(done)
+    for params in combos:
+        key = _key(params)
+        if key not in seen:
+            seen.add(key)
+            todo.append(params)
+    print(f"🔍 Sweep: {len(combos)} combinations, {len(combos) - len(todo)} already in checkpoint")
+
+    rows = [done[k] for k in dict.fromkeys(_key(p) for p in combos) if k in done]
+    if todo:
+        tmp = None
+        if isinstance(klines, str):
+            data_dir = klines
+        elif data_dir is None:
+            tmp = tempfile.TemporaryDirectory(prefix='sweep-')
+            data_dir = tmp.name
+        if not isinstance(klines, str):
+            save_shared(klines, data_dir)
+
+        start = time.monotonic()
+        out = _open_checkpoint(checkpoint) if checkpoint else None
+        try:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(data_dir,)) as pool:
+                futures = {pool.submit(evaluate, p): p for p in todo}
+                for n, future in enumerate(as_completed(futures), 1):
+                    row = {'params': futures[future], 'result': future.result()}
+                    rows.append(row)
+                    if out:
+                        out.write(json.dumps(row) + '\n')
+                        out.flush()
+                    if progress_every and n % progress_every == 0:
+                        rate = n / (time.monotonic() - start)
+                        print(f"⏳ {n}/{len(todo)} ({rate:.1f}/s, ETA {(len(todo) - n) / rate:.0f}s)")
+        finally:
+            if out:
+                out.close()
+            if tmp:
+                tmp.cleanup()
+    return rank(rows, metric)
+
+
+def _parse_values(text):
+    values = []
+    for v in text.split(','):
+        try:
+            values.append(int(v))
+        except ValueError:
+            values.append(None if v == 'none' else float(v))
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='캔들 CSV/Parquet 파일/디렉터리 또는 save_shared 디렉터리')
+    parser.add_argument('--symbols', default=None)
+    parser.add_argument('--grid', nargs='*', default=[], help='이름=값1,값2,...')
+    parser.add_argument('--random', type=int, default=0, help='무작위 조합 수')
+    parser.add_argument('--space', nargs='*', default=[], help='이름=lo:hi (랜덤 탐색 범위)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--metric', default=DEFAULT_METRIC)
+    parser.add_argument('--out', default='sweep.csv')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    combos = grid({k: _parse_values(v) for k, v in (g.split('=', 1) for g in args.grid)}) if args.grid else []
+    if args.random:
+        space = {}
+        for item in args.space:
+            name, spec = item.split('=', 1)
+            space[name] = tuple(_parse_values(spec.replace(':', ','))) if ':' in spec else _parse_values(spec)
+        combos += random_search(space, args.random, args.seed)
+    if not combos:
+        parser.error('--grid 또는 --random/--space로 조합을 지정하세요')
+
+    if os.path.exists(os.path.join(args.path, 'index.json')):
+        klines = args.path
+    else:
+        klines = load_klines(args.path, args.symbols.split(',') if args.symbols else None)
+    table = run_sweep(klines, combos, args.processes, args.checkpoint, args.metric)
+    table.to_csv(args.out)
+    print(table.head(args.top).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+ROLLING_WINDOW = 86400    # 롤링 집계 구간 (초)
+SNAPSHOT_EVERY = 20       # 이 개수의 거래마다 스냅샷 저장
+
+
+class PnlStats:
+    """거래 수, PnL, 승률, 연속 손실, 최대 낙폭을 거래마다 O(1)로 갱신"""
+    __slots__ = ('trades', 'wins', 'pnl', 'peak', 'max_drawdown', 'loss_streak')
+
+    def __init__(self, trades=0, wins=0, pnl=0.0, peak=0.0, max_drawdown=0.0, loss_streak=0):
+        self.trades = trades
+        self.wins = wins
+        self.pnl = pnl
+        self.peak = peak
+        self.max_drawdown = max_drawdown
+        self.loss_streak = loss_streak
+
+    def add(self, pnl):
+        self.trades += 1
+        self.pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+        self.loss_streak = self.loss_streak + 1 if pnl < 0 else 0
+        self.peak = max(self.peak, self.pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.pnl)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.trades if self.trades else 0.0
+
+    def as_dict(self):
+        out = {k: getattr(self, k) for k in self.__slots__}
+        out['win_rate'] = self.win_rate
+        return out
+
+    def state(self):
+        return [getattr(self, k) for k in self.__slots__]
+
+
+class PnlAggregates:
+    """
+    일별/심볼별/전체/롤링 구간 PnL 집계.
+    log_trade마다 add()로 갱신하고, 주기적으로 JSON 스냅샷을 저장해 재시작 시 바로 복원합니다.
+    """
+
+    def __init__(self, snapshot_path=None, window=ROLLING_WINDOW, snapshot_every=SNAPSHOT_EVERY,
+                 clock=time.time):
+        self.snapshot_path = snapshot_path
+        self.window = window
+        self.snapshot_every = snapshot_every
+        self.clock = clock
+        self.total = PnlStats()
+        self.days = {}
+        self.symbols = {}
+        self.last_ts = None
+        self._rolling = deque()   # (ts_ms, pnl)
+        self._rolling_pnl = 0.0
+        self._rolling_wins = 0
+        self._unsaved = 0
+        self._day_span = (0, 0, None)  # 마지막으로 계산한 날짜의 [시작, 끝) ms 구간
+        self._lock = threading.Lock()
+
+    def day_of(self, ts):
+        """epoch ms -> 로컬 날짜 문자열 (같은 날이면 문자열 포맷 없이 재사용)"""
+        lo, hi, day = self._day_span
+        if lo <= ts < hi:
+            return day
+        d = datetime.fromtimestamp(ts / 1000)
+        start = datetime(d.year, d.month, d.day)
+        day = d.strftime('%Y-%m-%d')
+        self._day_span = (start.timestamp() * 1000, (start + timedelta(days=1)).timestamp() * 1000, day)
+        return day
+
+    def limits(self, day):
+        """리스크 검사용 (거래 수, 연속 손실) - dict를 만들지 않는 빠른 조회"""
+        stats = self.days.get(day)
+        return (stats.trades, stats.loss_streak) if stats else (0, 0)
+
+    def add(self, trade):
+        """거래 하나 반영 (trade: symbol, pnl, ts(ms) - ts가 없으면 현재 시각)"""
+        ts = trade.get('ts')
+        ts = int(self.clock() * 1000 if ts is None else ts)
+        pnl = float(trade['pnl'])
+        with self._lock:
+            self.total.add(pnl)
+            self.days.setdefault(self.day_of(ts), PnlStats()).add(pnl)
+            self.symbols.setdefault(trade['symbol'], PnlStats()).add(pnl)
+            self._rolling.append((ts, pnl))
+            self._rolling_pnl += pnl
+            self._rolling_wins += pnl > 0
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+            self._unsaved += 1
+            save = self.snapshot_path and self._unsaved >= self.snapshot_every
+        if save:
+            self.save()
+
+    def _expire(self, now_ms):
+        cutoff = now_ms - self.window * 1000
+        while self._rolling and self._rolling[0][0] < cutoff:
+            _, pnl = self._rolling.popleft()
+            self._rolling_pnl -= pnl
+            self._rolling_wins -= pnl > 0
+
+    def day(self, day=None):
+        day = day or self.day_of(self.clock() * 1000)
+        with self._lock:
+            return self.days.get(day, PnlStats()).as_dict()
+
+    def symbol(self, symbol):
+        with self._lock:
+            return self.symbols.get(symbol, PnlStats()).as_dict()
+
+    def rolling(self, now=None):
+        """최근 window초 집계 (최대 낙폭은 구간 안의 거래로 계산)"""
+        now_ms = int((self.clock() if now is None else now) * 1000)
+        with self._lock:
+            self._expire(now_ms)
+            trades = len(self._rolling)
+            equity = peak = max_dd = 0.0
+            for _, pnl in self._rolling:
+                equity += pnl
+                peak = max(peak, equity)
+                max_dd = max(max_dd, peak - equity)
+            return {'trades': trades, 'wins': self._rolling_wins, 'pnl': self._rolling_pnl,
+                    'win_rate': self._rolling_wins / trades if trades else 0.0, 'max_drawdown': max_dd}
+
+    def save(self, path=None):
+        """스냅샷을 임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 스냅샷 유지)"""
+        path = path or self.snapshot_path
+        with self._lock:
+            self._expire(int(self.clock() * 1000))
+            state = {
+                'version': 1,
+                'last_ts': self.last_ts,
+                'total': self.total.state(),
+                'days': {k: v.state() for k, v in self.days.items()},
+                'symbols': {k: v.state() for k, v in self.symbols.items()},
+                'rolling': list(self._rolling),
+            }
+            self._unsaved = 0
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def load(self, path=None):
+        """스냅샷 복원 (없으면 False)"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        with open(path) as f:
+            state = json.load(f)
+        with self._lock:
+            self.last_ts = state['last_ts']
+            self.total = PnlStats(*state['total'])
+            self.days = {k: PnlStats(*v) for k, v in state['days'].items()}
+            self.symbols = {k: PnlStats(*v) for k, v in state['symbols'].items()}
+            self._rolling = deque(tuple(r) for r in state['rolling'])
+            self._rolling_pnl = sum(p for _, p in self._rolling)
+            self._rolling_wins = sum(p > 0 for _, p in self._rolling)
+            self._unsaved = 0
+        return True
+
+    def restore(self, store=None):
+        """스냅샷을 읽고, 스냅샷 이후 저장소에 기록된 거래만 다시 반영"""
+        loaded = self.load()
+        if store is not None:
+            start = self.last_ts + 1 if loaded and self.last_ts is not None else None
+            replayed = store.trades(start=start)
+            # 재반영 중에는 N건마다 스냅샷을 쓰지 않고 끝난 뒤 한 번만 저장
+            path, self.snapshot_path = self.snapshot_path, None
+            try:
+                for t in replayed:
+                    self.add(t)
+            finally:
+                self.snapshot_path = path
+            if replayed:
+                logging.info(f"PnL 집계: 스냅샷 이후 거래 {len(replayed)}건 반영")
+                if path:
+                    self.save()
+        return self
@@ -1,7 +1,19 @@
+import heapq
+import json
+import logging
+import os
+import threading
 import time
 
 class RiskManager:
-    def __init__(self, max_daily=5, max_streak=3, cooldown_m=30, risk=0.02):
+    """
+    일일 거래 수, 연속 손실, 심볼별 쿨다운 관리.
+    여러 트레이드 워커가 하나의 인스턴스를 공유하며 (스레드 안전),
+    snapshot_path가 있으면 거래 등록 때마다 상태를 저장해 재시작 후에도 한도가 유지됩니다.
+    """
+
+    def __init__(self, max_daily=5, max_streak=3, cooldown_m=30, risk=0.02, clock=None, aggregates=None,
+                 snapshot_path=None):
         self.max_daily = max_daily
         self.max_streak = max_streak
         self.cooldown = cooldown_m*60
@@ -9,26 +21,132 @@ class RiskManager:
         self.trades = 0
         self.streak = 0
         self.last = {}
-        self.start = time.time()
+        self.clock = clock  # 백테스트에서는 캔들 시각을 돌려주는 함수
+        self.aggregates = aggregates  # PnlAggregates - 있으면 연속 손실을 청산 기록에서 읽음 (재시작에도 유지)
+        self.day = None  # aggregates 사용 시 trades(그날 연 거래 수)가 속한 날짜
+        self.snapshot_path = snapshot_path
+        self.start = self._now()
+        self._expiry = []  # (쿨다운 만료 시각, 심볼) 최소 힙
+        self._lock = threading.RLock()
+        if snapshot_path:
+            self.load()
+
+    def _now(self):
+        return self.clock() if self.clock else time.time()
+
+    def _expire(self, now):
+        """만료된 쿨다운 제거 - 힙 맨 앞만 확인하므로 만료가 없으면 O(1)"""
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            expiry, sym = heapq.heappop(heap)
+            last = self.last.get(sym)
+            if last is not None and last + self.cooldown <= expiry:
+                del self.last[sym]
 
     def can_trade(self, sym):
-        now = time.time()
-        if now - self.start > 86400:
-            self.trades=0; self.streak=0; self.start=now
-        if self.trades>=self.max_daily or self.streak>=self.max_streak: return False
-        if sym in self.last and now<self.last[sym]+self.cooldown: return False
-        return True
+        with self._lock:
+            now = self.clock() if self.clock else time.time()
+            if self._expiry and self._expiry[0][0] <= now:
+                self._expire(now)
+            if self.aggregates is not None:
+                # 일일 거래 수는 연 거래 기준 (청산 전 포지션도 포함), 연속 손실은 청산 기록 기준
+                day = self.aggregates.day_of(now * 1000)
+                if day != self.day:
+                    self.day, self.trades = day, 0
+                self.streak = self.aggregates.limits(day)[1]
+            elif now - self.start > 86400:
+                self.trades=0; self.streak=0; self.start=now
+            if self.trades>=self.max_daily or self.streak>=self.max_streak: return False
+            last = self.last.get(sym)
+            if last is not None and now<last+self.cooldown: return False
+            return True
+
+    def try_acquire(self, sym):
+        """can_trade 확인과 거래 예약을 한 번의 잠금 안에서 처리 - 통과하면 일일 거래 수와 심볼 쿨다운을 선점
+
+        여러 워커가 남은 한 자리를 동시에 통과해 max_daily를 넘기지 않도록, 주문 전에 호출하고
+        주문이 나가지 않으면 release()로 되돌립니다.
+        """
+        with self._lock:
+            if not self.can_trade(sym):
+                return False
+            now = self._now()
+            self.trades += 1
+            self.last[sym] = now
+            heapq.heappush(self._expiry, (now + self.cooldown, sym))
+            if self.snapshot_path:
+                self.save()
+            return True
+
+    def release(self, sym):
+        """try_acquire로 예약했지만 주문이 나가지 않은 거래 취소 (거래 수와 쿨다운 되돌림)"""
+        with self._lock:
+            self.trades = max(0, self.trades - 1)
+            self.last.pop(sym, None)
+            if self.snapshot_path:
+                self.save()
+
+    def record_result(self, pnl):
+        """try_acquire로 연 거래의 청산 손익으로 연속 손실만 갱신 (거래 수와 쿨다운은 예약 때 반영됨)"""
+        with self._lock:
+            if pnl<0: self.streak+=1
+            else: self.streak=0
+            if self.snapshot_path:
+                self.save()
 
     def register(self, pnl, sym):
-        if pnl<0: self.streak+=1
-        else: self.streak=0
-        self.trades+=1
-        self.last[sym]=time.time()
+        with self._lock:
+            now = self._now()
+            # aggregates를 쓰면 연속 손실은 log_trade에서 집계되고 거래 수는 try_acquire에서 셈
+            if self.aggregates is None:
+                if pnl<0: self.streak+=1
+                else: self.streak=0
+                self.trades+=1
+            self.last[sym]=now
+            heapq.heappush(self._expiry, (now + self.cooldown, sym))
+            if self.snapshot_path:
+                self.save()
 
-    def size_leverage(self, bal, entry, stop):
+    def size_leverage(self, bal, entry, stop, meta=None):
         risk_amt=bal*self.risk
         diff=abs(entry-stop)
         qty=risk_amt/diff
         pct=diff/entry*100
         lev=10 if pct<=1 else (5 if pct<=2 else 2)
+        if meta is not None:
+            qty=meta.qty(qty)  # stepSize 배수로 내림 (위험 금액을 넘지 않도록)
         return qty, lev
+
+    def save(self, path=None):
+        """상태를 임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 스냅샷 유지)"""
+        path = path or self.snapshot_path
+        with self._lock:
+            self._expire(self._now())
+            state = {'trades': self.trades, 'streak': self.streak, 'start': self.start, 'day': self.day,
+                     'last': self.last}
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+
+    def load(self, path=None):
+        """스냅샷 복원 - 만료된 쿨다운은 버림 (없거나 깨졌으면 False)"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"리스크 상태 스냅샷을 읽지 못했습니다: {e}")
+            return False
+        with self._lock:
+            self.trades = state['trades']
+            self.streak = state['streak']
+            self.start = state['start']
+            self.day = state.get('day')
+            self.last = dict(state['last'])
+            self._expiry = [(t + self.cooldown, s) for s, t in self.last.items()]
+            heapq.heapify(self._expiry)
+            self._expire(self._now())
+        return True
@@ -1,9 +1,82 @@
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import re
+import threading
 import numpy as np
 
 _analyzer = SentimentIntensityAnalyzer()
 
+CACHE_SIZE = 50_000        # 보관할 compound 점수 개수 (LRU)
+PROCESS_BATCH_MIN = 2_000  # 새로 채점할 트윗이 이 이상이면 프로세스 풀 사용
+
+_RT_PREFIX = re.compile(r"^(RT @\w+:\s*)+")
+_URL = re.compile(r"https?://\S+")
+_SPACES = re.compile(r"\s+")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+
+def normalize(text):
+    """리트윗 접두어, URL, 공백 차이를 없애 같은 내용이 같은 키가 되도록 정리"""
+    text = _RT_PREFIX.sub('', text)
+    text = _URL.sub('', text)
+    return _SPACES.sub(' ', text).strip()
+
+def _key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+def _score_texts(texts):
+    return [_analyzer.polarity_scores(t)['compound'] for t in texts]
+
+def _get_pool(processes):
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=processes)
+    return _pool
+
+def compound_scores(texts, processes=None):
+    """텍스트별 VADER compound 점수 - 정규화 텍스트 해시 기준 LRU 캐시 사용"""
+    normalized = [normalize(t) for t in texts]
+    keys = [_key(t) for t in normalized]
+    scores = {}
+    missing = {}
+    with _cache_lock:
+        for k, t in zip(keys, normalized):
+            if k in scores or k in missing:
+                continue
+            if k in _cache:
+                _cache.move_to_end(k)
+                scores[k] = _cache[k]
+            else:
+                missing[k] = t
+
+    if missing:
+        new_texts = list(missing.values())
+        if len(new_texts) >= PROCESS_BATCH_MIN:
+            processes = processes or os.cpu_count() or 1
+            size = -(-len(new_texts) // processes)
+            chunks = [new_texts[i:i + size] for i in range(0, len(new_texts), size)]
+            new_scores = [s for part in _get_pool(processes).map(_score_texts, chunks) for s in part]
+        else:
+            new_scores = _score_texts(new_texts)
+        with _cache_lock:
+            for k, s in zip(missing, new_scores):
+                scores[k] = s
+                _cache[k] = s
+                _cache.move_to_end(k)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return [scores[k] for k in keys]
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
 def sentiment_score(texts):
     if not texts: return 0.0
-    scores = [_analyzer.polarity_scores(t)['compound'] for t in texts]
-    return float(np.mean(scores))
+    return float(np.mean(compound_scores(texts)))
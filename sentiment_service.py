@@ -0,0 +1,177 @@
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+
+from http_client import session_for
+from sentiment_analysis import sentiment_score
+
+SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+CACHE_TTL = 900          # 자산별 트윗/점수 캐시 유지 시간 (초)
+MAX_QUERY_LENGTH = 512   # search/recent 쿼리 최대 길이
+MAX_RESULTS = 100        # 요청당 최대 트윗 수
+RATE_LIMIT = 180         # 15분당 요청 수
+RATE_WINDOW = 900
+RESERVE = 5              # 이 이하로 예산이 남으면 캐시만 사용
+
+_HASHTAG = re.compile(r"#(\w+)")
+
+
+class TokenBucket:
+    """요청 예산 - 용량 capacity, window초마다 가득 충전되는 속도로 토큰 보충"""
+
+    def __init__(self, capacity=RATE_LIMIT, window=RATE_WINDOW, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.clock = clock
+        self.tokens = float(capacity)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+    def try_acquire(self, reserve=0):
+        """reserve개를 남기고 토큰 1개를 쓸 수 있으면 차감 후 True"""
+        with self._lock:
+            self._refill()
+            if self.tokens - 1 < reserve:
+                return False
+            self.tokens -= 1
+            return True
+
+    def sync(self, remaining):
+        """서버가 알려준 남은 호출 수(x-rate-limit-remaining)로 보정"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class SentimentService:
+    """자산별 트윗/VADER 점수 공유 캐시 - OR 결합 배치 쿼리와 요청 예산 관리"""
+
+    def __init__(self, bearer_token=None, url=SEARCH_URL, ttl=CACHE_TTL, bucket=None,
+                 session=None, reserve=RESERVE, clock=time.monotonic):
+        self.bearer_token = bearer_token
+        self.url = url
+        self.ttl = ttl
+        self.bucket = bucket or TokenBucket(clock=clock)
+        self.session = session or session_for(url)
+        self.reserve = reserve
+        self.clock = clock
+        self.stats = {'hits': 0, 'misses': 0, 'requests': 0, 'budget_skips': 0}
+        self._cache = {}  # asset -> (fetched_at, tweets, score)
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    def get(self, assets):
+        """자산 목록 -> {asset: (tweets, score)} - 만료된 자산만 배치 조회"""
+        assets = [a.upper() for a in dict.fromkeys(assets)]
+        now = self.clock()
+        with self._lock:
+            stale = [a for a in assets if a not in self._cache or now - self._cache[a][0] >= self.ttl]
+            self.stats['hits'] += len(assets) - len(stale)
+            self.stats['misses'] += len(stale)
+        if stale:
+            with self._fetch_lock:
+                self._refresh(stale)
+        with self._lock:
+            return {a: self._cache.get(a, (None, [], 0.0))[1:] for a in assets}
+
+    def tweets(self, asset):
+        return self.get([asset])[asset.upper()][0]
+
+    def score(self, asset):
+        return self.get([asset])[asset.upper()][1]
+
+    def build_queries(self, assets):
+        """'(#A OR #B ...) lang:en' 쿼리를 최대 길이에 맞춰 분할"""
+        suffix = " lang:en"
+        queries, chunk = [], []
+        for asset in assets:
+            candidate = chunk + [asset]
+            query = "(" + " OR ".join(f"#{a}" for a in candidate) + ")" + suffix
+            if chunk and len(query) > MAX_QUERY_LENGTH:
+                queries.append((chunk, "(" + " OR ".join(f"#{a}" for a in chunk) + ")" + suffix))
+                chunk = [asset]
+            else:
+                chunk = candidate
+        if chunk:
+            queries.append((chunk, "(" + " OR ".join(f"#{a}" for a in chunk) + ")" + suffix))
+        return queries
+
+    @staticmethod
+    def split(tweets, assets):
+        """배치 결과를 해시태그 기준으로 자산별로 다시 나눔"""
+        wanted = set(assets)
+        out = {a: [] for a in assets}
+        for tweet in tweets:
+            tags = {t.upper() for t in _HASHTAG.findall(tweet.get('text', ''))}
+            for h in tweet.get('entities', {}).get('hashtags', []):
+                tags.add(h.get('tag', '').upper())
+            for asset in tags & wanted:
+                out[asset].append(tweet)
+        return out
+
+    def _refresh(self, assets):
+        now = self.clock()
+        token = self.bearer_token or os.getenv("TWITTER_BEARER_TOKEN")
+        if not token:
+            # 토큰이 없으면 ttl 동안 같은 자산을 다시 조회하지 않도록 기존 값(없으면 빈 결과)을 캐시
+            logging.error(f"Twitter API token not found in environment variables - "
+                          f"skipping sentiment for {len(assets)} assets for {self.ttl}s")
+            with self._lock:
+                for asset in assets:
+                    self._cache[asset] = (now,) + self._cache.get(asset, (None, [], 0.0))[1:]
+            return
+        for chunk, query in self.build_queries(assets):
+            if not self.bucket.try_acquire(self.reserve):
+                # 예산이 부족하면 (오래된) 캐시를 그대로 사용
+                self.stats['budget_skips'] += 1
+                logging.warning(f"Twitter 요청 예산 부족 - 캐시 사용: {', '.join(chunk)}")
+                continue
+            tweets = self._search(query, token)
+            if tweets is None:
+                continue
+            per_asset = self.split(tweets, chunk)
+            with self._lock:
+                for asset, items in per_asset.items():
+                    texts = [t['text'] for t in items]
+                    self._cache[asset] = (now, items, sentiment_score(texts))
+
+    def _search(self, query, token):
+        self.stats['requests'] += 1
+        try:
+            response = self.session.get(
+                self.url,
+                headers={"Authorization": f"Bearer {token}"},
+                params={"query": query, "max_results": MAX_RESULTS, "tweet.fields": "entities"}
+            )
+        except requests.RequestException as e:
+            logging.error(f"Twitter API error: {e}")
+            return None
+        remaining = response.headers.get('x-rate-limit-remaining')
+        if remaining is not None:
+            self.bucket.sync(int(remaining))
+        if response.status_code == 429:
+            self.bucket.sync(0)
+            logging.warning("Twitter API rate limit exceeded - serving cached sentiment")
+            return None
+        if response.status_code != 200:
+            logging.error(f"Twitter API error: {response.status_code} {response.text[:200]}")
+            return None
+        return response.json().get('data', [])
+
+
+# 프로세스 전체에서 공유하는 서비스
+sentiment_service = SentimentService()
@@ -1,47 +1,124 @@
-from data_fetcher import get_klines, get_tweets
-from technical_analysis import apply_indicators
-from sentiment_analysis import sentiment_score
+from data_fetcher import get_kline_arrays
+from technical_analysis import batch_indicators, required_candles
+from sentiment_service import sentiment_service
 from notifier import notify_slack
-import requests
-import time
-import os
-from datetime import datetime
+from tracing import tracer
 from dotenv import load_dotenv
+import logging
+import threading
+import numpy as np
 
 # Load environment variables
 load_dotenv()
 
 SPIKE_FACTOR = 3.0
+SPIKE_WINDOW = 5  # 거래량 스파이크 비교 구간 (직전 캔들 수)
 CONFIRM_PERIOD = 3
 BUY_THRESHOLD = 0.5
 SELL_THRESHOLD = -0.5
 MAX_HISTORY_LENGTH = 50  # 각 심볼당 최대 기록 개수
+SCREEN_INTERVAL = 60     # 감시 대상 전체 스크리닝 주기 (초) - 심볼당 캔들 갱신 요청 1회 (가중치 1)
+
+# 스코어 계산에 필요한 캔들 수 (지표 워밍업 + 스파이크 비교 구간)
+KLINE_LOOKBACK = max(required_candles(), SPIKE_WINDOW + 1)
+INDICATOR_COLUMNS = ['rsi', 'bb_lower', 'bb_upper', 'macd', 'macd_sig']
 
 _history = {}
+_history_lock = threading.Lock()  # 스크리너 스레드와 트레이드 워커가 함께 기록
 
 def detect_spike(df):
-    return df['volume'].iloc[-1] > SPIKE_FACTOR * df['volume'][:-1].mean()
+    return bool(detect_spikes(df['volume'].to_numpy()[np.newaxis, :])[0])
+
+def detect_spikes(volumes, factor=None):
+    """심볼 × 캔들 거래량 배열에서 마지막 캔들의 스파이크 여부"""
+    factor = SPIKE_FACTOR if factor is None else factor
+    volumes = np.asarray(volumes, dtype=np.float64)
+    return volumes[:, -1] > factor * volumes[:, -SPIKE_WINDOW-1:-1].mean(axis=1)
+
+def ta_scores(close, rsi, bb_lower, bb_upper, macd, macd_sig):
+    """RSI/볼린저/MACD 조건 점수를 [-1/3, 1] 범위로 정규화 (스칼라/배열 공통)"""
+    close, rsi, bb_lower, bb_upper, macd, macd_sig = (
+        np.asarray(v, dtype=np.float64) for v in (close, rsi, bb_lower, bb_upper, macd, macd_sig))
+    score = ((rsi < 30) & (close < bb_lower)).astype(np.float64)
+    score -= (rsi > 70) & (close > bb_upper)
+    score += np.where(macd > macd_sig, 1.0, -1.0)
+    return (score + 1) / 3  # Normalize to [0,1] range
+
+def sentiment_signal(sent):
+    """감성 점수 -> -1/0/1 신호"""
+    sent = np.asarray(sent, dtype=np.float64)
+    return np.where(sent > 0.2, 1.0, np.where(sent < -0.2, -1.0, 0.0))
+
+def combine_scores(detail, sentiment=None):
+    """score_batch detail + 감성 점수 -> 최종 점수 (스파이크가 없거나 지표 워밍업 전이면 0)"""
+    sent_sig = 0.0 if sentiment is None else sentiment_signal(sentiment)
+    return np.where(detail['spike'] & detail['ready'], 0.5 * detail['ta_score'] + 0.5 * sent_sig, 0.0)
+
+def score_batch(closes, volumes, sentiment=None, spike_factor=None):
+    """심볼 × 캔들 2차원 종가/거래량 배열로 전체 유니버스 점수를 한 번에 계산
+
+    반환: (final_score, detail) - detail에는 spike, ready, ta_score 배열이 들어 있다.
+    sentiment가 없으면 감성 신호는 0으로 본다.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    ind = batch_indicators(closes)
+    last = {k: v[:, -1] for k, v in ind.items()}
+    ready = ~np.isnan(np.stack([last[c] for c in INDICATOR_COLUMNS])).any(axis=0)
+    spike = detect_spikes(volumes, spike_factor)
+    ta_score = ta_scores(closes[:, -1], last['rsi'], last['bb_lower'], last['bb_upper'],
+                         last['macd'], last['macd_sig'])
+    detail = {'spike': spike, 'ready': ready, 'ta_score': ta_score}
+    return combine_scores(detail, sentiment), detail
+
+def screen(symbols, with_sentiment=True):
+    """전체 심볼을 한 번에 스코어링 - 스파이크가 난 심볼만 감성 분석"""
+    rows = []
+    for sym in symbols:
+        try:
+            v = get_kline_arrays(sym, limit=KLINE_LOOKBACK)
+        except Exception as e:
+            print(f"⚠️ Skipping {sym} in screen: {e}")
+            continue
+        if len(v['close']) == KLINE_LOOKBACK:
+            rows.append((sym, v['close'], v['volume']))
+    if not rows:
+        return {}
+    names = [r[0] for r in rows]
+    closes = np.stack([r[1] for r in rows])
+    volumes = np.stack([r[2] for r in rows])
+    scores, detail = score_batch(closes, volumes)
+    if with_sentiment:
+        candidates = np.flatnonzero(detail['spike'] & detail['ready'])
+        if len(candidates):
+            # 후보 자산을 OR 결합 배치 쿼리 한 번으로 조회
+            results = sentiment_service.get([names[i][:-4] for i in candidates])
+            sent = np.zeros(len(names))
+            for i in candidates:
+                sent[i] = results[names[i][:-4].upper()][1]
+            scores = combine_scores(detail, sent)
+    return dict(zip(names, scores.tolist()))
 
 def compute_score(symbol):
     try:
-        df = apply_indicators(get_klines(symbol))
-        if not detect_spike(df): return 0.0
-        latest = df.iloc[-1]
-        # simple TA score
-        ta_score = 0
-        if latest['rsi'] < 30 and latest['close'] < latest['bb_lower']: ta_score += 1
-        if latest['rsi'] > 70 and latest['close'] > latest['bb_upper']: ta_score -= 1
-        ta_score += 1 if latest['macd'] > latest['macd_sig'] else -1
-        ta_score = (ta_score + 1) / 3  # Normalize to [0,1] range
+        with tracer.span('data_fetch'):
+            v = get_kline_arrays(symbol, limit=KLINE_LOOKBACK)
+        with tracer.span('indicators'):
+            # 심볼 하나를 1 × N 배열로 score_batch에 넣음 (screen/백테스트와 같은 경로)
+            closes, volumes = v['close'][np.newaxis, :], v['volume'][np.newaxis, :]
+            _, detail = score_batch(closes, volumes)
+            # 스파이크가 없거나 워밍업이 덜 된 지표(NaN)로는 점수를 내지 않음
+            if not (detail['spike'][0] and detail['ready'][0]): return 0.0
         
         # sentiment
-        text_list = get_tweets(symbol[:-4])
-        sent = sentiment_score(text_list)
-        sent_sig = 1 if sent>0.2 else (-1 if sent<-0.2 else 0)
+        with tracer.span('sentiment'):
+            # 감성 서비스가 자산별로 캐시한 점수를 그대로 사용 (여기서 VADER를 다시 돌리지 않음)
+            tweets, sent = get_sentiment(symbol[:-4])
+            text_list = [t['text'] if isinstance(t, dict) else t for t in tweets]
+            sent_sig = int(sentiment_signal(sent))
         
         # 트윗 감성 분석 결과를 Slack으로 전송
         if text_list:
-            tweet_links = [f"https://twitter.com/user/status/{tweet['id']}" for tweet in text_list]
+            tweet_links = [f"https://twitter.com/user/status/{t['id']}" for t in tweets if isinstance(t, dict) and 'id' in t]
             sentiment_message = (
                 f"📊 *{symbol} Sentiment Analysis*\n"
                 f"• Score: {sent:.2f}\n"
@@ -54,76 +131,96 @@ def compute_score(symbol):
                 sentiment_message += f"  - {link}\n"
             notify_slack(sentiment_message)
         
-        final_score = 0.5*ta_score + 0.5*sent_sig
-        return final_score
+        return float(combine_scores(detail, sent)[0])
     except Exception as e:
         notify_slack(f"❌ Error in compute_score for {symbol}: {str(e)}")
         return 0.0
 
-def get_signal(symbol):
-    s = compute_score(symbol)
-    hist = _history.setdefault(symbol, [])
-    hist.append(s)
-    
-    # 히스토리 크기 제한
-    if len(hist) > MAX_HISTORY_LENGTH:
-        hist = hist[-MAX_HISTORY_LENGTH:]
-        _history[symbol] = hist
-    
-    if len(hist) < CONFIRM_PERIOD: return 'hold', 'Not enough data'
-    window = hist[-CONFIRM_PERIOD:]
+def record_score(symbol, s):
+    """점수를 심볼 기록에 추가하고 최근 CONFIRM_PERIOD개로 (신호, 사유) 판단"""
+    with _history_lock:
+        hist = _history.setdefault(symbol, [])
+        hist.append(s)
+
+        # 히스토리 크기 제한
+        if len(hist) > MAX_HISTORY_LENGTH:
+            hist = hist[-MAX_HISTORY_LENGTH:]
+            _history[symbol] = hist
+
+        if len(hist) < CONFIRM_PERIOD: return 'hold', 'Not enough data'
+        window = hist[-CONFIRM_PERIOD:]
     if all(v>=BUY_THRESHOLD for v in window): 
         return 'buy', f'Score above buy threshold for {CONFIRM_PERIOD} periods'
     if all(v<=SELL_THRESHOLD for v in window):
         return 'sell', f'Score below sell threshold for {CONFIRM_PERIOD} periods'
     return 'hold', f'Score between thresholds for {CONFIRM_PERIOD} periods'
 
+def get_signal(symbol):
+    return record_score(symbol, compute_score(symbol))
+
 def cleanup_history():
     """사용되지 않는 심볼의 기록 정리"""
     global _history
     # 가장 오래된 사용 기록이 있는 심볼부터 제거 (간단한 메모리 관리)
-    if len(_history) > 100:  # 100개 이상 심볼이 기록되면
-        # 심볼 목록 중 절반만 유지
-        symbols = list(_history.keys())
-        to_remove = symbols[:len(symbols)//2]
-        for sym in to_remove:
-            del _history[sym]
-
-def get_tweets(symbol):
-    """트위터에서 관련 트윗 가져오기"""
+    with _history_lock:
+        if len(_history) > 100:  # 100개 이상 심볼이 기록되면
+            # 심볼 목록 중 절반만 유지
+            symbols = list(_history.keys())
+            to_remove = symbols[:len(symbols)//2]
+            for sym in to_remove:
+                del _history[sym]
+
+class Screener:
+    """
+    interval마다 감시 대상 전체를 screen()으로 한 번에 스코어링해 심볼별 점수 기록을 이어 갑니다.
+    CONFIRM_PERIOD 주기 연속으로 임계값을 넘어 매수/매도 신호가 확정된 심볼은 on_signal(symbol, signal)로 넘깁니다.
+    """
+
+    def __init__(self, symbols, on_signal, interval=SCREEN_INTERVAL):
+        # symbols() -> 스크리닝할 심볼 목록
+        self.symbols = symbols
+        self.on_signal = on_signal
+        self.interval = interval
+        self.scores = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """한 번 스크리닝하고 신호가 확정된 심볼 목록 반환"""
+        with tracer.span('screen'):
+            scores = screen(self.symbols())
+        self.scores = scores
+        hits = []
+        for sym, s in scores.items():
+            # 점수가 0이고 기록이 없는 심볼은 기록을 만들지 않음 (대부분의 심볼)
+            if s == 0.0 and sym not in _history:
+                continue
+            sig, _ = record_score(sym, s)
+            if sig in ('buy', 'sell'):
+                hits.append(sym)
+                self.on_signal(sym, sig)
+        return hits
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"스크리닝 실패: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="screener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+def get_sentiment(symbol):
+    """자산의 (트윗 목록, 감성 점수) - 공유 감성 서비스 캐시 사용"""
     try:
-        # Get Twitter API token from environment variables
-        twitter_token = os.getenv("TWITTER_BEARER_TOKEN")
-        if not twitter_token:
-            notify_slack("❌ Twitter API token not found in environment variables")
-            return []
-            
-        # Twitter API 호출 전 상태 확인
-        response = requests.get(
-            "https://api.twitter.com/2/tweets/search/recent",
-            headers={"Authorization": f"Bearer {twitter_token}"},
-            params={"query": f"#{symbol} lang:en", "max_results": 50}  # 최대 결과 수를 50으로 제한
-        )
-        
-        # Rate limit 정보 확인
-        if 'x-rate-limit-remaining' in response.headers:
-            remaining = int(response.headers['x-rate-limit-remaining'])
-            reset_time = int(response.headers['x-rate-limit-reset'])
-            
-            # Rate limit이 임계값 이하일 때 경고
-            if remaining < 5:  # 임계값을 5로 낮춤
-                notify_slack(f"⚠️ Twitter API rate limit warning: {remaining} calls remaining")
-                return []  # Rate limit이 낮으면 빈 결과 반환
-            
-            # Rate limit 초과 시
-            if response.status_code == 429:
-                reset_time = int(response.headers['x-rate-limit-reset'])
-                wait_time = reset_time - int(time.time())
-                notify_slack(f"❌ Twitter API rate limit exceeded. Skipping tweets for {symbol}")
-                return []  # Rate limit 초과 시 빈 결과 반환
-            
-        response.raise_for_status()
-        return response.json().get('data', [])
+        return sentiment_service.get([symbol])[symbol.upper()]
     except Exception as e:
         notify_slack(f"❌ Twitter API error for {symbol}: {str(e)}")
-        return []
+        return [], 0.0
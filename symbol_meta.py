@@ -0,0 +1,137 @@
+import logging
+import math
+import threading
+import time
+from decimal import Decimal
+
+REFRESH_INTERVAL = 3600   # exchangeInfo 재조회 주기 (초)
+
+
+def _decimals(step):
+    """'0.00100000' -> 3 (스텝의 소수 자릿수)"""
+    d = Decimal(str(step)).normalize()
+    return max(0, -d.as_tuple().exponent)
+
+
+class SymbolMeta:
+    """심볼 하나의 거래소 필터 (PRICE_FILTER / LOT_SIZE / MIN_NOTIONAL) 와 반올림 함수"""
+    __slots__ = ('symbol', 'tick', 'step', 'min_price', 'max_price', 'min_qty', 'max_qty',
+                 'min_notional', 'price_decimals', 'qty_decimals')
+
+    def __init__(self, symbol, tick=0.0, step=0.0, min_price=0.0, max_price=0.0,
+                 min_qty=0.0, max_qty=0.0, min_notional=0.0):
+        self.symbol = symbol
+        self.tick = tick
+        self.step = step
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.min_notional = min_notional
+        self.price_decimals = _decimals(tick) if tick else 8
+        self.qty_decimals = _decimals(step) if step else 8
+
+    @classmethod
+    def from_exchange_info(cls, info):
+        f = {flt['filterType']: flt for flt in info.get('filters', [])}
+        price = f.get('PRICE_FILTER', {})
+        lot = f.get('LOT_SIZE', {})
+        notional = f.get('MIN_NOTIONAL', {})
+        return cls(
+            info['symbol'],
+            tick=float(price.get('tickSize', 0)),
+            step=float(lot.get('stepSize', 0)),
+            min_price=float(price.get('minPrice', 0)),
+            max_price=float(price.get('maxPrice', 0)),
+            min_qty=float(lot.get('minQty', 0)),
+            max_qty=float(lot.get('maxQty', 0)),
+            min_notional=float(notional.get('notional', notional.get('minNotional', 0))),
+        )
+
+    @staticmethod
+    def _snap(value, step, decimals, mode):
+        if not step:
+            return value
+        n = value / step
+        # 부동소수 오차로 정확한 배수가 한 스텝 밀리지 않도록 약간의 여유
+        n = math.floor(n + 1e-9) if mode == 'down' else math.ceil(n - 1e-9) if mode == 'up' else round(n)
+        return round(n * step, decimals)
+
+    def price(self, value, mode='nearest'):
+        """tickSize 배수로 맞춘 가격 (mode: nearest / down / up)"""
+        p = self._snap(value, self.tick, self.price_decimals, mode)
+        if self.max_price:
+            p = min(p, self.max_price)
+        return max(p, self.min_price)
+
+    def qty(self, value):
+        """stepSize 배수로 내림한 수량 (maxQty 이내)"""
+        q = self._snap(value, self.step, self.qty_decimals, 'down')
+        return min(q, self.max_qty) if self.max_qty else q
+
+    def is_valid(self, qty, price):
+        """최소 수량/최소 주문 금액 충족 여부"""
+        return qty > 0 and qty >= self.min_qty and qty * price >= self.min_notional
+
+
+class SymbolMetaCache:
+    """
+    futures_exchange_info 한 번으로 전체 심볼 필터를 캐시합니다.
+    start() 이후 REFRESH_INTERVAL마다 백그라운드에서 갱신하며, 주문 경로에서는 API를 호출하지 않습니다.
+    """
+
+    def __init__(self, fetch, refresh_interval=REFRESH_INTERVAL):
+        # fetch() -> exchangeInfo 응답 (dict)
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.loaded_at = None
+        self._meta = {}
+        self._trading = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """exchangeInfo를 다시 받아 캐시를 교체하고 응답을 반환"""
+        info = self.fetch()
+        meta, trading = {}, []
+        for s in info['symbols']:
+            try:
+                meta[s['symbol']] = SymbolMeta.from_exchange_info(s)
+            except (KeyError, ValueError) as e:
+                logging.warning(f"심볼 필터 파싱 실패 {s.get('symbol')}: {e}")
+            if s.get('status') == 'TRADING':
+                trading.append(s['symbol'])
+        with self._lock:
+            self._meta, self._trading = meta, trading
+            self.loaded_at = time.time()
+        return info
+
+    def _ensure(self):
+        if self.loaded_at is None:
+            self.refresh()
+
+    def get(self, symbol):
+        """심볼 필터 (없는 심볼이면 None)"""
+        self._ensure()
+        return self._meta.get(symbol)
+
+    def trading_symbols(self):
+        self._ensure()
+        return list(self._trading)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"exchangeInfo 갱신 실패 (이전 필터 유지): {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="symbol-meta", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -1,41 +1,242 @@
+import math
+from collections import deque
+
 import ta
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_WINDOW = 20
+BB_DEV = 2
+
+# 지표별 첫 유효값까지 필요한 캔들 수 (ta 기준)
+LOOKBACK = {
+    'rsi': RSI_WINDOW,                    # Wilder EMA min_periods
+    'macd': MACD_SLOW + MACD_SIGNAL - 1,  # 느린 EMA 이후 시그널 EMA
+    'bb': BB_WINDOW,
+}
+
+def required_candles(*indicators):
+    """지정한 지표(기본: 전체)를 계산하는 데 필요한 최소 캔들 수"""
+    return max(LOOKBACK[name] for name in (indicators or LOOKBACK))
 
 def apply_indicators(df):
-    # 인덱스가 필요한 경우 설정
-    if 'open_time' in df.columns:
-        df = df.set_index('open_time', drop=False)
-    
     # pandas 데이터프레임과 호환되도록 close 컬럼 확인
     price_col = 'close'
     if price_col not in df.columns:
         raise ValueError(f"DataFrame must have a '{price_col}' column")
-    
+    close = df[price_col]
+
     # RSI 계산 (ta 라이브러리 사용)
-    df['rsi'] = ta.momentum.RSIIndicator(df[price_col], window=14).rsi()
-    
+    rsi = ta.momentum.RSIIndicator(close, window=RSI_WINDOW).rsi()
+
     # MACD 계산
     macd_indicator = ta.trend.MACD(
-        df[price_col], 
-        window_slow=26, 
-        window_fast=12, 
-        window_sign=9
+        close,
+        window_slow=MACD_SLOW,
+        window_fast=MACD_FAST,
+        window_sign=MACD_SIGNAL
     )
-    df['macd'] = macd_indicator.macd()
-    df['macd_sig'] = macd_indicator.macd_signal()
-    
+
     # 볼린저 밴드 계산
     bollinger = ta.volatility.BollingerBands(
-        df[price_col], 
-        window=20, 
-        window_dev=2
+        close,
+        window=BB_WINDOW,
+        window_dev=BB_DEV
     )
-    df['bb_upper'] = bollinger.bollinger_hband()
-    df['bb_mid'] = bollinger.bollinger_mavg()
-    df['bb_lower'] = bollinger.bollinger_lband()
-    
-    # 인덱스가 설정되었으면 다시 복원
-    if 'open_time' in df.columns and df.index.name == 'open_time':
-        df = df.reset_index(drop=True)
-        
-    return df
+
+    # 원본을 수정하지 않고 지표 컬럼만 추가 (인덱스 재설정 복사 없음)
+    return df.assign(
+        rsi=rsi,
+        macd=macd_indicator.macd(),
+        macd_sig=macd_indicator.macd_signal(),
+        bb_upper=bollinger.bollinger_hband(),
+        bb_mid=bollinger.bollinger_mavg(),
+        bb_lower=bollinger.bollinger_lband(),
+    )
+
+
+def _ema_2d(x, alpha, min_periods):
+    """행(심볼)별 EMA - pandas ewm(adjust=False)과 같은 점화식, 앞쪽 NaN은 건너뜀"""
+    out = np.full(x.shape, np.nan)
+    value = np.full(x.shape[0], np.nan)
+    count = np.zeros(x.shape[0], dtype=np.int64)
+    for t in range(x.shape[1]):
+        col = x[:, t]
+        valid = ~np.isnan(col)
+        value = np.where(valid, np.where(np.isnan(value), col, value + alpha * (col - value)), value)
+        count += valid
+        out[:, t] = np.where(count >= min_periods, value, np.nan)
+    return out
+
+def batch_indicators(closes):
+    """심볼 × 캔들 2차원 종가 배열에 대해 apply_indicators와 같은 지표를 한 번에 계산"""
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[np.newaxis, :]
+
+    # RSI (첫 diff는 NaN -> ta와 동일하게 0으로 처리)
+    diff = np.diff(closes, axis=1, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    dn = np.where(diff < 0, -diff, 0.0)
+    emaup = _ema_2d(up, 1 / RSI_WINDOW, RSI_WINDOW)
+    emadn = _ema_2d(dn, 1 / RSI_WINDOW, RSI_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(emadn == 0, 100.0, 100.0 - 100.0 / (1.0 + emaup / emadn))
+    rsi[np.isnan(emadn)] = np.nan
+
+    # MACD
+    macd = (_ema_2d(closes, 2 / (MACD_FAST + 1), MACD_FAST)
+            - _ema_2d(closes, 2 / (MACD_SLOW + 1), MACD_SLOW))
+    macd_sig = _ema_2d(macd, 2 / (MACD_SIGNAL + 1), MACD_SIGNAL)
+
+    # 볼린저 밴드
+    bb_mid = np.full(closes.shape, np.nan)
+    bb_std = np.full(closes.shape, np.nan)
+    if closes.shape[1] >= BB_WINDOW:
+        windows = sliding_window_view(closes, BB_WINDOW, axis=1)
+        bb_mid[:, BB_WINDOW - 1:] = windows.mean(axis=-1)
+        bb_std[:, BB_WINDOW - 1:] = windows.std(axis=-1)
+
+    return {
+        'rsi': rsi,
+        'macd': macd,
+        'macd_sig': macd_sig,
+        'bb_upper': bb_mid + BB_DEV * bb_std,
+        'bb_mid': bb_mid,
+        'bb_lower': bb_mid - BB_DEV * bb_std,
+    }
+
+
+class _EMA:
+    """pandas ewm(adjust=False, min_periods=n)과 같은 점화식의 증분 EMA"""
+    __slots__ = ('alpha', 'min_periods', 'value', 'count')
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def next(self, x):
+        """x를 반영했을 때의 값 (상태 변경 없음)"""
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        self.value = self.next(x)
+        self.count += 1
+        return self.value
+
+
+class IndicatorState:
+    """심볼 하나의 증분 지표 상태 (Wilder RSI, MACD EMA, 볼린저 이동 평균/분산)
+
+    캔들 1개당 O(1)로 갱신되며, 같은 캔들 시계열에 대해 apply_indicators(ta)와
+    RSI/MACD는 부동소수점 오차 수준, 볼린저 밴드는 상대 오차 1e-9 이내로 일치한다.
+    """
+
+    def __init__(self):
+        self.prev_close = None
+        self.count = 0
+        self._up = _EMA(1 / RSI_WINDOW, RSI_WINDOW)
+        self._dn = _EMA(1 / RSI_WINDOW, RSI_WINDOW)
+        self._fast = _EMA(2 / (MACD_FAST + 1), MACD_FAST)
+        self._slow = _EMA(2 / (MACD_SLOW + 1), MACD_SLOW)
+        self._sig = _EMA(2 / (MACD_SIGNAL + 1), MACD_SIGNAL)
+        self._window = deque(maxlen=BB_WINDOW)
+        self._mean = 0.0
+        self._m2 = 0.0  # 편차 제곱합 (Welford)
+
+    def _compute(self, close, commit):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        up, dn = max(diff, 0.0), max(-diff, 0.0)
+        count = self.count + 1
+
+        # RSI
+        if commit:
+            emaup, emadn = self._up.update(up), self._dn.update(dn)
+        else:
+            emaup, emadn = self._up.next(up), self._dn.next(dn)
+        if count < RSI_WINDOW:
+            rsi = math.nan
+        else:
+            rsi = 100.0 if emadn == 0 else 100.0 - 100.0 / (1.0 + emaup / emadn)
+
+        # MACD
+        if commit:
+            fast, slow = self._fast.update(close), self._slow.update(close)
+        else:
+            fast, slow = self._fast.next(close), self._slow.next(close)
+        macd = macd_sig = math.nan
+        if count >= MACD_SLOW:
+            macd = fast - slow
+            sig = self._sig.update(macd) if commit else self._sig.next(macd)
+            if self._sig.count + (0 if commit else 1) >= MACD_SIGNAL:
+                macd_sig = sig
+
+        # 볼린저 밴드 (슬라이딩 Welford)
+        n = len(self._window)
+        mean, m2 = self._mean, self._m2
+        if n < BB_WINDOW:
+            delta = close - mean
+            mean += delta / (n + 1)
+            m2 += delta * (close - mean)
+            n += 1
+        else:
+            old = self._window[0]
+            new_mean = mean + (close - old) / n
+            m2 += (close - old) * (close - new_mean + old - mean)
+            mean = new_mean
+        if commit:
+            self._window.append(close)
+            self._mean, self._m2 = mean, m2
+            self.prev_close = close
+            self.count = count
+        if n < BB_WINDOW:
+            bb_upper = bb_mid = bb_lower = math.nan
+        else:
+            std = math.sqrt(max(m2, 0.0) / n)
+            bb_mid = mean
+            bb_upper = mean + BB_DEV * std
+            bb_lower = mean - BB_DEV * std
+
+        return {'rsi': rsi, 'macd': macd, 'macd_sig': macd_sig,
+                'bb_upper': bb_upper, 'bb_mid': bb_mid, 'bb_lower': bb_lower}
+
+    def update(self, close):
+        """마감된 캔들 반영 후 최신 지표 반환"""
+        return self._compute(float(close), commit=True)
+
+    def peek(self, close):
+        """형성 중인 캔들의 지표 (상태 변경 없음)"""
+        return self._compute(float(close), commit=False)
+
+
+class IndicatorEngine:
+    """심볼별 IndicatorState 관리
+
+    아직 실거래 경로에는 연결하지 않았다. 실거래/스크리닝/백테스트는 모두 score_batch로
+    최근 KLINE_LOOKBACK개 캔들 창을 다시 계산하는데, 이 엔진은 전체 이력의 EMA 상태를 이어 가므로
+    값이 달라 백테스트와 어긋난다. 마감 캔들을 넣어 줄 kline 스트림 구독이 생기면 함께 전환한다.
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def seed(self, symbol, closes):
+        """과거 종가로 상태를 새로 구성"""
+        state = self.states[symbol] = IndicatorState()
+        latest = None
+        for c in closes:
+            latest = state.update(c)
+        return latest
+
+    def update(self, symbol, close):
+        return self.states.setdefault(symbol, IndicatorState()).update(close)
+
+    def peek(self, symbol, close):
+        return self.states.setdefault(symbol, IndicatorState()).peek(close)
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import numpy as np
+import pytest
+
+from anomaly_detector import AnomalyDetector
+
+
+def _feed(det, symbol, prices, start=0.0, step=1.0):
+    """1초 간격 틱 - 감지된 Anomaly 목록 반환"""
+    hits = []
+    for i, p in enumerate(prices):
+        a = det.update(symbol, float(p), start + i * step)
+        if a:
+            hits.append((start + i * step, a))
+    return hits
+
+
+def _noise(n, sd, seed=0, start=100.0):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, sd, n)))
+
+
+def test_z_score_scales_with_symbol_volatility():
+    det = AnomalyDetector()
+    calm = _noise(1200, 0.0003, seed=1)        # 20분 - 1초 수익률 0.03%
+    wild = _noise(1200, 0.0015, seed=2)        # 0.15%
+    assert _feed(det, 'CALMUSDT', calm) == []
+    assert _feed(det, 'WILDUSDT', wild) == []
+
+    # 같은 +2% 움직임 - 조용한 심볼에서만 통계적으로 유의
+    calm_hits = _feed(det, 'CALMUSDT', [calm[-1] * 1.02] * 3, start=1200)
+    wild_hits = _feed(det, 'WILDUSDT', [wild[-1] * 1.02] * 3, start=1200)
+    assert len(calm_hits) == 1 and wild_hits == []
+    a = calm_hits[0][1]
+    assert a.symbol == 'CALMUSDT' and a.z > det.z_threshold
+    assert a.change_pct == pytest.approx(2.0, abs=0.3)
+
+
+def test_slow_five_minute_move_is_detected():
+    det = AnomalyDetector()
+    base = _noise(1200, 0.0002, seed=3)
+    assert _feed(det, 'BTCUSDT', base) == []
+    # 5분 동안 꾸준히 +2.5% - 1분 변동률은 0.5% 남짓
+    drift = base[-1] * np.exp(np.linspace(0, math.log(1.025), 300))
+    hits = _feed(det, 'BTCUSDT', drift, start=1200)
+    assert hits
+    t, a = hits[0]
+    assert a.timeframe in (300, 900)
+    assert abs(a.change_pct) < 3.0            # 예전 3% 단일 임계값으로는 놓치는 움직임
+
+
+def test_warmup_threshold_wick_and_cooldown():
+    det = AnomalyDetector(threshold=3.0, cooldown=60)
+    det.seed('ETHUSDT', 3000.0, now=0)
+    assert det.update('ETHUSDT', 3100.0, 1) is None        # +3.3% 한 번 - 확인 대기
+    assert det.update('ETHUSDT', 3001.0, 2) is None        # 되돌아감 (wick)
+    assert det.stats['wicks'] == 1
+    assert det.update('ETHUSDT', 3100.0, 3) is None
+    a = det.update('ETHUSDT', 3100.0, 4)
+    assert a.timeframe == 60 and a.z is None and a.change_pct == pytest.approx(3.33, abs=0.01)
+    assert det.update('ETHUSDT', 3300.0, 5) is None        # 쿨다운
+    assert det.update('ETHUSDT', 3300.0, 6) is None
+
+
+def test_flat_symbol_needs_min_move():
+    det = AnomalyDetector(min_move=0.5)
+    _feed(det, 'USDCUSDT', [1.0] * 900)                    # 변동성 0
+    assert _feed(det, 'USDCUSDT', [1.001] * 3, start=900) == []
+    assert len(_feed(det, 'USDCUSDT', [1.01] * 3, start=903)) == 1
+
+
+def test_running_volatility_matches_window_after_wrap_and_gaps():
+    det = AnomalyDetector(vol_window=600, resolution=5)
+    prices = _noise(3000, 0.001, seed=4)
+    times = np.cumsum(np.r_[0, np.where(np.arange(1, 3000) % 700 == 0, 37.0, 1.0)])   # 가끔 체결 공백
+    for t, p in zip(times, prices):
+        det.update('XRPUSDT', float(p), float(t))
+    s = det._series['XRPUSDT']
+    assert s.count > det.vol_size                           # 링이 여러 번 돔
+    rets = np.array(s.rets, dtype=np.float64)
+    assert s.rsum == pytest.approx(rets.sum(), abs=1e-9)
+    assert s.rsq == pytest.approx((rets ** 2).sum(), rel=1e-9)
+    # 기록된 칸 수익률은 실제 칸 종가의 로그 수익률
+    slot_close = {}
+    for t, p in zip(times, prices):
+        slot_close[int(t // 5)] = p
+    last_closed = s.slot - 1
+    expected = math.log(slot_close[last_closed] / slot_close.get(last_closed - 1, slot_close[last_closed]))
+    assert rets[(s.count - 1) % det.vol_size] == pytest.approx(expected, abs=1e-6)
+
+
+def test_long_gap_reseeds_instead_of_zero_padding():
+    det = AnomalyDetector()
+    base = _noise(3600, 0.0003, seed=5)                     # 1시간
+    assert _feed(det, 'ADAUSDT', base) == []
+    # 2시간 체결 공백 뒤 5분 동안 +1% - 0으로 채웠다면 sd=0, z=inf로 감지됨
+    drift = base[-1] * np.exp(np.linspace(0, math.log(1.01), 300))
+    assert _feed(det, 'ADAUSDT', drift, start=3600 + 7200) == []
+    assert det.stats['reseeds'] == 1
+    s = det._series['ADAUSDT']
+    assert s.real == s.count and s.rsq > 0                  # 공백을 메운 0 수익률 없음
+
+
+def test_z_score_waits_for_real_returns_after_reseed():
+    det = AnomalyDetector(min_samples=60)
+    _feed(det, 'DOTUSDT', _noise(600, 0.0003, seed=6))
+    # 15분보다 긴 공백 -> 새로 시작해 min_samples 칸이 쌓일 때까지 변동률 임계값(3%)으로만 판단
+    start = 600 + 1000
+    _feed(det, 'DOTUSDT', [10.0] * 100, start=start)        # 20칸 - 아직 워밍업
+    s = det._series['DOTUSDT']
+    assert s.real < det.min_samples
+    assert _feed(det, 'DOTUSDT', [10.1] * 3, start=start + 100) == []   # 1%는 z-score로 보지 않음
@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (BacktestConfig, SimulatedExecutor, generate_signals, load_klines,
+                      run_backtest)
+from signal_generator import score_batch, KLINE_LOOKBACK
+
+
+def make_klines(n=400, seed=0, start=1_700_000_000_000):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volume = rng.uniform(1, 2, n)
+    volume[rng.random(n) < 0.1] *= 20  # 가끔 거래량 스파이크
+    return {
+        'open_time': start + np.arange(n, dtype=np.int64) * 60_000,
+        'open': close, 'high': close * 1.002, 'low': close * 0.998,
+        'close': close, 'volume': volume,
+    }
+
+
+def reference_signals(symbol, k, cfg):
+    """캔들마다 score_batch + get_signal 규칙을 그대로 반복하는 느린 기준 구현"""
+    history, out = [], []
+    close, volume = k['close'], k['volume']
+    for i in range(KLINE_LOOKBACK - 1, len(close)):
+        if cfg.trigger_threshold and abs(close[i] / close[i - 1] - 1) * 100 < cfg.trigger_threshold:
+            continue
+        window = slice(i - KLINE_LOOKBACK + 1, i + 1)
+        final, _ = score_batch(close[window][None, :], volume[window][None, :],
+                               np.array([cfg.sentiment]), cfg.spike_factor)
+        history.append(final[0])
+        recent = history[-cfg.confirm_period:]
+        if len(recent) < cfg.confirm_period:
+            continue
+        if all(v >= cfg.buy_threshold for v in recent):
+            out.append((int(k['open_time'][i]), symbol, 'buy', i))
+        elif all(v <= cfg.sell_threshold for v in recent):
+            out.append((int(k['open_time'][i]), symbol, 'sell', i))
+    return sorted(out)
+
+
+@pytest.mark.parametrize('trigger', [None, 0.5])
+@pytest.mark.parametrize('sentiment', [0.0, 1.0, -1.0])
+def test_signals_match_reference(trigger, sentiment):
+    k = make_klines(seed=3)
+    cfg = BacktestConfig(trigger_threshold=trigger, sentiment=sentiment, spike_factor=2.0, confirm_period=2)
+    assert sorted(generate_signals('BTCUSDT', k, cfg)) == reference_signals('BTCUSDT', k, cfg)
+
+
+def test_default_evaluates_every_candle_like_screener():
+    k = make_klines(seed=3)
+    cfg = BacktestConfig(sentiment=1.0, spike_factor=2.0, confirm_period=2)
+    assert cfg.trigger_threshold is None
+    assert sorted(generate_signals('BTCUSDT', k, cfg)) == reference_signals('BTCUSDT', k, cfg)
+
+
+def test_short_history_has_no_signals():
+    k = make_klines(n=KLINE_LOOKBACK - 1)
+    assert generate_signals('BTCUSDT', k, BacktestConfig(trigger_threshold=None, sentiment=1.0)) == []
+
+
+def test_load_klines_chunked_csv_and_directory(tmp_path):
+    a, b = make_klines(50, seed=1), make_klines(50, seed=2)
+    long = pd.concat([pd.DataFrame(a).assign(symbol='AAAUSDT'), pd.DataFrame(b).assign(symbol='BBBUSDT')])
+    long = long.sample(frac=1, random_state=0)  # 순서 섞기
+    long = pd.concat([long, long.iloc[:5]])     # 중복 캔들
+    long.to_csv(tmp_path / 'all.csv', index=False)
+
+    loaded = load_klines(str(tmp_path / 'all.csv'), chunk_rows=17)
+    assert set(loaded) == {'AAAUSDT', 'BBBUSDT'}
+    for col in a:
+        np.testing.assert_allclose(loaded['AAAUSDT'][col], a[col])
+
+    os.mkdir(tmp_path / 'dir')
+    pd.DataFrame(b).drop(columns=['high', 'low']).to_csv(tmp_path / 'dir' / 'bbbusdt.csv', index=False)
+    loaded = load_klines(str(tmp_path / 'dir'), symbols=['bbbusdt'])
+    np.testing.assert_allclose(loaded['BBBUSDT']['high'], b['close'])
+
+
+def test_executor_fills_and_exits():
+    k = {'open_time': np.arange(6) * 60_000,
+         'close': np.array([100, 101, 99, 103, 111, 100.0]),
+         'high': np.array([100, 102, 100, 105, 112, 100.0]),
+         'low': np.array([100, 100.5, 98, 101, 108, 100.0])}
+    ex = SimulatedExecutor({'X': k}, entry_timeout=2)
+    ex.at('X', 0)
+    order = ex.enter_limit('X', 'BUY', 1.0, 99.5)
+    assert order['status'] == 'FILLED' and order['fill_index'] == 2
+    result = ex.place_oco('X', 'SELL', 1.0, 95.0, 110.0)
+    assert result == {'exit_index': 4, 'exit': 110.0, 'reason': 'take_profit'}
+
+    ex.at('X', 2)
+    assert ex.enter_limit('X', 'BUY', 1.0, 90.0)['status'] == 'EXPIRED'
+
+
+def test_stop_wins_when_both_hit_in_one_candle():
+    k = {'open_time': np.arange(3) * 60_000, 'close': np.array([100, 100, 100.0]),
+         'high': np.array([100, 100, 120.0]), 'low': np.array([100, 100, 80.0])}
+    ex = SimulatedExecutor({'X': k})
+    ex.at('X', 1)
+    assert ex.place_oco('X', 'SELL', 1.0, 95.0, 110.0)['reason'] == 'stop'
+
+
+def test_run_backtest_pnl_and_risk_limits():
+    klines = {f'S{i}USDT': make_klines(1_400, seed=i) for i in range(5)}
+    cfg = BacktestConfig(trigger_threshold=None, sentiment=1.0, confirm_period=1, max_daily=3, fee_rate=0.0)
+    result = run_backtest(klines, cfg)
+    s = result.summary()
+
+    assert s['signals'] > 0
+    assert 0 < s['trades'] <= 3  # 하루치 데이터 -> 일일 한도
+    assert s['risk_blocked'] > 0
+    trades = result.trades
+    direction = np.where(trades['side'] == 'buy', 1, -1)
+    np.testing.assert_allclose(trades['pnl'], (trades['exit'] - trades['entry']) * trades['qty'] * direction)
+    assert result.equity['balance'].iloc[-1] == pytest.approx(cfg.balance + trades['pnl'].sum())
+    assert s['max_drawdown'] >= 0
+    # 같은 심볼은 청산 전에 다시 진입하지 않음
+    for _, g in trades.groupby('symbol'):
+        assert (g['signal_time'].to_numpy()[1:] > g['exit_time'].to_numpy()[:-1]).all()
+    assert 'Backtest Report' in result.report()
+
+
+def test_open_trades_count_toward_daily_limit():
+    klines = {f'S{i}USDT': make_klines(1_400, seed=i) for i in range(5)}
+    cfg = BacktestConfig(trigger_threshold=None, sentiment=1.0, confirm_period=1, max_daily=1, fee_rate=0.0)
+    s = run_backtest(klines, cfg).summary()
+
+    # 첫 거래가 청산되기 전의 다른 심볼 신호도 진입 시점에 한도에 걸림
+    assert s['trades'] + s['unfilled'] == 1
@@ -7,18 +7,13 @@ from unittest.mock import patch, MagicMock
 import pandas as pd
 from datetime import datetime
 
-from data_fetcher import get_symbols, get_klines, get_tweets
+from data_fetcher import get_symbols, get_klines
 
 @pytest.fixture
 def mock_binance_client():
     with patch('data_fetcher.client') as mock_client:
         yield mock_client
 
-@pytest.fixture
-def mock_twitter_client():
-    with patch('data_fetcher.twitter_client') as mock_client:
-        yield mock_client
-
 def test_get_symbols(mock_binance_client):
     # Mock the futures_exchange_info response
     mock_binance_client.futures_exchange_info.return_value = {
@@ -54,25 +49,13 @@ def test_get_klines(mock_binance_client):
     assert df['close'].dtype == float
     assert df['volume'].dtype == float
 
-def test_get_tweets(mock_twitter_client):
-    # Mock the search_recent_tweets response
-    mock_tweets = MagicMock()
-    mock_tweets.data = [
-        MagicMock(text='Tweet 1'),
-        MagicMock(text='Tweet 2')
-    ]
-    mock_twitter_client.search_recent_tweets.return_value = mock_tweets
-    
-    tweets = get_tweets('BTC')
-    assert len(tweets) == 2
-    assert 'Tweet 1' in tweets
-    assert 'Tweet 2' in tweets
+def test_get_klines_requests_indicator_warmup(mock_binance_client):
+    from data_fetcher import kline_store, KLINE_LIMIT
+    from technical_analysis import required_candles
+    mock_binance_client.futures_klines.return_value = []
 
-def test_get_tweets_empty(mock_twitter_client):
-    # Mock empty response
-    mock_tweets = MagicMock()
-    mock_tweets.data = None
-    mock_twitter_client.search_recent_tweets.return_value = mock_tweets
-    
-    tweets = get_tweets('BTC')
-    assert len(tweets) == 0 
\ No newline at end of file
+    get_klines('WARMUSDT')
+
+    assert KLINE_LIMIT == required_candles()
+    mock_binance_client.futures_klines.assert_called_once_with(symbol='WARMUSDT', interval='1m', limit=KLINE_LIMIT)
+    assert kline_store.buffer('WARMUSDT').capacity == KLINE_LIMIT
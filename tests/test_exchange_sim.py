@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import pytest
+import requests
+from binance.client import Client
+from binance.exceptions import BinanceAPIException
+
+from exchange_sim import ExchangeSim, PricePath
+from market_stream import MarketStream
+from order_tracker import OrderTracker
+from symbol_meta import SymbolMetaCache
+from trade_executor import TradeExecutor, BracketOrderError, LeverageState
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT']
+
+
+@pytest.fixture
+def sim():
+    path = PricePath(len(SYMBOLS), start=[50000.0, 3000.0, 0.5], vol=0.0)
+    sim = ExchangeSim(SYMBOLS, path=path, history=50).start(ticker=False)
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def client(sim):
+    cli = Client('sim', 'sim', ping=False)
+    cli.FUTURES_URL = f"{sim.rest_url}/fapi"
+    return cli
+
+
+def _wait(cond, timeout=3):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_market_data_endpoints(sim, client):
+    prices = requests.get(f"{sim.rest_url}/fapi/v1/ticker/price").json()
+    assert {p['symbol']: float(p['price']) for p in prices}['BTCUSDT'] == 50000.0
+
+    klines = client.futures_klines(symbol='ETHUSDT', interval='1m', limit=20)
+    assert len(klines) == 20
+    assert float(klines[-1][4]) == 3000.0
+    later = client.futures_klines(symbol='ETHUSDT', interval='1m', startTime=klines[-2][0])
+    assert [k[0] for k in later] == [klines[-2][0], klines[-1][0]]
+
+    stats = {t['symbol']: t for t in client.futures_ticker()}
+    assert set(stats) == set(SYMBOLS) and float(stats['BTCUSDT']['lastPrice']) == 50000.0
+    assert float(stats['BTCUSDT']['quoteVolume']) > float(stats['XRPUSDT']['quoteVolume']) > 0
+
+    cache = SymbolMetaCache(client.futures_exchange_info)
+    assert cache.trading_symbols() == SYMBOLS
+    meta = cache.get('BTCUSDT')
+    assert meta.tick == 0.1 and meta.step == 0.0001 and meta.min_notional == 5.0
+
+
+def test_bracket_fills_and_rejections(sim, client):
+    ex = TradeExecutor(client=client, state=LeverageState())
+    ex.set_leverage('BTCUSDT', 10)
+    assert sim.leverage['BTCUSDT'] == 10 and sim.margin_type['BTCUSDT'] == 'ISOLATED'
+
+    # 진입은 즉시 체결 (시장가보다 높은 매수 지정가), 익절 트리거 시 포지션 청산
+    res = ex.open_bracket('BTCUSDT', 'BUY', 0.01, 50010.0, 49000.0, 52000.0)
+    assert sim.positions['BTCUSDT'][0] == pytest.approx(0.01)
+    sim.burst('BTCUSDT', 5)
+    sim.step()
+    tp = sim.algo_orders[res['tp']['algoId']]
+    assert tp['algoStatus'] == 'FINISHED' and float(tp['actualQty']) == pytest.approx(0.01)
+    assert sim.orders[int(tp['actualOrderId'])]['status'] == 'FILLED'
+    assert sim.positions['BTCUSDT'][0] == 0
+    assert sim.balance > 10_000
+
+    # 이미 넘어선 손절가는 거부되고 접수된 주문은 롤백
+    with pytest.raises(BracketOrderError) as exc_info:
+        ex.open_bracket('ETHUSDT', 'BUY', 0.1, 2990.0, 3100.0, 3300.0)
+    assert exc_info.value.errors[0][1]['code'] == -2021
+    assert sorted(exc_info.value.rolled_back) == ['entry', 'tp']
+    assert not [o for o in sim.open_orders.values() if o['symbol'] == 'ETHUSDT']
+    assert not [a for a in sim.open_algo.values() if a['symbol'] == 'ETHUSDT']
+
+
+def test_conditional_types_need_algo_endpoint(sim, client):
+    stop = {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'STOP_MARKET', 'stopPrice': 49000, 'closePosition': 'true'}
+    with pytest.raises(BinanceAPIException) as exc_info:
+        client._request_futures_api('post', 'order', True, data=stop)
+    assert exc_info.value.code == -4120
+    res = client.futures_place_batch_order(batchOrders=[stop])
+    assert res[0]['code'] == -4120
+    assert not sim.orders and not sim.algo_orders
+
+    algo = client.futures_create_algo_order(symbol='BTCUSDT', side='SELL', algoType='CONDITIONAL',
+                                            type='STOP_MARKET', triggerPrice=49000, closePosition='true',
+                                            clientAlgoId='atb-x-sl')
+    assert client.futures_cancel_algo_order(symbol='BTCUSDT', clientAlgoId='atb-x-sl')['algoId'] == algo['algoId']
+    assert sim.algo_orders[algo['algoId']]['algoStatus'] == 'CANCELED'
+
+
+def test_injected_429(sim, client):
+    sim.faults.force_429 = 1
+    with pytest.raises(BinanceAPIException) as exc_info:
+        client.futures_exchange_info()
+    assert exc_info.value.code == -1003
+    assert client.futures_exchange_info()['symbols']
+    assert sim.stats['429'] == 1
+
+
+def test_streams_end_to_end(sim, client):
+    anomalies, closed = [], []
+    stream = MarketStream(on_anomaly=lambda s, pct: anomalies.append(s), threshold=3.0,
+                          url=f"{sim.ws_url}/stream", reconnect_delay=0.01)
+    stream.seed({'BTCUSDT': 50000.0, 'ETHUSDT': 3000.0, 'XRPUSDT': 0.5})
+    tracker = OrderTracker(client, on_close=closed.append, base_url=f"{sim.ws_url}/ws", reconnect_delay=0.01)
+    stream.start()
+    tracker.start()
+    try:
+        assert stream.connected.wait(3) and tracker.connected.wait(3)
+        assert _wait(lambda: sim._market_clients and all(sim._market_clients.values()))
+
+        sim.burst('XRPUSDT', -4)
+        sim.step()
+        sim.step()   # 움직임이 다음 틱에도 유지돼야 감지
+        assert _wait(lambda: anomalies == ['XRPUSDT'])
+        assert stream.prices['XRPUSDT'] == pytest.approx(0.48)
+
+        ex = TradeExecutor(client=client, state=LeverageState())
+        res = ex.open_bracket('XRPUSDT', 'SELL', 100, 0.4790, 0.50, 0.45)
+        sim.burst('XRPUSDT', -8)
+        sim.step()
+        assert _wait(lambda: closed)
+        assert tracker.drain(3)
+        assert closed[0]['side'] == 'sell' and closed[0]['pnl'] > 0
+        assert sim.algo_orders[res['sl']['algoId']]['algoStatus'] == 'CANCELED'
+
+        # 강제로 끊어도 재접속
+        sim.disconnect_all()
+        assert _wait(lambda: stream.reconnects >= 1 and stream.connected.is_set())
+    finally:
+        stream.stop()
+        tracker.stop()
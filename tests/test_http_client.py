@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+import http_client
+from http_client import Transport, timeout_for, host_of, DEFAULT_TIMEOUT
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=srv.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_connection_reused_across_requests(server):
+    transport = Transport()
+    sess = transport.session(server)
+    for _ in range(10):
+        assert sess.get(f"{server}/ping").json() == {'ok': True}
+
+    m = transport.metrics()['127.0.0.1']
+    assert m['requests'] == 10
+    assert m['new_connections'] == 1
+    assert m['reuse_ratio'] == pytest.approx(0.9)
+    assert m['p50_ms'] is not None and m['p99_ms'] >= m['p50_ms']
+    transport.close()
+
+
+def test_same_session_per_host():
+    transport = Transport()
+    a = transport.session('https://fapi.binance.com/fapi/v1/ticker/price')
+    b = transport.session('fapi.binance.com')
+    c = transport.session('https://hooks.slack.com/services/x')
+    assert a is b
+    assert a is not c
+
+
+def test_default_timeout_injected():
+    transport = Transport()
+    adapter = transport.session('https://fapi.binance.com').get_adapter('https://fapi.binance.com')
+    request = MagicMock(url='https://fapi.binance.com/fapi/v1/ping')
+    with patch('requests.adapters.HTTPAdapter.send', return_value='resp') as send:
+        assert adapter.send(request) == 'resp'
+    assert send.call_args.kwargs['timeout'] == timeout_for('fapi.binance.com')
+
+    request = MagicMock(url='http://example.com/')
+    with patch('requests.adapters.HTTPAdapter.send', return_value='resp') as send:
+        adapter.send(request, timeout=1)
+    assert send.call_args.kwargs['timeout'] == 1
+    assert timeout_for('example.com') == DEFAULT_TIMEOUT
+
+
+def test_errors_recorded_once():
+    transport = Transport()
+    adapter = transport.session('https://fapi.binance.com').get_adapter('https://fapi.binance.com')
+    request = MagicMock(url='https://fapi.binance.com/fapi/v1/ping')
+    with patch('requests.adapters.HTTPAdapter.send', side_effect=ConnectionError):
+        with pytest.raises(ConnectionError):
+            adapter.send(request)
+    m = transport.metrics()['fapi.binance.com']
+    assert m['errors'] == 1
+    assert m['requests'] == 0
+
+
+def test_host_of():
+    assert host_of('https://api.twitter.com/2/tweets') == 'api.twitter.com'
+    assert host_of('hooks.slack.com') == 'hooks.slack.com'
+
+
+def test_binance_client_shares_session():
+    fake = MagicMock()
+    fake.session.headers = {'X-MBX-APIKEY': 'key'}
+    with patch('http_client.Client', return_value=fake) as cls, \
+         patch.object(http_client, '_binance_client', None), \
+         patch.object(http_client, 'transport', Transport()):
+        first = http_client.binance_client()
+        second = http_client.binance_client()
+        shared = http_client.session_for('fapi.binance.com')
+
+    assert first is second
+    cls.assert_called_once()
+    assert first.session is shared
+    assert shared.headers['X-MBX-APIKEY'] == 'key'
+    assert first.REQUEST_TIMEOUT == timeout_for('fapi.binance.com')
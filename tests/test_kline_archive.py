@@ -0,0 +1,170 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pytest
+import requests
+
+from kline_archive import KlineArchive, KlineDownloader, WeightBudget, kline_weight
+from kline_store import KlineStore
+from backtest import load_klines
+
+MINUTE = 60_000
+T0 = 1_700_000_000_000
+
+
+def make_row(i):
+    open_time = T0 + i * MINUTE
+    close = 100.0 + i
+    return [open_time, str(close), str(close + 1), str(close - 1), str(close), '10', open_time + MINUTE - 1,
+            '0', 1, '0', '0', '0']
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_binance():
+    """startTime/endTime/limit을 지키는 /fapi/v1/klines 가짜 서버 (캔들 0..total-1)"""
+    state = {'total': 2_500, 'requests': [], 'throttle': 0, 'used_weight': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            assert url.path == '/fapi/v1/klines'
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            state['requests'].append(q)
+            if state['throttle']:
+                state['throttle'] -= 1
+                self._reply(429, {'code': -1003}, {'Retry-After': '0'})
+                return
+            limit = int(q['limit'])
+            first = max(0, -(-(int(q['startTime']) - T0) // MINUTE))
+            last = min(state['total'] - 1, (int(q['endTime']) - T0) // MINUTE)
+            rows = [make_row(i) for i in range(first, min(last + 1, first + limit))]
+            state['used_weight'] += kline_weight(limit)
+            self._reply(200, rows, {'X-MBX-USED-WEIGHT-1M': str(state['used_weight'])})
+
+        def _reply(self, status, body, headers):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    state['url'] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def downloader(archive, fake, now_index, sleeps=None):
+    clock = FakeClock((T0 + now_index * MINUTE + 30_000) / 1000)  # now_index 캔들은 형성 중
+    sleep = (sleeps.append if sleeps is not None else lambda s: None)
+    return KlineDownloader(archive, base_url=fake['url'], session=requests.Session(),
+                           clock=clock, sleep=sleep)
+
+
+def test_download_then_resume_incrementally(tmp_path, fake_binance):
+    archive = KlineArchive(str(tmp_path))
+    d = downloader(archive, fake_binance, now_index=2_000)
+    assert d.sync('btcusdt', start_time=T0) == 2_000   # 형성 중인 2000번 캔들은 제외
+    assert len(fake_binance['requests']) == 3          # 1000 + 1000 + 형성 중인 캔들 하나
+    assert archive.length('BTCUSDT') == 2_000
+
+    fake_binance['requests'].clear()
+    d = downloader(archive, fake_binance, now_index=2_300)
+    assert d.sync('BTCUSDT') == 300
+    assert int(fake_binance['requests'][0]['startTime']) == T0 + 2_000 * MINUTE
+    k = archive.read('BTCUSDT')
+    np.testing.assert_array_equal(k['open_time'], T0 + np.arange(2_300) * MINUTE)
+    np.testing.assert_array_equal(k['close'], 100.0 + np.arange(2_300))
+    assert (np.diff(k['open_time']) == MINUTE).all()
+
+
+def test_rate_limited_request_is_retried(tmp_path, fake_binance):
+    fake_binance['throttle'] = 2
+    sleeps = []
+    d = downloader(KlineArchive(str(tmp_path)), fake_binance, now_index=500, sleeps=sleeps)
+    assert d.sync('ETHUSDT', start_time=T0) == 500
+    assert d.stats['retries'] == 2
+    assert sleeps[:2] == [0.0, 0.0]
+
+
+def test_reads_are_zero_copy_memmaps(tmp_path):
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '1m', [make_row(i) for i in range(100)])
+    assert archive.append('BTCUSDT', '1m', [make_row(i) for i in range(90, 110)]) == 10  # 중복 제외
+
+    k = archive.read('BTCUSDT', start=T0 + 10 * MINUTE, end=T0 + 20 * MINUTE)
+    assert isinstance(k['close'], np.memmap)
+    assert not k['close'].flags.writeable
+    assert list(k['close']) == [100.0 + i for i in range(10, 20)]
+    assert list(archive.tail('BTCUSDT', n=3)['close']) == [207.0, 208.0, 209.0]
+    assert archive.symbols() == ['BTCUSDT']
+
+
+def test_interrupted_write_is_repaired(tmp_path):
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '1m', [make_row(i) for i in range(10)])
+    with open(tmp_path / '1m' / 'BTCUSDT' / 'close.bin', 'ab') as f:
+        f.write(b'\0' * 8)  # close 컬럼만 한 행 더 기록된 상태
+    assert archive.length('BTCUSDT') == 10
+    archive.append('BTCUSDT', '1m', [make_row(10)])
+    assert list(archive.read('BTCUSDT')['close'][-2:]) == [109.0, 110.0]
+
+
+def test_weight_budget_waits_when_exhausted():
+    clock = FakeClock(0.0)
+    slept = []
+
+    def sleep(s):
+        slept.append(s)
+        clock.now += s
+
+    budget = WeightBudget(limit=10, window=60, clock=clock, sleep=sleep)
+    assert budget.acquire(10) == 0
+    assert budget.acquire(5) == pytest.approx(30)
+    budget.sync(2400)  # 서버 기준 한도 소진
+    assert budget.tokens <= 0
+
+
+def test_archive_feeds_backtest_and_warm_start(tmp_path):
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '1m', [make_row(i) for i in range(100)])
+
+    klines = load_klines(str(tmp_path))
+    assert list(klines) == ['BTCUSDT']
+    assert len(klines['BTCUSDT']['close']) == 100
+
+    calls = []
+    def fetch(symbol, interval, limit, start_time=None):
+        calls.append((limit, start_time))
+        return [make_row(i) for i in range(100, 102)]  # 101번 캔들 형성 중
+
+    store = KlineStore(fetch, default_limit=40)
+    assert store.seed('BTCUSDT', '1m', archive.tail('BTCUSDT', n=40)) == 40
+    v = store.get('BTCUSDT', limit=40, now=(T0 + 101 * MINUTE + 30_000) / 1000)
+    assert calls == [(40, T0 + 100 * MINUTE)]  # 아카이브 이후 구간만 조회
+    assert list(v['close'][-3:]) == [199.0, 200.0, 201.0]
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from unittest.mock import MagicMock
+
+from kline_store import KlineBuffer, KlineStore
+
+MINUTE = 60_000
+T0 = 1_700_000_000_000
+
+def make_row(i, close=None):
+    open_time = T0 + i * MINUTE
+    close = 100.0 + i if close is None else close
+    return [open_time, str(close), str(close + 1), str(close - 1), str(close), '10', open_time + MINUTE - 1,
+            '0', 1, '0', '0', '0']
+
+def now_at(i):
+    """Seconds timestamp inside candle i (so candle i is still open)"""
+    return (T0 + i * MINUTE + 30_000) / 1000
+
+def test_buffer_wraps_and_returns_contiguous_views():
+    buf = KlineBuffer(3)
+    for i in range(5):
+        buf.append((i, i, i, i, float(i), 1.0, i))
+    assert len(buf) == 3
+    assert list(buf.view()['close']) == [2.0, 3.0, 4.0]
+
+    buf.set_live((5, 5, 5, 5, 5.0, 1.0, 5))
+    v = buf.view()
+    assert list(v['close']) == [2.0, 3.0, 4.0, 5.0]
+    assert list(buf.view(2)['close']) == [4.0, 5.0]
+    assert buf.last_open_time == 4
+    assert not v['close'].flags.writeable
+    assert np.shares_memory(v['close'], buf._data['close'])
+
+def test_store_fills_once_then_fetches_delta():
+    fetch = MagicMock(return_value=[make_row(i) for i in range(10)])  # candle 9 still open
+    store = KlineStore(fetch)
+
+    v = store.get('BTCUSDT', '1m', limit=6, now=now_at(9))
+    assert list(v['close']) == [104.0, 105.0, 106.0, 107.0, 108.0, 109.0]
+    fetch.assert_called_once_with('BTCUSDT', '1m', 6)
+
+    # candle 9 closed, candle 10 forming
+    fetch.reset_mock()
+    fetch.return_value = [make_row(9), make_row(10)]
+    v = store.get('BTCUSDT', '1m', limit=6, now=now_at(10))
+    fetch.assert_called_once_with('BTCUSDT', '1m', 6, start_time=T0 + 9 * MINUTE)
+    assert list(v['close']) == [105.0, 106.0, 107.0, 108.0, 109.0, 110.0]
+
+def test_store_serves_cached_view_within_max_age():
+    fetch = MagicMock(return_value=[make_row(i) for i in range(10)])
+    store = KlineStore(fetch, max_age=5)
+    first = store.get('BTCUSDT', limit=6, now=now_at(9))
+    second = store.get('BTCUSDT', limit=6, now=now_at(9) + 1)
+    assert fetch.call_count == 1
+    assert np.shares_memory(first['close'], second['close'])
+
+def test_store_refills_after_long_gap():
+    fetch = MagicMock(return_value=[make_row(i) for i in range(10)])
+    store = KlineStore(fetch)
+    store.get('BTCUSDT', limit=6, now=now_at(9))
+    fetch.return_value = [make_row(i) for i in range(100, 110)]
+    v = store.get('BTCUSDT', limit=6, now=now_at(109))
+    assert fetch.call_args[0] == ('BTCUSDT', '1m', 6)
+    assert v['close'][-1] == 209.0
+
+def test_on_kline_updates_without_rest():
+    fetch = MagicMock(return_value=[make_row(i) for i in range(10)])
+    store = KlineStore(fetch, max_age=60)
+    store.get('BTCUSDT', limit=6, now=now_at(9))
+
+    k = {'t': T0 + 9 * MINUTE, 'T': T0 + 10 * MINUTE - 1, 'i': '1m',
+         'o': '109', 'h': '120', 'l': '100', 'c': '119', 'v': '50', 'x': True}
+    store.on_kline('BTCUSDT', k, now=now_at(10))
+    v = store.get('BTCUSDT', limit=6, now=now_at(10))
+
+    assert fetch.call_count == 1
+    assert v['close'][-1] == 119.0
+    assert store.buffer('BTCUSDT', '1m').last_open_time == T0 + 9 * MINUTE
@@ -3,7 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 import os
 import time
 from datetime import datetime
@@ -24,19 +24,30 @@ def mock_session():
     with patch('main.session') as mock:
         yield mock
 
-def test_notify_slack(mock_env, mock_session):
-    mock_session.post.return_value = MagicMock(status_code=200)
+def test_notify_slack(mock_env):
+    with patch('main.queue_slack') as mock_queue:
+        notify_slack("Test message")
     
-    notify_slack("Test message")
-    
-    mock_session.post.assert_called_once()
-    assert "Test message" in mock_session.post.call_args[1]['json']['text']
+    mock_queue.assert_called_once()
+    assert "Test message" in mock_queue.call_args[0][0]
 
-def test_notify_slack_error(mock_env, mock_session):
-    mock_session.post.side_effect = Exception("Connection error")
-    
-    # Should not raise exception
-    notify_slack("Test message")
+def test_notify_slack_error(mock_env):
+    with patch('main.queue_slack', side_effect=Exception("Queue error")):
+        # Should not raise exception
+        notify_slack("Test message")
+
+def test_notify_slack_does_not_block_on_slow_webhook(mock_env):
+    import notifier
+    slow_session = MagicMock()
+    slow_session.post.side_effect = lambda *a, **kw: (time.sleep(1), MagicMock(status_code=200))[1]
+    with patch.object(notifier._notifier, 'session', slow_session):
+        start = time.perf_counter()
+        for i in range(20):
+            notify_slack(f"message {i}")
+        elapsed = time.perf_counter() - start
+        assert notifier.flush(timeout=5)
+    assert elapsed < 0.5
+    assert slow_session.post.call_count == 1  # coalesced into one post
 
 def test_fetch_all_prices(mock_session):
     mock_response = MagicMock()
@@ -60,7 +71,7 @@ def test_fetch_all_prices_error(mock_session):
     prices = fetch_all_prices()
     assert prices == {}
 
-@patch('main.get_symbols')
+@patch('data_fetcher.get_symbols')
 @patch('main.get_signal')
 @patch('main.get_klines')
 @patch('main.RiskManager')
@@ -96,21 +107,92 @@ def test_trade_logic(mock_notify, mock_log_trade, mock_trade_executor, mock_risk
     mock_log_trade.assert_called_once()
     mock_notify.assert_called_once()
 
+@pytest.mark.parametrize('rejected', [True, False])
+def test_trade_logic_reserves_slot_and_releases_when_no_order(rejected):
+    import pandas as pd
+    from risk_manager import RiskManager
+    from trade_executor import BracketOrderError
+    risk = RiskManager(max_daily=1)
+    executor = MagicMock()
+    if rejected:
+        executor.open_bracket.side_effect = BracketOrderError('BTCUSDT', [('tp', {'code': -4120})], ['entry'])
+    with patch('main.tracer') as mock_tracer, \
+         patch('main.get_risk_manager', return_value=risk), \
+         patch('main.get_signal', return_value=('buy', 'test')), \
+         patch('main.get_klines', return_value=pd.DataFrame({'close': [100.0, 99.0, 98.0, 99.5, 100.5, 101.0]})), \
+         patch('main.symbol_meta') as mock_meta, \
+         patch('main.TradeExecutor', return_value=executor), \
+         patch('main.get_cached_balance', return_value=1000.0), \
+         patch('main.notify_slack'), patch('main.notify'):
+        mock_meta.get.return_value = None
+        trade_logic('BTCUSDT')
+
+    executor.open_bracket.assert_called_once()
+    mock_tracer.discard.assert_called_once_with('BTCUSDT')   # 어느 경로로 끝나도 구간 시작 시각 정리
+    assert risk.trades == (0 if rejected else 1)
+    assert risk.can_trade('BTCUSDT') == rejected
+
+def test_trade_logic_uses_screener_signal_without_rescoring():
+    import pandas as pd
+    from risk_manager import RiskManager
+    executor = MagicMock()
+    with patch('main.tracer'), \
+         patch('main.get_risk_manager', return_value=RiskManager(max_daily=1)), \
+         patch('main.get_signal') as mock_signal, \
+         patch('main.get_klines', return_value=pd.DataFrame({'close': [100.0, 99.0, 98.0, 99.5, 100.5, 101.0]})), \
+         patch('main.symbol_meta') as mock_meta, \
+         patch('main.TradeExecutor', return_value=executor), \
+         patch('main.get_cached_balance', return_value=1000.0), \
+         patch('main.notify_slack'), patch('main.notify'):
+        mock_meta.get.return_value = None
+        trade_logic('BTCUSDT', 'sell')
+
+    mock_signal.assert_not_called()
+    assert executor.open_bracket.call_args[0][:2] == ('BTCUSDT', 'SELL')
+
+class _StopLoop(Exception):
+    pass
+
+@patch('main.Screener')
+@patch('main.universe')
+@patch('main.OrderTracker')
+@patch('main.TradeExecutor')
+@patch('main.symbol_meta')
 @patch('main.fetch_all_prices')
 @patch('main.trade_logic')
 @patch('main.notify_slack')
-@patch('time.sleep')
-def test_monitor(mock_sleep, mock_notify_slack, mock_trade_logic, mock_fetch_prices):
-    # Setup mock prices
+@patch('main.perform_periodic_cleanup')
+@patch('main.MarketStream')
+def test_monitor(mock_stream_cls, mock_cleanup, mock_notify_slack, mock_trade_logic, mock_fetch_prices,
+                 mock_symbol_meta, mock_executor_cls, mock_tracker_cls, mock_universe, mock_screener_cls):
+    # Setup initial prices and a stream that reports one anomaly
     initial_prices = {'BTCUSDT': 50000.0, 'ETHUSDT': 3000.0}
-    current_prices = {'BTCUSDT': 51500.0, 'ETHUSDT': 3000.0}  # 3% increase in BTC
-    
-    mock_fetch_prices.side_effect = [initial_prices, current_prices]
-    mock_sleep.side_effect = KeyboardInterrupt()  # To break the infinite loop
-    
-    monitor()
-    
+    mock_fetch_prices.return_value = initial_prices
+
+    def start():
+        on_anomaly = mock_stream_cls.call_args[1]['on_anomaly']
+        on_anomaly('BTCUSDT', 3.0)  # 3% increase in BTC
+    mock_stream_cls.return_value.start.side_effect = start
+    mock_cleanup.side_effect = [None, _StopLoop()]  # To break the infinite loop
+
+    with patch('main.tracer') as mock_tracer, pytest.raises(_StopLoop):
+        monitor()
+
     # Verify monitoring behavior
+    mock_stream_cls.return_value.seed.assert_called_once_with(initial_prices)
     mock_notify_slack.assert_called()
-    mock_trade_logic.assert_called_once()  # Should be called for BTC price change
-    assert mock_sleep.call_count >= 1 
\ No newline at end of file
+    mock_trade_logic.assert_called_once_with('BTCUSDT')
+    mock_tracer.mark.assert_called_once_with('BTCUSDT', at=ANY)   # 파이프라인이 접수한 트리거만 구간 시작
+    mock_stream_cls.return_value.stop.assert_called_once()
+    mock_symbol_meta.refresh.assert_called_once()
+    mock_symbol_meta.start.assert_called_once()
+    mock_symbol_meta.stop.assert_called_once()
+    mock_executor_cls.return_value.sync_state.assert_called_once()
+    mock_tracker_cls.return_value.start.assert_called_once()
+    mock_tracker_cls.return_value.stop.assert_called_once()
+    mock_universe.refresh.assert_called_once()
+    mock_universe.start.assert_called_once()
+    mock_universe.stop.assert_called_once()
+    assert mock_stream_cls.call_args[1]['symbols'] is mock_universe
+    mock_screener_cls.return_value.start.assert_called_once()
+    mock_screener_cls.return_value.stop.assert_called_once()
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import pytest
+from websockets.asyncio.server import serve
+
+from market_stream import MarketStream, WebSocketStream, MARKET_STREAMS
+
+# Recorded combined-stream frames (trimmed)
+RECORDED_FRAMES = [
+    {"stream": "!markPrice@arr", "data": [
+        {"e": "markPriceUpdate", "E": 1700000000000, "s": "BTCUSDT", "p": "50010.00", "r": "0.0001", "T": 1700003600000},
+        {"e": "markPriceUpdate", "E": 1700000000000, "s": "ETHUSDT", "p": "3000.50", "r": "0.0001", "T": 1700003600000}
+    ]},
+    {"stream": "!miniTicker@arr", "data": [
+        {"e": "24hrMiniTicker", "E": 1700000001000, "s": "BTCUSDT", "c": "50000.00", "o": "49000.00", "h": "50500.00", "l": "48800.00", "v": "1000", "q": "50000000"},
+        {"e": "24hrMiniTicker", "E": 1700000001000, "s": "ETHBTC", "c": "0.06", "o": "0.06", "h": "0.06", "l": "0.06", "v": "10", "q": "0.6"}
+    ]},
+    {"stream": "!miniTicker@arr", "data": [
+        {"e": "24hrMiniTicker", "E": 1700000002000, "s": "BTCUSDT", "c": "51600.00", "o": "49000.00", "h": "51600.00", "l": "48800.00", "v": "1100", "q": "56000000"}
+    ]},
+]
+
+@pytest.fixture
+def stream():
+    return MarketStream(threshold=3.0, window=60)
+
+def test_stream_without_on_message_fails_at_construction():
+    class Forgotten(WebSocketStream):
+        pass
+
+    with pytest.raises(TypeError):
+        Forgotten(url='ws://localhost:1/stream')
+
+def test_on_message_updates_price_tables(stream):
+    for frame in RECORDED_FRAMES[:2]:
+        stream.on_message(frame)
+    assert stream.mark_prices == {'BTCUSDT': 50010.0, 'ETHUSDT': 3000.5}
+    assert stream.prices == {'BTCUSDT': 50000.0}  # non-USDT pairs are ignored
+
+def test_on_price_fires_anomaly_once(stream):
+    fired = []
+    stream.on_anomaly = lambda sym, pct: fired.append((sym, pct))
+    stream.seed({'BTCUSDT': 50000.0}, now=0)
+
+    stream.on_price('BTCUSDT', 50500.0, now=1)   # +1% - no anomaly
+    stream.on_price('BTCUSDT', 51600.0, now=2)   # +3.2% - needs a confirming tick
+    assert fired == []
+    stream.on_price('BTCUSDT', 51650.0, now=3)   # +3.3% held - anomaly
+    stream.on_price('BTCUSDT', 51700.0, now=4)   # cooldown - no repeat
+
+    assert len(fired) == 1
+    assert fired[0][0] == 'BTCUSDT'
+    assert fired[0][1] == pytest.approx(3.3)
+
+def test_single_print_wick_is_ignored(stream):
+    fired = []
+    stream.on_anomaly = lambda sym, pct: fired.append(sym)
+    stream.seed({'BTCUSDT': 50000.0}, now=0)
+
+    stream.on_price('BTCUSDT', 52000.0, now=1)   # +4% for one print
+    stream.on_price('BTCUSDT', 50050.0, now=2)   # back to normal
+    assert fired == []
+    assert stream.detector.stats['wicks'] == 1
+
+def test_on_price_compares_against_last_minute(stream):
+    fired = []
+    stream.on_anomaly = lambda sym, pct: fired.append(sym)
+    stream.seed({'BTCUSDT': 50000.0}, now=0)
+
+    for now, price in ((61, 51000.0), (62, 51000.0), (122, 52000.0), (123, 52000.0)):
+        stream.on_price('BTCUSDT', price, now=now)   # ~2% per minute
+    assert fired == []
+
+def test_stream_replays_frames_and_resubscribes_on_drop():
+    subscriptions = []
+    fired = []
+
+    async def handler(ws):
+        subscriptions.append(json.loads(await ws.recv()))
+        if len(subscriptions) == 1:
+            for frame in RECORDED_FRAMES[:2]:
+                await ws.send(json.dumps(frame))
+            return  # drop the connection
+        await ws.send(json.dumps(RECORDED_FRAMES[2]))
+        await ws.send(json.dumps(RECORDED_FRAMES[2]))   # confirming tick
+        await asyncio.sleep(1)
+
+    async def scenario():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            stream = MarketStream(
+                on_anomaly=lambda sym, pct: fired.append((sym, pct)),
+                url=f"ws://127.0.0.1:{port}", reconnect_delay=0.01
+            )
+            stream.seed({'BTCUSDT': 50000.0})
+            task = asyncio.create_task(stream.run())
+            for _ in range(200):
+                if fired:
+                    break
+                await asyncio.sleep(0.01)
+            stream._stopping = True
+            if stream._ws is not None:
+                await stream._ws.close()
+            await asyncio.wait_for(task, 5)
+            return stream
+
+    stream = asyncio.run(scenario())
+
+    assert len(subscriptions) == 2
+    assert all(sub['method'] == 'SUBSCRIBE' and sub['params'] == MARKET_STREAMS for sub in subscriptions)
+    assert stream.reconnects >= 1
+    assert stream.prices['BTCUSDT'] == 51600.0
+    assert fired and fired[0][0] == 'BTCUSDT'
@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from notifier import SlackNotifier
+
+def response(status, headers=None):
+    return MagicMock(status_code=status, headers=headers or {}, text='')
+
+@pytest.fixture
+def session():
+    s = MagicMock()
+    s.post.return_value = response(200)
+    return s
+
+def make_notifier(session, **kwargs):
+    kwargs.setdefault('coalesce_window', 0.2)
+    return SlackNotifier(webhook_url='https://hooks.slack.com/test', session=session,
+                         sleep=lambda s: None, **kwargs)
+
+def posted_texts(session):
+    return [c[1]['json']['text'] for c in session.post.call_args_list]
+
+def test_burst_is_coalesced_into_one_post(session):
+    notifier = make_notifier(session)
+    for i in range(5):
+        notifier.send(f"msg {i}")
+    assert notifier.flush(timeout=2)
+    assert posted_texts(session) == ["msg 0\nmsg 1\nmsg 2\nmsg 3\nmsg 4"]
+
+def test_priority_message_skips_coalescing_window(session):
+    notifier = make_notifier(session, coalesce_window=10)
+    notifier.send("status update")
+    time.sleep(0.05)
+    notifier.send("❌ order rejected", priority=True)
+
+    deadline = time.time() + 2
+    while not session.post.called and time.time() < deadline:
+        time.sleep(0.01)
+    assert posted_texts(session) == ["❌ order rejected\nstatus update"]
+
+def test_retries_on_429_with_retry_after(session):
+    delays = []
+    session.post.side_effect = [response(429, {'Retry-After': '3'}), response(200)]
+    notifier = SlackNotifier(webhook_url='https://hooks.slack.com/test', session=session,
+                             coalesce_window=0, sleep=delays.append)
+    notifier.send("hello", priority=True)
+    assert notifier.flush(timeout=2)
+    assert delays == [3.0]
+    assert notifier.stats['retries'] == 1
+    assert notifier.stats['posts'] == 1
+
+def test_drops_oldest_normal_message_when_full(session):
+    release = threading.Event()
+    session.post.side_effect = lambda *a, **kw: (release.wait(5), response(200))[1]
+    notifier = make_notifier(session, max_queue=2, coalesce_window=0)
+    notifier.send("in flight", priority=True)
+    deadline = time.time() + 2
+    while not session.post.called and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert notifier.send("old")
+    assert notifier.send("newer")
+    assert notifier.send("newest")       # evicts "old"
+    assert notifier.send("fill", priority=True)  # evicts "newer"
+    assert notifier.stats['dropped'] == 2
+
+    release.set()
+    assert notifier.flush(timeout=2)
+    assert posted_texts(session)[-1] == "fill\nnewest"
+
+def test_large_batches_are_split(session):
+    notifier = make_notifier(session)
+    for i in range(10):
+        notifier.send("x" * 1000)
+    assert notifier.flush(timeout=2)
+    assert session.post.call_count == 4
+    assert all(len(t) <= 3500 for t in posted_texts(session))
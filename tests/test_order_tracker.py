@@ -0,0 +1,155 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+from websockets.asyncio.server import serve
+
+from order_tracker import OrderTracker
+from trade_executor import bracket_ids
+
+
+def _update(client_id, status, side, type, x=None, z='0', ap='0', rp='0', n='0', T=1700000000000, i=None):
+    return {'e': 'ORDER_TRADE_UPDATE', 'E': T, 'T': T, 'o': {
+        's': 'BTCUSDT', 'c': client_id, 'S': side, 'o': type, 'X': status, 'x': x or status,
+        'i': i or abs(hash(client_id)) % 10**8, 'z': z, 'ap': ap, 'rp': rp, 'n': n, 'N': 'USDT', 'T': T}}
+
+
+def _fill(client_id, side, type, qty, price, rp='0', fee='0', T=1700000000000, i=None):
+    return _update(client_id, 'FILLED', side, type, x='TRADE', z=qty, ap=price, rp=rp, n=fee, T=T, i=i)
+
+
+def _algo(client_algo_id, status, side, type, ai='', aq='0', T=1700000000000):
+    return {'e': 'ALGO_UPDATE', 'E': T, 'T': T, 'o': {
+        's': 'BTCUSDT', 'caid': client_algo_id, 'aid': abs(hash(client_algo_id)) % 10**8, 'at': 'CONDITIONAL',
+        'S': side, 'o': type, 'X': status, 'ai': ai, 'aq': aq, 'ap': '0', 'T': T}}
+
+
+@pytest.fixture
+def tracker():
+    closed = []
+    t = OrderTracker(MagicMock(), on_close=closed.append)
+    t.closed = closed
+    yield t
+    t._actions.shutdown(wait=True)
+
+
+def test_take_profit_fill_cancels_stop_and_logs_realized_pnl(tracker):
+    e, tp, sl = bracket_ids('abc123')
+    for msg in [
+        _update(e, 'NEW', 'BUY', 'LIMIT'),
+        _algo(tp, 'NEW', 'SELL', 'TAKE_PROFIT_MARKET'),
+        _algo(sl, 'NEW', 'SELL', 'STOP_MARKET'),
+        _fill(e, 'BUY', 'LIMIT', '0.01', '50000', fee='0.2'),
+        # 익절 트리거 -> 거래소가 만든 실제 시장가 주문 (clientOrderId는 우리 것이 아님)
+        _algo(tp, 'TRIGGERED', 'SELL', 'TAKE_PROFIT_MARKET', ai='777'),
+        _update('autoclose-777', 'NEW', 'SELL', 'MARKET', i=777),
+        _fill('autoclose-777', 'SELL', 'MARKET', '0.01', '55000', rp='50', fee='0.22', T=1700000600000, i=777),
+        _algo(tp, 'FINISHED', 'SELL', 'TAKE_PROFIT_MARKET', ai='777', aq='0.01'),
+    ]:
+        tracker.on_message(msg)
+    assert tracker.drain(2)
+
+    tracker.cli.futures_cancel_algo_order.assert_called_once_with(symbol='BTCUSDT', clientAlgoId=sl)
+    tracker.cli.futures_cancel_order.assert_not_called()
+    assert tracker.closed == [{'symbol': 'BTCUSDT', 'side': 'buy', 'entry': 50000.0, 'exit': 55000.0,
+                               'pnl': pytest.approx(49.58), 'ts': 1700000600000}]
+
+    tracker.on_message(_algo(sl, 'CANCELED', 'SELL', 'STOP_MARKET'))
+    assert tracker.brackets == {}
+    assert tracker.orders == {}
+    assert tracker.triggered == {}
+
+
+def test_triggered_order_events_before_algo_update_are_linked(tracker):
+    e, tp, sl = bracket_ids('jkl012')
+    for msg in [
+        _fill(e, 'SELL', 'LIMIT', '1', '100'),
+        _algo(tp, 'NEW', 'BUY', 'TAKE_PROFIT_MARKET'),
+        _algo(sl, 'NEW', 'BUY', 'STOP_MARKET'),
+        _fill('autoclose-888', 'BUY', 'MARKET', '1', '103', rp='-3', i=888),
+    ]:
+        tracker.on_message(msg)
+    assert tracker.closed == []
+    tracker.on_message(_algo(sl, 'TRIGGERED', 'BUY', 'STOP_MARKET', ai='888'))
+    assert tracker.drain(2)
+
+    tracker.cli.futures_cancel_algo_order.assert_called_once_with(symbol='BTCUSDT', clientAlgoId=tp)
+    assert tracker.closed[0]['exit'] == 103.0 and tracker.closed[0]['pnl'] == -3.0
+    assert tracker.closed[0]['side'] == 'sell'
+
+
+def test_unfilled_entry_cancel_removes_protection(tracker):
+    e, tp, sl = bracket_ids('def456')
+    for msg in [
+        _update(e, 'NEW', 'SELL', 'LIMIT'),
+        _algo(tp, 'NEW', 'BUY', 'TAKE_PROFIT_MARKET'),
+        _algo(sl, 'NEW', 'BUY', 'STOP_MARKET'),
+        _update(e, 'EXPIRED', 'SELL', 'LIMIT'),
+    ]:
+        tracker.on_message(msg)
+    assert tracker.drain(2)
+
+    cancelled = [c.kwargs['clientAlgoId'] for c in tracker.cli.futures_cancel_algo_order.call_args_list]
+    assert cancelled == [tp, sl]
+    assert tracker.closed == []
+
+
+def test_other_orders_and_account_updates(tracker):
+    tracker.on_message(_update('manual-1', 'NEW', 'BUY', 'LIMIT'))
+    assert 'manual-1' in tracker.orders
+    tracker.on_message(_fill('manual-1', 'BUY', 'LIMIT', '1', '100'))
+    tracker.on_message({'e': 'ACCOUNT_UPDATE', 'a': {'B': [{'a': 'USDT', 'wb': '1234.5', 'cw': '1000'}]}})
+    assert tracker.orders == {}
+    assert tracker.brackets == {}
+    assert tracker.balances == {'USDT': 1234.5}
+    tracker.cli.futures_cancel_order.assert_not_called()
+    tracker.cli.futures_cancel_algo_order.assert_not_called()
+
+
+def test_stream_renews_expired_listen_key():
+    paths = []
+    e, tp, sl = bracket_ids('ghi789')
+    client = MagicMock()
+    client.futures_stream_get_listen_key.side_effect = ['key1', 'key2']
+    closed = []
+
+    async def handler(ws):
+        paths.append(ws.request.path)
+        if len(paths) == 1:
+            await ws.send(json.dumps(_fill(e, 'BUY', 'LIMIT', '0.01', '50000')))
+            await ws.send(json.dumps({'e': 'listenKeyExpired', 'E': 1700000000000}))
+            await ws.wait_closed()
+            return
+        await ws.send(json.dumps(_algo(sl, 'TRIGGERED', 'SELL', 'STOP_MARKET', ai='555')))
+        await ws.send(json.dumps(_fill('autoclose-555', 'SELL', 'MARKET', '0.01', '49000', rp='-10', i=555)))
+        await ws.wait_closed()
+
+    async def scenario():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            tracker = OrderTracker(client, on_close=closed.append, base_url=f"ws://127.0.0.1:{port}",
+                                   reconnect_delay=0.01)
+            tracker._renew_listen_key()
+            task = asyncio.create_task(tracker.run())
+            for _ in range(300):
+                if closed:
+                    break
+                await asyncio.sleep(0.01)
+            tracker._stopping = True
+            if tracker._ws is not None:
+                await tracker._ws.close()
+            await asyncio.wait_for(task, 5)
+            tracker.drain(2)
+            tracker._actions.shutdown(wait=True)
+            return tracker
+
+    tracker = asyncio.run(scenario())
+
+    assert paths[:2] == ['/key1', '/key2']
+    assert tracker.listen_key == 'key2'
+    client.futures_cancel_algo_order.assert_called_once_with(symbol='BTCUSDT', clientAlgoId=tp)
+    assert closed[0]['pnl'] == -10.0 and closed[0]['side'] == 'buy'
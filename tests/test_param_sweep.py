@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import param_sweep
+from backtest import BacktestConfig, run_backtest
+from param_sweep import grid, random_search, save_shared, load_shared, run_sweep, read_checkpoint
+
+
+def make_klines(n=1_400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volume = rng.uniform(1, 2, n)
+    volume[rng.random(n) < 0.1] *= 20
+    return {'open_time': 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 60_000,
+            'open': close, 'high': close * 1.002, 'low': close * 0.998, 'close': close, 'volume': volume}
+
+
+@pytest.fixture
+def klines():
+    return {f'S{i}USDT': make_klines(seed=i) for i in range(3)}
+
+
+BASE = {'trigger_threshold': None, 'sentiment': 1.0}
+
+
+def test_grid_and_random_search():
+    combos = grid({'spike_factor': [2, 3], 'confirm_period': [1, 2, 3]})
+    assert len(combos) == 6
+    assert {'spike_factor': 3, 'confirm_period': 2} in combos
+
+    space = {'confirm_period': (1, 4), 'buy_threshold': (0.3, 0.7), 'max_daily': [3, 5]}
+    a, b = random_search(space, 20, seed=1), random_search(space, 20, seed=1)
+    assert a == b
+    assert all(isinstance(p['confirm_period'], int) and 1 <= p['confirm_period'] <= 4 for p in a)
+    assert all(0.3 <= p['buy_threshold'] <= 0.7 for p in a)
+
+
+def test_shared_arrays_are_memory_mapped(tmp_path, klines):
+    loaded = load_shared(save_shared(klines, str(tmp_path)))
+    assert list(loaded) == list(klines)
+    for sym, k in klines.items():
+        for col, arr in k.items():
+            np.testing.assert_array_equal(loaded[sym][col], arr)
+            assert isinstance(loaded[sym][col], np.memmap)
+
+
+def test_sweep_matches_direct_backtest(tmp_path, klines):
+    combos = [{**BASE, **p} for p in grid({'confirm_period': [1, 2], 'max_daily': [2, 5]})]
+    table = run_sweep(klines, combos, processes=2, checkpoint=str(tmp_path / 'cp.jsonl'))
+
+    assert len(table) == 4
+    assert table['total_pnl'].is_monotonic_decreasing
+    for _, row in table.iterrows():
+        params = {k: row[k] for k in ('confirm_period', 'max_daily')}
+        expected = run_backtest(klines, BacktestConfig(**BASE, **params)).summary()
+        assert row['total_pnl'] == pytest.approx(expected['total_pnl'])
+        assert row['trades'] == expected['trades']
+
+
+def test_checkpoint_resume_skips_done(tmp_path, klines, monkeypatch):
+    cp = str(tmp_path / 'cp.jsonl')
+    combos = [{**BASE, 'confirm_period': c} for c in (1, 2, 3)]
+    run_sweep(klines, combos[:2], processes=1, checkpoint=cp)
+    with open(cp, 'a') as f:
+        f.write('{"params": {"confirm_per')  # 중단으로 잘린 마지막 줄
+
+    monkeypatch.setattr(param_sweep, 'ProcessPoolExecutor', _CountingPool)
+    _CountingPool.submitted = []
+    table = run_sweep(klines, combos, processes=1, checkpoint=cp)
+
+    assert _CountingPool.submitted == [combos[2]]
+    assert len(table) == 3
+    assert len(read_checkpoint(cp)) == 3
+
+
+class _CountingPool:
+    """제출된 조합만 기록하고 같은 프로세스에서 실행하는 풀"""
+    submitted = []
+
+    def __init__(self, max_workers=None, initializer=None, initargs=()):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, params):
+        from concurrent.futures import Future
+        _CountingPool.submitted.append(params)
+        future = Future()
+        future.set_result(fn(params))
+        return future
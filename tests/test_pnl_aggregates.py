@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import pytest
+
+from pnl_aggregates import PnlAggregates
+from trade_store import TradeStore
+
+
+def ms(text):
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S').timestamp() * 1000
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+    def __call__(self):
+        return self.now
+
+
+TRADES = [
+    {'symbol': 'BTCUSDT', 'pnl': 10.0, 'ts': ms('2024-01-01 10:00:00')},
+    {'symbol': 'ETHUSDT', 'pnl': -4.0, 'ts': ms('2024-01-01 11:00:00')},
+    {'symbol': 'BTCUSDT', 'pnl': -3.0, 'ts': ms('2024-01-01 12:00:00')},
+    {'symbol': 'BTCUSDT', 'pnl': 5.0, 'ts': ms('2024-01-02 09:00:00')},
+]
+
+
+def test_day_symbol_and_total_stats():
+    agg = PnlAggregates(clock=FakeClock(ms('2024-01-02 10:00:00') / 1000))
+    for t in TRADES:
+        agg.add(t)
+
+    day = agg.day('2024-01-01')
+    assert (day['trades'], day['wins'], day['pnl']) == (3, 1, 3.0)
+    assert day['win_rate'] == pytest.approx(1 / 3)
+    assert day['max_drawdown'] == 7.0
+    assert day['loss_streak'] == 2
+    assert agg.day()['trades'] == 1            # 오늘 (2024-01-02)
+    assert agg.day('2023-12-31')['trades'] == 0
+    assert agg.symbol('BTCUSDT')['pnl'] == 12.0
+    assert agg.total.loss_streak == 0
+    assert agg.total.max_drawdown == 7.0
+
+
+def test_rolling_window_expires_old_trades():
+    clock = FakeClock(ms('2024-01-01 12:30:00') / 1000)
+    agg = PnlAggregates(window=3600 * 3, clock=clock)
+    for t in TRADES[:3]:
+        agg.add(t)
+    r = agg.rolling()
+    assert (r['trades'], r['pnl'], r['max_drawdown']) == (3, 3.0, 7.0)
+
+    clock.now = ms('2024-01-01 13:30:00') / 1000   # 10:00 거래는 구간 밖
+    r = agg.rolling()
+    assert (r['trades'], r['wins'], r['pnl'], r['max_drawdown']) == (2, 0, -7.0, 7.0)
+
+
+def test_snapshot_roundtrip_and_replay_from_store(tmp_path):
+    path = str(tmp_path / 'pnl.json')
+    clock = FakeClock(ms('2024-01-02 10:00:00') / 1000)
+    store = TradeStore(str(tmp_path / 'trades.db'))
+    agg = PnlAggregates(path, snapshot_every=100, clock=clock)
+    for t in TRADES[:3]:
+        store.add({**t, 'side': 'buy'})
+        agg.add(t)
+    agg.save()
+    # 스냅샷 이후 기록됐지만 스냅샷에는 없는 거래
+    store.add({**TRADES[3], 'side': 'buy'})
+    store.flush(timeout=5)
+
+    restored = PnlAggregates(path, clock=clock).restore(store)
+    store.stop()
+    agg.add(TRADES[3])
+    assert restored.day('2024-01-01') == agg.day('2024-01-01')
+    assert restored.day('2024-01-02') == agg.day('2024-01-02')
+    assert restored.symbol('BTCUSDT') == agg.symbol('BTCUSDT')
+    assert restored.rolling() == agg.rolling()
+
+
+def test_snapshot_written_every_n_trades(tmp_path):
+    path = tmp_path / 'pnl.json'
+    agg = PnlAggregates(str(path), snapshot_every=2, clock=FakeClock(ms('2024-01-02 10:00:00') / 1000))
+    agg.add(TRADES[0])
+    assert not path.exists()
+    agg.add(TRADES[1])
+    assert path.exists()
+
+
+def test_restore_saves_snapshot_once_after_replay(tmp_path, monkeypatch):
+    path = str(tmp_path / 'pnl.json')
+    store = TradeStore(str(tmp_path / 'trades.db'))
+    for t in TRADES:
+        store.add({**t, 'side': 'buy'})
+    store.flush(timeout=5)
+
+    agg = PnlAggregates(path, snapshot_every=1, clock=FakeClock(ms('2024-01-02 10:00:00') / 1000))
+    saves = []
+    real_save = agg.save
+    monkeypatch.setattr(agg, 'save', lambda p=None: (saves.append(p), real_save(p)))
+    agg.restore(store)
+    store.stop()
+    assert len(saves) == 1
+    assert agg.snapshot_path == path
+    assert PnlAggregates(path).load() and agg.total.trades == 4
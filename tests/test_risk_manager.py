@@ -43,6 +43,13 @@ def test_register(risk_manager):
     assert risk_manager.trades == 2
     assert 'ETHUSDT' in risk_manager.last
 
+def test_record_result_updates_only_streak(risk_manager):
+    assert risk_manager.try_acquire('BTCUSDT')
+    risk_manager.record_result(-100)
+    assert (risk_manager.trades, risk_manager.streak) == (1, 1)
+    risk_manager.record_result(100)
+    assert (risk_manager.trades, risk_manager.streak) == (1, 0)
+
 def test_size_leverage(risk_manager):
     # Test with small price difference (<=1%)
     qty, lev = risk_manager.size_leverage(10000, 100, 99)
@@ -75,4 +82,126 @@ def test_daily_reset(mock_time, risk_manager):
     # Should reset counters
     assert risk_manager.can_trade('BTCUSDT') == True
     assert risk_manager.trades == 0
-    assert risk_manager.streak == 0 
\ No newline at end of file
+    assert risk_manager.streak == 0 
+
+
+def test_limits_read_from_aggregates():
+    from pnl_aggregates import PnlAggregates
+    now = [1_700_000_000.0]
+    agg = PnlAggregates(clock=lambda: now[0])
+    rm = RiskManager(max_daily=5, max_streak=2, cooldown_m=30, clock=lambda: now[0], aggregates=agg)
+
+    assert rm.can_trade('BTCUSDT')
+    agg.add({'symbol': 'BTCUSDT', 'pnl': -1})
+    agg.add({'symbol': 'ETHUSDT', 'pnl': -1})
+    assert not rm.can_trade('XRPUSDT')  # 연속 손실 한도
+
+    # 재시작해도 같은 집계를 읽으므로 한도가 유지됨
+    assert not RiskManager(max_streak=2, clock=lambda: now[0], aggregates=agg).can_trade('XRPUSDT')
+
+    now[0] += 86400  # 다음 날에는 다시 거래 가능
+    assert rm.can_trade('XRPUSDT')
+
+def test_daily_limit_counts_opened_trades_with_aggregates(tmp_path):
+    from pnl_aggregates import PnlAggregates
+    path = str(tmp_path / 'risk.json')
+    now = [1_700_000_000.0]
+    agg = PnlAggregates(clock=lambda: now[0])
+    rm = RiskManager(max_daily=2, max_streak=2, cooldown_m=1, clock=lambda: now[0], aggregates=agg,
+                     snapshot_path=path)
+
+    # 아직 청산된 거래가 없어도 연 거래 수로 한도를 셈
+    assert rm.try_acquire('BTCUSDT') and rm.try_acquire('ETHUSDT')
+    assert not rm.try_acquire('XRPUSDT')
+    assert agg.limits(agg.day_of(now[0] * 1000)) == (0, 0)
+
+    # 재시작해도 스냅샷의 그날 연 거래 수가 유지됨
+    restored = RiskManager(max_daily=2, clock=lambda: now[0], aggregates=agg, snapshot_path=path)
+    assert restored.trades == 2 and not restored.can_trade('XRPUSDT')
+
+    # 청산 손익은 연속 손실에만 반영
+    now[0] += 86400
+    agg.add({'symbol': 'BTCUSDT', 'pnl': -1})
+    assert rm.can_trade('XRPUSDT') and rm.trades == 0 and rm.streak == 1
+    agg.add({'symbol': 'ETHUSDT', 'pnl': -1})
+    assert not rm.can_trade('XRPUSDT') and rm.trades == 0
+
+def test_expired_cooldowns_are_dropped():
+    now = [1000.0]
+    rm = RiskManager(cooldown_m=1, max_daily=10_000, max_streak=10_000, clock=lambda: now[0])
+    for i in range(1000):
+        rm.register(1, f'S{i}USDT')
+    assert not rm.can_trade('S0USDT')
+    assert len(rm.last) == 1000
+
+    now[0] += 61
+    assert rm.can_trade('S0USDT')
+    assert rm.last == {}
+    assert rm._expiry == []
+
+    # 다시 등록한 심볼의 쿨다운은 이전 만료 항목에 지워지지 않음
+    rm.register(1, 'BTCUSDT')
+    now[0] += 30
+    rm.register(1, 'BTCUSDT')
+    now[0] += 31
+    assert not rm.can_trade('BTCUSDT')
+
+def test_snapshot_survives_restart(tmp_path):
+    path = str(tmp_path / 'risk.json')
+    now = [1000.0]
+    rm = RiskManager(max_daily=5, max_streak=2, cooldown_m=30, clock=lambda: now[0], snapshot_path=path)
+    rm.register(-1, 'BTCUSDT')
+    rm.register(-1, 'ETHUSDT')
+
+    restored = RiskManager(max_daily=5, max_streak=2, cooldown_m=30, clock=lambda: now[0], snapshot_path=path)
+    assert (restored.trades, restored.streak) == (2, 2)
+    assert not restored.can_trade('XRPUSDT')
+    restored.streak = 0
+    assert not restored.can_trade('BTCUSDT')  # 쿨다운 유지
+    now[0] += 31 * 60
+    assert restored.can_trade('BTCUSDT')
+
+def test_corrupt_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'risk.json'
+    path.write_text('{broken')
+    rm = RiskManager(snapshot_path=str(path))
+    assert rm.trades == 0 and rm.can_trade('BTCUSDT')
+
+def test_concurrent_register_is_consistent():
+    import threading
+    rm = RiskManager(max_daily=10_000)
+    def worker(n):
+        for i in range(500):
+            rm.register(1, f'S{n}_{i}')
+            rm.can_trade(f'S{n}_{i}')
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert rm.trades == 4000
+    assert len(rm.last) == 4000
+
+def test_try_acquire_reserves_slots_atomically():
+    import threading
+    rm = RiskManager(max_daily=5, max_streak=3)
+    barrier = threading.Barrier(8)
+    acquired = []
+    def worker(n):
+        barrier.wait()
+        for i in range(20):
+            if rm.try_acquire(f'S{n}_{i}'):
+                acquired.append(f'S{n}_{i}')
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(acquired) == 5 and rm.trades == 5
+    assert not rm.can_trade('NEWUSDT')
+
+    # 주문이 나가지 않은 예약은 되돌려 자리와 쿨다운을 반환
+    rm.release(acquired[0])
+    assert rm.trades == 4
+    assert rm.can_trade(acquired[0])
+    assert rm.try_acquire(acquired[0])
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+import sentiment_analysis
+from sentiment_analysis import sentiment_score, compound_scores, normalize, clear_cache
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+def test_normalize_dedupes_retweets_and_links():
+    original = "Bitcoin is going to the moon!  https://t.co/abc123"
+    assert normalize("RT @whale: " + original) == normalize(original)
+    assert normalize(original) == "Bitcoin is going to the moon!"
+
+def test_scores_match_vader():
+    texts = ["I love this coin", "This is a terrible scam", "neutral statement"]
+    expected = [sentiment_analysis._analyzer.polarity_scores(t)['compound'] for t in texts]
+    assert compound_scores(texts) == pytest.approx(expected)
+    assert sentiment_score(texts) == pytest.approx(sum(expected) / 3)
+    assert sentiment_score([]) == 0.0
+
+def test_identical_and_retweeted_text_scored_once():
+    texts = ["Great gains today", "RT @bob: Great gains today", "Great gains today"]
+    with patch.object(sentiment_analysis._analyzer, 'polarity_scores',
+                      wraps=sentiment_analysis._analyzer.polarity_scores) as spy:
+        first = compound_scores(texts)
+        second = compound_scores(texts)
+    assert spy.call_count == 1
+    assert first == second
+    assert len(set(first)) == 1
+
+def test_lru_evicts_oldest(monkeypatch):
+    monkeypatch.setattr(sentiment_analysis, 'CACHE_SIZE', 2)
+    compound_scores(["one good", "two bad", "three ok"])
+    assert len(sentiment_analysis._cache) == 2
+    assert sentiment_analysis._key("one good") not in sentiment_analysis._cache
+
+def test_process_pool_batch_matches_serial(monkeypatch):
+    texts = [f"tweet number {i} is {'great' if i % 2 else 'awful'}" for i in range(40)]
+    serial = [sentiment_analysis._analyzer.polarity_scores(t)['compound'] for t in texts]
+    monkeypatch.setattr(sentiment_analysis, 'PROCESS_BATCH_MIN', 10)
+    assert compound_scores(texts, processes=2) == pytest.approx(serial)
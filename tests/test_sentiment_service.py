@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+
+from sentiment_service import SentimentService, TokenBucket
+
+TWEETS = [
+    {'id': '1', 'text': 'Huge breakout for #BTC, great gains today'},
+    {'id': '2', 'text': '#ETH network upgrade is awesome'},
+    {'id': '3', 'text': 'Terrible crash, #BTC and #ETH are awful'},
+    {'id': '4', 'text': 'Nothing about the watched coins #DOGE'},
+]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def fake_twitter():
+    state = {'queries': [], 'status': 200, 'remaining': '170'}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = parse_qs(urlparse(self.path).query)
+            state['queries'].append(params['query'][0])
+            assert self.headers['Authorization'] == 'Bearer test-token'
+            body = json.dumps({'data': TWEETS} if state['status'] == 200 else {'title': 'Too Many Requests'})
+            self.send_response(state['status'])
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('x-rate-limit-remaining', state['remaining'])
+            self.send_header('x-rate-limit-reset', '0')
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    state['url'] = f"http://127.0.0.1:{server.server_address[1]}/2/tweets/search/recent"
+    yield state
+    server.shutdown()
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def service(fake_twitter, clock):
+    return SentimentService(bearer_token='test-token', url=fake_twitter['url'], ttl=900, clock=clock)
+
+def test_batched_query_split_per_asset(service, fake_twitter):
+    result = service.get(['BTC', 'ETH'])
+
+    assert fake_twitter['queries'] == ['(#BTC OR #ETH) lang:en']
+    assert [t['id'] for t in result['BTC'][0]] == ['1', '3']
+    assert [t['id'] for t in result['ETH'][0]] == ['2', '3']
+    assert -1.0 <= result['BTC'][1] <= 1.0
+
+def test_cache_hits_within_ttl_and_refresh_after(service, fake_twitter, clock):
+    service.get(['BTC', 'ETH'])
+    service.tweets('BTC')
+    service.score('eth')
+    assert len(fake_twitter['queries']) == 1
+    assert service.stats['hits'] == 2
+
+    clock.now = 901
+    service.tweets('BTC')
+    assert fake_twitter['queries'][-1] == '(#BTC) lang:en'
+
+def test_low_budget_serves_cached_results(service, fake_twitter, clock):
+    first = service.get(['BTC'])
+    fake_twitter['remaining'] = '3'
+    clock.now = 901
+    service.get(['ETH'])          # request goes out, server reports 3 calls left
+    clock.now = 902
+    again = service.get(['BTC'])  # stale, but budget is below reserve
+
+    assert len(fake_twitter['queries']) == 2
+    assert service.stats['budget_skips'] == 1
+    assert again['BTC'] == first['BTC']
+
+def test_rate_limited_response_keeps_cache(service, fake_twitter):
+    fake_twitter['status'] = 429
+    assert service.get(['BTC'])['BTC'] == ([], 0.0)
+    assert service.bucket.available() < 1
+
+def test_missing_token_is_negatively_cached(fake_twitter, clock, monkeypatch, caplog):
+    monkeypatch.delenv('TWITTER_BEARER_TOKEN', raising=False)
+    service = SentimentService(url=fake_twitter['url'], ttl=900, clock=clock)
+    with caplog.at_level('ERROR'):
+        for _ in range(5):
+            assert service.get(['BTC'])['BTC'] == ([], 0.0)
+    assert len(caplog.records) == 1          # ttl 동안 재시도/로그 없음
+    assert service.stats['hits'] == 4
+    assert fake_twitter['queries'] == []
+
+    clock.now = 901
+    monkeypatch.setenv('TWITTER_BEARER_TOKEN', 'test-token')
+    service.get(['BTC'])
+    assert fake_twitter['queries'] == ['(#BTC) lang:en']
+
+def test_queries_respect_max_length(service):
+    assets = [f"COIN{i}" for i in range(100)]
+    queries = service.build_queries(assets)
+    assert len(queries) > 1
+    assert all(len(q) <= 512 for _, q in queries)
+    assert [a for chunk, _ in queries for a in chunk] == assets
+
+def test_token_bucket_refills(clock):
+    bucket = TokenBucket(capacity=2, window=10, clock=clock)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 5
+    assert bucket.try_acquire()
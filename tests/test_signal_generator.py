@@ -7,7 +7,7 @@ from unittest.mock import patch, MagicMock
 import pandas as pd
 import numpy as np
 
-from signal_generator import detect_spike, compute_score, get_signal
+from signal_generator import detect_spike, compute_score, get_signal, score_batch, screen, Screener
 
 @pytest.fixture
 def sample_dataframe():
@@ -30,25 +30,28 @@ def test_detect_spike(sample_dataframe):
     no_spike_df['volume'] = [100, 200, 300, 400, 500, 600]
     assert detect_spike(no_spike_df) == False
 
-@patch('signal_generator.get_klines')
-@patch('signal_generator.get_tweets')
-@patch('signal_generator.sentiment_score')
-@patch('signal_generator.apply_indicators')
-def test_compute_score(mock_apply_indicators, mock_sentiment_score, mock_get_tweets, mock_get_klines, sample_dataframe):
+def _arrays(df):
+    return {'close': df['close'].to_numpy(float), 'volume': df['volume'].to_numpy(float)}
+
+def _indicators(df):
+    return {c: df[c].to_numpy(float)[np.newaxis, :] for c in ['rsi', 'bb_lower', 'bb_upper', 'macd', 'macd_sig']}
+
+@patch('signal_generator.get_kline_arrays')
+@patch('signal_generator.sentiment_service')
+@patch('signal_generator.batch_indicators')
+def test_compute_score(mock_batch_indicators, mock_service, mock_get_arrays, sample_dataframe):
     # Setup mocks
-    mock_apply_indicators.return_value = sample_dataframe
-    mock_sentiment_score.return_value = 0.3  # Positive sentiment
-    mock_get_tweets.return_value = ['positive tweet']
+    mock_get_arrays.return_value = _arrays(sample_dataframe)
+    mock_batch_indicators.return_value = _indicators(sample_dataframe)
+    mock_service.get.return_value = {'BTC': (['positive tweet'], 0.3)}  # Positive sentiment (cached score)
     
     # Verify mock setup
-    mock_get_tweets.assert_not_called()
-    mock_sentiment_score.assert_not_called()
+    mock_service.get.assert_not_called()
     
     score = compute_score('BTCUSDT')
     
-    # Verify mock calls
-    mock_get_tweets.assert_called_once_with('BTC')  # symbol[:-4]
-    mock_sentiment_score.assert_called_once_with(['positive tweet'])
+    # Verify mock calls - the service's cached score is used as is
+    mock_service.get.assert_called_once_with(['BTC'])  # symbol[:-4]
     
     # Calculate expected score
     # ta_score = (1 + 1) / 3 = 0.666... (1 for RSI < 30 and close < bb_lower, 1 for MACD > MACD_sig)
@@ -59,6 +62,72 @@ def test_compute_score(mock_apply_indicators, mock_sentiment_score, mock_get_twe
     # Verify the score calculation with a small tolerance for floating point imprecision
     assert abs(score - expected_score) < 0.0001, f"Expected score {expected_score}, got {score}"
 
+@patch('signal_generator.get_kline_arrays')
+@patch('signal_generator.get_sentiment')
+@patch('signal_generator.batch_indicators')
+def test_compute_score_skips_warmup_nans(mock_batch_indicators, mock_get_sentiment, mock_get_arrays, sample_dataframe):
+    df = sample_dataframe.copy()
+    df['macd_sig'] = np.nan
+    mock_get_arrays.return_value = _arrays(df)
+    mock_batch_indicators.return_value = _indicators(df)
+
+    assert compute_score('BTCUSDT') == 0.0
+    mock_get_sentiment.assert_not_called()
+
+def make_universe(symbols=50, candles=34, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(symbols, candles)), axis=1))
+    volumes = rng.uniform(100, 200, size=(symbols, candles))
+    volumes[::3, -1] *= 10  # every third symbol spikes
+    return closes, volumes
+
+@patch('signal_generator.get_sentiment', return_value=([], 0.0))
+@patch('signal_generator.get_kline_arrays')
+def test_score_batch_matches_compute_score(mock_get_arrays, mock_get_sentiment):
+    closes, volumes = make_universe()
+
+    batch, detail = score_batch(closes, volumes)
+
+    assert detail['spike'].sum() == len(range(0, 50, 3))
+    for i in range(len(closes)):
+        mock_get_arrays.return_value = {'close': closes[i], 'volume': volumes[i]}
+        assert compute_score(f'S{i}USDT') == pytest.approx(batch[i])
+
+@patch('signal_generator.sentiment_service')
+@patch('signal_generator.get_kline_arrays')
+def test_screen_scores_universe_and_batches_sentiment_for_spikes(mock_arrays, mock_service):
+    closes, volumes = make_universe(symbols=6)
+    symbols = [f'S{i}USDT' for i in range(6)]
+    arrays = {sym: {'close': closes[i], 'volume': volumes[i]} for i, sym in enumerate(symbols)}
+    mock_arrays.side_effect = lambda sym, limit: arrays[sym]
+    mock_service.get.return_value = {'S0': ([], 0.5), 'S3': ([], 0.5)}
+
+    scores = screen(symbols)
+
+    assert set(scores) == set(symbols)
+    mock_service.get.assert_called_once_with(['S0', 'S3'])  # one batched lookup for spiking symbols
+    expected, _ = score_batch(closes, volumes, np.array([0.5, 0, 0, 0.5, 0, 0]))
+    assert [scores[s] for s in symbols] == pytest.approx(list(expected))
+
+@patch('signal_generator.screen')
+def test_screener_confirms_over_cycles_and_resets_on_zero(mock_screen):
+    signals = []
+    screener = Screener(lambda: ['AAAUSDT', 'BBBUSDT', 'CCCUSDT'], on_signal=lambda s, sig: signals.append((s, sig)))
+    cycles = [{'AAAUSDT': 0.8, 'BBBUSDT': 0.8, 'CCCUSDT': 0.0},
+              {'AAAUSDT': 0.8, 'BBBUSDT': 0.0, 'CCCUSDT': 0.0},
+              {'AAAUSDT': 0.8, 'BBBUSDT': 0.8, 'CCCUSDT': 0.0}]
+    for scores in cycles:
+        mock_screen.return_value = scores
+        screener.run_once()
+
+    # 3주기 연속 임계값을 넘은 심볼만 전달, 중간에 0점이 끼면 확정되지 않음
+    assert signals == [('AAAUSDT', 'buy')]
+    assert screener.scores == cycles[-1]
+    import signal_generator
+    assert 'CCCUSDT' not in signal_generator._history
+    for sym in ('AAAUSDT', 'BBBUSDT'):
+        signal_generator._history.pop(sym)
+
 def test_get_signal():
     # Test buy signal
     symbol = 'BTCUSDT'
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from unittest.mock import MagicMock
+
+from symbol_meta import SymbolMeta, SymbolMetaCache
+from risk_manager import RiskManager
+
+
+def _info(symbol='BTCUSDT', status='TRADING', tick='0.10', step='0.001', min_qty='0.001', notional='100'):
+    return {
+        'symbol': symbol,
+        'status': status,
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'tickSize': tick, 'minPrice': '556.80', 'maxPrice': '4529764'},
+            {'filterType': 'LOT_SIZE', 'stepSize': step, 'minQty': min_qty, 'maxQty': '1000'},
+            {'filterType': 'MIN_NOTIONAL', 'notional': notional},
+        ],
+    }
+
+
+def test_parse_filters():
+    meta = SymbolMeta.from_exchange_info(_info())
+    assert meta.tick == 0.1 and meta.step == 0.001
+    assert meta.price_decimals == 1 and meta.qty_decimals == 3
+    assert meta.min_qty == 0.001 and meta.max_qty == 1000
+    assert meta.min_notional == 100
+
+
+def test_price_and_qty_quantization():
+    meta = SymbolMeta.from_exchange_info(_info())
+    # 0.3 / 0.1 = 2.9999999999999996 같은 부동소수 오차에도 정확한 배수 유지
+    assert meta.price(50000.3, 'down') == 50000.3
+    assert meta.price(50000.3, 'up') == 50000.3
+    assert meta.price(50000.34) == 50000.3
+    assert meta.price(50000.34, 'up') == 50000.4
+    assert meta.price(50000.36, 'down') == 50000.3
+    assert meta.qty(0.3) == 0.3
+    assert meta.qty(0.0129) == 0.012
+    assert meta.qty(5000) == 1000
+    assert meta.price(1.0) == 556.8  # minPrice로 제한
+
+
+def test_min_notional_validation():
+    meta = SymbolMeta.from_exchange_info(_info())
+    assert meta.is_valid(0.002, 50000)
+    assert not meta.is_valid(0.001, 50000)   # 50 USDT < 100
+    assert not meta.is_valid(0.0, 50000)
+
+
+def test_single_fetch_shared_by_symbols_and_filters():
+    fetch = MagicMock(return_value={'symbols': [_info(), _info('XRPUSDT', status='HALT'),
+                                                {'symbol': 'BADUSDT', 'status': 'TRADING'}]})
+    cache = SymbolMetaCache(fetch)
+
+    assert cache.trading_symbols() == ['BTCUSDT', 'BADUSDT']
+    assert cache.get('XRPUSDT') is not None
+    assert cache.get('BADUSDT').tick == 0   # 필터가 없으면 반올림 없이 통과
+    assert cache.get('NOPEUSDT') is None
+    fetch.assert_called_once()
+
+
+def test_background_refresh_keeps_previous_on_error():
+    calls = []
+    refreshed = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError("down")
+        if len(calls) >= 3:
+            refreshed.set()
+        return {'symbols': [_info(tick='0.10' if len(calls) == 1 else '0.01')]}
+
+    cache = SymbolMetaCache(fetch, refresh_interval=0.01)
+    assert cache.get('BTCUSDT').tick == 0.1
+    cache.start()
+    try:
+        assert refreshed.wait(2)
+    finally:
+        cache.stop()
+    assert cache.get('BTCUSDT').tick == 0.01
+
+
+def test_size_leverage_floors_to_step():
+    meta = SymbolMeta.from_exchange_info(_info())
+    rm = RiskManager(risk=0.02)
+    qty, lev = rm.size_leverage(1000, 50000, 49700, meta)
+    assert qty == 0.066   # 20 / 300 = 0.0666.. -> 내림
+    assert lev == 10
+    assert qty * 300 <= 1000 * 0.02
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from technical_analysis import apply_indicators, batch_indicators, required_candles, IndicatorEngine, IndicatorState, LOOKBACK
+
+COLUMNS = ['rsi', 'macd', 'macd_sig', 'bb_upper', 'bb_mid', 'bb_lower']
+TOLERANCE = 1e-9  # relative, documented in IndicatorState
+
+@pytest.fixture
+def recorded_closes():
+    # Fixed-seed random walk standing in for a recorded 1m close series
+    rng = np.random.default_rng(42)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, 300)))
+
+def test_apply_indicators_does_not_mutate_input(recorded_closes):
+    df = pd.DataFrame({'open_time': pd.date_range('2024-01-01', periods=300, freq='min'),
+                       'close': recorded_closes})
+    out = apply_indicators(df)
+    assert list(df.columns) == ['open_time', 'close']
+    assert set(COLUMNS) <= set(out.columns)
+    assert out.index.equals(df.index)
+
+def test_incremental_matches_ta(recorded_closes):
+    expected = apply_indicators(pd.DataFrame({'close': recorded_closes}))
+    state = IndicatorState()
+    rows = [state.update(c) for c in recorded_closes]
+    actual = pd.DataFrame(rows)
+
+    for col in COLUMNS:
+        exp, act = expected[col].to_numpy(), actual[col].to_numpy()
+        assert np.array_equal(np.isnan(exp), np.isnan(act)), col
+        mask = ~np.isnan(exp)
+        np.testing.assert_allclose(act[mask], exp[mask], rtol=TOLERANCE, err_msg=col)
+
+def test_peek_does_not_change_state(recorded_closes):
+    engine = IndicatorEngine()
+    engine.seed('BTCUSDT', recorded_closes[:-1])
+    peeked = engine.peek('BTCUSDT', recorded_closes[-1])
+    peeked_again = engine.peek('BTCUSDT', recorded_closes[-1])
+    committed = engine.update('BTCUSDT', recorded_closes[-1])
+    assert peeked == peeked_again == committed
+
+def test_lookback_matches_first_valid_value(recorded_closes):
+    out = apply_indicators(pd.DataFrame({'close': recorded_closes}))
+    first_valid = {
+        'rsi': out['rsi'].first_valid_index() + 1,
+        'macd': out['macd_sig'].first_valid_index() + 1,
+        'bb': out['bb_upper'].first_valid_index() + 1,
+    }
+    assert first_valid == LOOKBACK
+    assert required_candles() == 34
+    assert required_candles('rsi', 'bb') == 20
+
+    # Exactly required_candles() candles are enough for every indicator
+    out = apply_indicators(pd.DataFrame({'close': recorded_closes[:required_candles()]}))
+    assert not out[COLUMNS].iloc[-1].isna().any()
+
+def test_batch_indicators_match_apply_indicators():
+    rng = np.random.default_rng(7)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, size=(5, 60)), axis=1))
+    batch = batch_indicators(closes)
+    for i, row in enumerate(closes):
+        expected = apply_indicators(pd.DataFrame({'close': row}))
+        for col in COLUMNS:
+            np.testing.assert_allclose(batch[col][i], expected[col].to_numpy(), rtol=TOLERANCE, err_msg=col)
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import pytest
+
+from tracing import Histogram, Tracer, BUCKETS, METRIC_NAME
+
+
+def test_histogram_quantiles():
+    h = Histogram()
+    for _ in range(90):
+        h.observe(0.002)     # (0.001, 0.0025] 버킷
+    for _ in range(10):
+        h.observe(0.4)       # (0.25, 0.5] 버킷
+    assert h.count == 100
+    assert 0.001 < h.quantile(0.5) <= 0.0025
+    assert 0.25 < h.quantile(0.99) <= 0.4
+    assert h.max == 0.4
+    h.observe(100.0)         # +Inf 버킷은 최대값으로
+    assert h.quantile(1.0) == 100.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_spans_and_marks(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('tracing.time.perf_counter', lambda: now[0])
+    tracer = Tracer(enabled=True)
+
+    with tracer.span('order_submit'):
+        now[0] += 0.05
+    tracer.mark('BTCUSDT')
+    now[0] += 0.2
+    assert tracer.observe_since('BTCUSDT', 'tick_to_order') == pytest.approx(0.2)
+    assert tracer.observe_since('BTCUSDT', 'tick_to_order') is None  # mark는 한 번만 사용
+    tracer.mark('ETHUSDT', at=now[0] - 0.1)                             # 감지 시각을 나중에 기록
+    assert tracer.observe_since('ETHUSDT', 'tick_to_order') == pytest.approx(0.1)
+
+    @tracer.traced('signal')
+    def work():
+        now[0] += 0.01
+        return 'buy'
+    assert work() == 'buy'
+
+    s = tracer.summary()
+    assert set(s) == {'order_submit', 'signal', 'tick_to_order'}
+    assert s['order_submit']['count'] == 1
+    assert s['order_submit']['max_ms'] == pytest.approx(50)
+    assert s['tick_to_order']['count'] == 2
+    assert s['tick_to_order']['max_ms'] == pytest.approx(200)
+    assert 100 < s['tick_to_order']['p99_ms'] <= 200     # 버킷 (0.1, 0.25] 안에서 보간
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span('signal'):
+        pass
+    tracer.mark('X')
+    assert tracer.observe_since('X', 'tick_to_order') is None
+    assert tracer.traced('a')(lambda: 1)() == 1
+    assert tracer.summary() == {}
+    tracer.start_exporter(path=None)
+    assert tracer._thread is None
+
+
+def test_prometheus_export(tmp_path):
+    tracer = Tracer(enabled=True)
+    for v in (0.003, 0.003, 0.7):
+        tracer.observe('leverage', v)
+
+    text = tracer.prometheus()
+    lines = text.splitlines()
+    assert f"# TYPE {METRIC_NAME} histogram" in lines
+    assert f'{METRIC_NAME}_bucket{{stage="leverage",le="0.0025"}} 0' in lines
+    assert f'{METRIC_NAME}_bucket{{stage="leverage",le="0.005"}} 2' in lines
+    assert f'{METRIC_NAME}_bucket{{stage="leverage",le="+Inf"}} 3' in lines
+    assert f'{METRIC_NAME}_count{{stage="leverage"}} 3' in lines
+    assert sum(1 for l in lines if '_bucket' in l) == len(BUCKETS) + 1
+
+    path = tmp_path / 'metrics.prom'
+    tracer.write(str(path))
+    assert path.read_text() == text
+
+    port = tracer.serve(0, host='127.0.0.1')
+    try:
+        res = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+        assert res.status_code == 200 and res.text == text
+        assert requests.get(f"http://127.0.0.1:{port}/other", timeout=5).status_code == 404
+    finally:
+        tracer.stop()
@@ -2,9 +2,12 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import itertools
 import pytest
 from unittest.mock import patch, MagicMock
 
+from binance.exceptions import BinanceAPIException
+
 from trade_executor import TradeExecutor
 
 @pytest.fixture
@@ -36,33 +39,184 @@ def test_enter_limit(trade_executor):
         )
         assert result == {'orderId': 12345}
 
-def test_place_oco(trade_executor):
-    with patch.object(trade_executor.cli, 'futures_place_batch_orders') as mock_oco:
-        trade_executor.place_oco('BTCUSDT', 'SELL', 0.1, 50000, 55000)
-        mock_oco.assert_called_once_with(
-            batchOrders=[
-                {
-                    'symbol': 'BTCUSDT',
-                    'side': 'SELL',
-                    'type': 'LIMIT',
-                    'timeInForce': 'GTC',
-                    'quantity': 0.1,
-                    'price': 55000
-                },
-                {
-                    'symbol': 'BTCUSDT',
-                    'side': 'SELL',
-                    'type': 'STOP_MARKET',
-                    'timeInForce': 'GTC',
-                    'quantity': 0.1,
-                    'stopPrice': 50000
-                }
-            ]
-        )
+def _executor(rows=None):
+    from trade_executor import LeverageState
+    client = MagicMock()
+    client.futures_position_information.return_value = rows or []
+    return TradeExecutor(client=client, state=LeverageState()), client
+
+def test_set_leverage_skips_unchanged_state():
+    ex, client = _executor()
+    ex.set_leverage('BTCUSDT', 10)
+    ex.set_leverage('BTCUSDT', 10)
+    client.futures_change_margin_type.assert_called_once()
+    client.futures_change_leverage.assert_called_once()
+
+    ex.set_leverage('BTCUSDT', 5)
+    client.futures_change_margin_type.assert_called_once()
+    client.futures_change_leverage.assert_called_with(symbol='BTCUSDT', leverage=5)
+
+def test_sync_state_seeds_from_position_risk():
+    ex, client = _executor([
+        {'symbol': 'BTCUSDT', 'marginType': 'isolated', 'leverage': '10'},
+        {'symbol': 'ETHUSDT', 'marginType': 'cross', 'leverage': '20'},
+    ])
+    assert ex.sync_state() == 2
+
+    ex.set_leverage('BTCUSDT', 10)
+    client.futures_change_margin_type.assert_not_called()
+    client.futures_change_leverage.assert_not_called()
+
+    ex.set_leverage('ETHUSDT', 20)
+    client.futures_change_margin_type.assert_called_once_with(symbol='ETHUSDT', marginType='ISOLATED')
+    client.futures_change_leverage.assert_not_called()
+
+def test_sync_state_falls_back_to_symbol_config():
+    ex, client = _executor([{'symbol': 'BTCUSDT', 'positionAmt': '0.1'}])
+    client.futures_symbol_config.return_value = [{'symbol': 'BTCUSDT', 'marginType': 'ISOLATED', 'leverage': 5}]
+    assert ex.sync_state() == 1
+    ex.set_leverage('BTCUSDT', 5)
+    client.futures_change_leverage.assert_not_called()
+
+    # 열린 포지션이 없으면 positionRisk는 빈 목록
+    ex, client = _executor([])
+    client.futures_symbol_config.return_value = [{'symbol': 'ETHUSDT', 'marginType': 'CROSSED', 'leverage': 20}]
+    assert ex.sync_state() == 1
+
+def test_margin_no_change_error_is_cached_and_failures_invalidate():
+    from binance.exceptions import BinanceAPIException
+    def api_error(code):
+        resp = MagicMock(status_code=400, text=f'{{"code": {code}, "msg": "x"}}')
+        return BinanceAPIException(resp, 400, resp.text)
+
+    ex, client = _executor()
+    client.futures_change_margin_type.side_effect = api_error(-4046)
+    ex.set_leverage('BTCUSDT', 10)
+    assert ex.state.get('BTCUSDT', 'margin') == 'ISOLATED'
+
+    client.futures_change_leverage.side_effect = api_error(-1000)
+    with pytest.raises(BinanceAPIException):
+        ex.set_leverage('BTCUSDT', 5)
+    assert ex.state.get('BTCUSDT', 'leverage') is None
+    assert ex.state.get('BTCUSDT', 'margin') is None
+
+
+class FakeExchange:
+    """주문/algoOrder/취소/조회를 흉내 내는 로컬 거래소 (주문 타입별 거부 규칙 지정 가능)"""
+
+    def __init__(self, reject=None, fill_on_place=0.0):
+        self.reject = reject or {}          # order type -> (code, msg)
+        self.fill_on_place = fill_on_place  # 진입 주문이 접수 직후 체결된 수량
+        self.orders = {}
+        self.algo_orders = {}
+        self.calls = []
+        self._ids = itertools.count(1)   # 다리들이 동시에 전송되므로 스레드 안전한 카운터
+
+    def _check(self, o):
+        if o['type'] in self.reject:
+            code, msg = self.reject[o['type']]
+            text = f'{{"code": {code}, "msg": "{msg}"}}'
+            raise BinanceAPIException(MagicMock(status_code=400, text=text), 400, text)
+
+    def futures_create_order(self, **params):
+        if params['type'] == 'MARKET':
+            self.calls.append(('market', params))
+            return {'orderId': 999, **params}
+        self.calls.append(('order', params['type']))
+        self._check(params)
+        order_id = next(self._ids)
+        order = {**params, 'orderId': order_id, 'clientOrderId': params['newClientOrderId'], 'status': 'NEW',
+                 'executedQty': '0'}
+        if self.fill_on_place:
+            order['executedQty'] = str(self.fill_on_place)
+            order['status'] = 'FILLED' if self.fill_on_place >= params['quantity'] else 'PARTIALLY_FILLED'
+        self.orders[order_id] = order
+        return {**order, 'executedQty': '0'}
+
+    def futures_create_algo_order(self, **params):
+        self.calls.append(('algo', params['type']))
+        assert 'quantity' not in params and 'reduceOnly' not in params   # closePosition과 함께 보낼 수 없음
+        self._check(params)
+        order = {**params, 'algoId': next(self._ids), 'algoStatus': 'NEW'}
+        self.algo_orders[order['algoId']] = order
+        return order
+
+    def futures_cancel_order(self, symbol, orderId):
+        self.calls.append(('cancel', orderId))
+        order = self.orders[orderId]
+        if order['status'] == 'FILLED':
+            raise Exception("Unknown order sent.")
+        order['status'] = 'CANCELED'
+        return order
+
+    def futures_cancel_algo_order(self, symbol, algoId):
+        self.calls.append(('cancel_algo', algoId))
+        self.algo_orders[algoId]['algoStatus'] = 'CANCELED'
+        return {'algoId': algoId, 'code': '200', 'msg': 'success'}
+
+    def futures_get_order(self, symbol, orderId):
+        return self.orders[orderId]
+
+
+def test_open_bracket_sends_exits_as_algo_orders():
+    from trade_executor import parse_bracket_id
+    ex_api = FakeExchange()
+    ex = TradeExecutor(client=ex_api)
+
+    res = ex.open_bracket('BTCUSDT', 'buy', 0.01, 50000, 49000, 55000)
+
+    assert sorted(ex_api.calls) == [('algo', 'STOP_MARKET'), ('algo', 'TAKE_PROFIT_MARKET'), ('order', 'LIMIT')]
+    entry = ex_api.orders[res['entry']['orderId']]
+    tp, sl = (ex_api.algo_orders[res[leg]['algoId']] for leg in ('tp', 'sl'))
+    assert entry['side'] == 'BUY' and entry['type'] == 'LIMIT' and entry['quantity'] == 0.01
+    assert tp['side'] == 'SELL' and tp['type'] == 'TAKE_PROFIT_MARKET' and tp['triggerPrice'] == 55000
+    assert sl['side'] == 'SELL' and sl['type'] == 'STOP_MARKET' and sl['triggerPrice'] == 49000
+    assert tp['algoType'] == sl['algoType'] == 'CONDITIONAL'
+    assert tp['closePosition'] == sl['closePosition'] == 'true'
+    assert parse_bracket_id(entry['clientOrderId']) == (res['id'], 'e')
+    assert parse_bracket_id(sl['clientAlgoId']) == (res['id'], 'sl')
+
+def test_open_bracket_rolls_back_partial_failure():
+    from trade_executor import BracketOrderError
+    ex_api = FakeExchange(reject={'STOP_MARKET': (-2021, 'Order would immediately trigger.')})
+    ex = TradeExecutor(client=ex_api)
+
+    with pytest.raises(BracketOrderError) as exc_info:
+        ex.open_bracket('BTCUSDT', 'SELL', 0.01, 50000, 51000, 45000)
+
+    assert exc_info.value.errors == [('sl', {'code': -2021, 'msg': 'Order would immediately trigger.'})]
+    assert exc_info.value.rolled_back == ['entry', 'tp']
+    assert all(o['status'] == 'CANCELED' for o in ex_api.orders.values())
+    assert all(o['algoStatus'] == 'CANCELED' for o in ex_api.algo_orders.values())
+    assert not any(c[0] == 'market' for c in ex_api.calls)
+
+def test_open_bracket_flattens_filled_entry_on_rollback():
+    from trade_executor import BracketOrderError
+    ex_api = FakeExchange(reject={'TAKE_PROFIT_MARKET': (-4045, 'Reach max stop order limit.')}, fill_on_place=0.01)
+    ex = TradeExecutor(client=ex_api)
+
+    with pytest.raises(BracketOrderError) as exc_info:
+        ex.open_bracket('BTCUSDT', 'BUY', 0.01, 50000, 49000, 55000)
+
+    assert exc_info.value.rolled_back == ['flatten', 'sl']   # 함께 보낸 손절도 취소
+    assert all(o['algoStatus'] == 'CANCELED' for o in ex_api.algo_orders.values())
+    market = [c[1] for c in ex_api.calls if c[0] == 'market']
+    assert market == [{'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'MARKET', 'quantity': 0.01, 'reduceOnly': 'true'}]
+
+def test_open_bracket_sends_legs_concurrently():
+    import threading
+    from trade_executor import BracketOrderError
+    ex_api = FakeExchange(reject={'LIMIT': (-2019, 'Margin is insufficient.')})
+    arrived = threading.Barrier(3, timeout=2)
+    create_order, create_algo = ex_api.futures_create_order, ex_api.futures_create_algo_order
+    ex_api.futures_create_order = lambda **p: (arrived.wait(), create_order(**p))[1]
+    ex_api.futures_create_algo_order = lambda **p: (arrived.wait(), create_algo(**p))[1]
+    ex = TradeExecutor(client=ex_api)
+
+    # 세 다리가 모두 동시에 대기 중이어야 barrier를 통과 (순차 전송이면 BrokenBarrierError)
+    with pytest.raises(BracketOrderError) as exc_info:
+        ex.open_bracket('BTCUSDT', 'BUY', 0.01, 50000, 49000, 55000)
 
-def test_place_oco_error_handling(trade_executor):
-    with patch.object(trade_executor.cli, 'futures_place_batch_orders') as mock_oco:
-        mock_oco.side_effect = Exception("API Error")
-        with pytest.raises(Exception) as exc_info:
-            trade_executor.place_oco('BTCUSDT', 'SELL', 0.1, 50000, 55000)
-        assert str(exc_info.value) == "API Error" 
\ No newline at end of file
+    assert exc_info.value.errors == [('entry', {'code': -2019, 'msg': 'Margin is insufficient.'})]
+    assert exc_info.value.rolled_back == ['tp', 'sl']
+    assert all(o['algoStatus'] == 'CANCELED' for o in ex_api.algo_orders.values())
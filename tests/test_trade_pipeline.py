@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+from trade_pipeline import TradePipeline
+
+def test_runs_triggers_concurrently():
+    started = []
+    release = threading.Event()
+
+    def handler(symbol):
+        started.append(symbol)
+        release.wait(5)
+
+    pipeline = TradePipeline(handler, max_workers=3)
+    pipeline.start()
+    for sym in ['BTCUSDT', 'ETHUSDT', 'XRPUSDT']:
+        assert pipeline.submit(sym)
+
+    deadline = time.time() + 5
+    while len(started) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(started) == ['BTCUSDT', 'ETHUSDT', 'XRPUSDT']
+    assert pipeline.in_flight == 3
+
+    release.set()
+    pipeline.join()
+    pipeline.stop()
+    assert pipeline.metrics()['completed'] == 3
+
+def test_deduplicates_symbol_in_flight():
+    release = threading.Event()
+    calls = []
+
+    def handler(symbol):
+        calls.append(symbol)
+        release.wait(5)
+
+    pipeline = TradePipeline(handler, max_workers=2)
+    pipeline.start()
+    assert pipeline.submit('BTCUSDT')
+    assert not pipeline.submit('BTCUSDT')  # same symbol never analyzed twice at once
+
+    release.set()
+    pipeline.join()
+    assert pipeline.submit('BTCUSDT')  # allowed again once finished
+    pipeline.join()
+    pipeline.stop()
+
+    assert calls == ['BTCUSDT', 'BTCUSDT']
+    assert pipeline.stats['deduped'] == 1
+
+def test_on_accept_runs_only_for_accepted_triggers_before_handler():
+    events = []
+    release = threading.Event()
+
+    def handler(symbol):
+        events.append(('handle', symbol))
+        release.wait(5)
+
+    pipeline = TradePipeline(handler, max_workers=1)
+    pipeline.start()
+    assert pipeline.submit('BTCUSDT', on_accept=lambda: events.append(('accept', 'BTCUSDT')))
+    assert not pipeline.submit('BTCUSDT', on_accept=lambda: events.append(('accept', 'dup')))
+
+    release.set()
+    pipeline.join()
+    pipeline.stop()
+    assert events == [('accept', 'BTCUSDT'), ('handle', 'BTCUSDT')]
+
+def test_queue_depth_and_drop_when_full():
+    release = threading.Event()
+    pipeline = TradePipeline(lambda sym: release.wait(5), max_workers=1, max_queue=2)
+    pipeline.start()
+
+    assert pipeline.submit('AUSDT')
+    deadline = time.time() + 5
+    while pipeline.in_flight < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert pipeline.submit('BUSDT')
+    assert pipeline.submit('CUSDT')
+    assert pipeline.queue_depth == 2
+    assert not pipeline.submit('DUSDT')  # queue full
+    assert pipeline.stats['dropped'] == 1
+
+    release.set()
+    pipeline.stop()
+    assert pipeline.metrics()['completed'] == 3
+
+def test_handler_errors_do_not_kill_worker():
+    def handler(symbol):
+        if symbol == 'BADUSDT':
+            raise RuntimeError("boom")
+
+    pipeline = TradePipeline(handler, max_workers=1)
+    pipeline.start()
+    pipeline.submit('BADUSDT')
+    pipeline.submit('BTCUSDT')
+    pipeline.join()
+    pipeline.stop()
+
+    assert pipeline.stats['failed'] == 1
+    assert pipeline.stats['completed'] == 1
+
+def test_confirmed_signal_is_passed_to_handler():
+    calls = []
+    pipeline = TradePipeline(lambda *args: calls.append(args), max_workers=1)
+    pipeline.start()
+    pipeline.submit('BTCUSDT', signal='buy')
+    pipeline.submit('ETHUSDT')
+    pipeline.join()
+    pipeline.stop()
+
+    assert calls == [('BTCUSDT', 'buy'), ('ETHUSDT',)]
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+import logger
+from trade_store import TradeStore
+from pnl_aggregates import PnlAggregates
+
+
+def ms(text):
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S').timestamp() * 1000
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = TradeStore(str(tmp_path / 'trades.db'))
+    yield s
+    s.stop()
+
+
+def test_add_and_range_queries(store):
+    store.add({'symbol': 'BTCUSDT', 'side': 'buy', 'entry': 100, 'exit': 110, 'pnl': 10, 'ts': ms('2024-01-01 10:00:00')})
+    store.add({'symbol': 'ETHUSDT', 'side': 'sell', 'entry': 50, 'exit': 55, 'pnl': -5, 'ts': ms('2024-01-01 11:00:00')})
+    store.add({'symbol': 'BTCUSDT', 'side': 'buy', 'entry': 120, 'exit': 118, 'pnl': -2, 'ts': ms('2024-01-02 09:00:00')})
+    assert store.flush(timeout=5)
+
+    assert store.day_summary('2024-01-01') == (2, 5.0)
+    assert store.day_summary('2024-01-03') == (0, 0.0)
+    assert [t['symbol'] for t in store.recent('2024-01-01', 1)] == ['ETHUSDT']
+    assert [t['pnl'] for t in store.trades(symbol='BTCUSDT')] == [10.0, -2.0]
+    assert len(store.trades(start=ms('2024-01-01 10:30:00'), end=ms('2024-01-02 09:00:00'))) == 1
+
+
+def test_queries_use_indexes(store):
+    conn = store._reader()
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE day = ? ORDER BY ts DESC LIMIT 5", ('2024-01-01',)))
+    assert 'trades_day_ts' in plan
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE symbol = ? AND ts >= ?", ('BTCUSDT', 0)))
+    assert 'trades_symbol_ts' in plan
+
+
+def test_concurrent_writers_are_batched(store):
+    def worker(n):
+        for i in range(100):
+            store.add({'symbol': f'S{n}USDT', 'side': 'buy', 'entry': 1, 'exit': 2, 'pnl': 1,
+                       'ts': ms('2024-01-01 00:00:00') + n * 1000 + i})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.flush(timeout=5)
+
+    assert store.day_summary('2024-01-01') == (800, 800.0)
+    assert store.stats['written'] == 800
+    assert store.stats['batches'] < 800
+
+
+def test_csv_import_runs_once(store, tmp_path):
+    path = tmp_path / 'trade_log.csv'
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['timestamp', 'symbol', 'side', 'entry', 'exit', 'pnl'])
+        w.writerow(['2024-01-01 10:00:00', 'BTCUSDT', 'buy', '100', '110', '10'])
+        w.writerow(['2024-01-01 12:00:00', 'ETHUSDT', 'sell', '50', '45', '5.5'])
+        w.writerow(['broken', 'XRPUSDT', 'buy', '1', '1', '0'])
+
+    assert store.import_csv(str(path)) == 2
+    assert store.import_csv(str(path)) == 0
+    assert store.day_summary('2024-01-01') == (2, 15.5)
+    assert store.trades(symbol='ETHUSDT')[0]['ts'] == ms('2024-01-01 12:00:00')
+
+
+def test_daily_report_reads_summary(tmp_path):
+    s = TradeStore(str(tmp_path / 'trades.db'))
+    agg = PnlAggregates(str(tmp_path / 'pnl.json'))
+    with patch.object(logger, '_store', s), patch.object(logger, '_aggregates', agg), \
+         patch('logger.notify_slack') as mock_notify:
+        logger.log_trade({'symbol': 'BTCUSDT', 'side': 'buy', 'entry': 100.0, 'exit': 110.0, 'pnl': 12.5})
+        logger.log_trade({'symbol': 'ETHUSDT', 'side': 'sell', 'entry': 50.0, 'exit': 45.0, 'pnl': -2.5})
+        logger.daily_report()
+    s.stop()
+
+    report = mock_notify.call_args[0][0]
+    assert 'Total Trades: 2' in report
+    assert 'Total PnL: 10.00 USDT' in report
+    assert 'Win Rate: 50.0%' in report
+    assert 'Max Drawdown: 2.50 USDT' in report
+    assert 'ETHUSDT sell @50.0 -> 45.0 (-2.5 USDT)' in report
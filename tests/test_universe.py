@@ -0,0 +1,136 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from universe import Universe, realized_volatility
+from market_stream import MarketStream
+
+
+def _klines(vol, n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    return [[i * 60_000, '0', '0', '0', f"{c:.6f}", '1'] for i, c in enumerate(closes)]
+
+
+class Market:
+    """심볼별 24시간 거래대금 / 변동성을 바꿔 가며 돌려주는 가짜 거래소"""
+
+    def __init__(self, volumes, vols=None):
+        self.volumes = dict(volumes)
+        self.vols = dict(vols or {})
+        self.kline_calls = []
+
+    def tickers(self):
+        return [{'symbol': s, 'quoteVolume': str(v)} for s, v in self.volumes.items()]
+
+    def klines(self, symbol, interval, limit):
+        self.kline_calls.append(symbol)
+        return _klines(self.vols.get(symbol, 0.001))
+
+
+def _universe(market, **kwargs):
+    kwargs.setdefault('min_quote_volume', 1_000)
+    return Universe(market.tickers, market.klines, **kwargs)
+
+
+def test_realized_volatility():
+    assert realized_volatility(_klines(0.01, n=2000)) == pytest.approx(0.01, rel=0.1)
+    assert realized_volatility(_klines(0.01, n=2)) is None
+
+
+def test_rank_filters_and_caps():
+    market = Market({'AAAUSDT': 9e6, 'BBBUSDT': 5e6, 'CCCUSDT': 5e6, 'THINUSDT': 500, 'ETHBTC': 9e9, 'HALTUSDT': 9e6},
+                    vols={'BBBUSDT': 0.02, 'CCCUSDT': 0.001})
+    uni = _universe(market, max_symbols=2, allowed=lambda: ['AAAUSDT', 'BBBUSDT', 'CCCUSDT', 'THINUSDT', 'ETHBTC'])
+
+    assert 'ANYUSDT' in uni                 # 순위를 내기 전에는 전체 허용
+    active = uni.refresh()
+    # 거래대금 하한 미달, USDT 이외, 거래 불가 심볼은 제외 / 같은 거래대금이면 변동성 큰 쪽
+    assert active == {'AAAUSDT', 'BBBUSDT'}
+    assert uni.symbols() == ['AAAUSDT', 'BBBUSDT']
+    assert 'CCCUSDT' not in uni and 'THINUSDT' not in uni
+    assert sorted(market.kline_calls) == ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+def test_hysteresis_prevents_churn():
+    volumes = {f"S{i:02d}USDT": 1e6 * (20 - i) for i in range(20)}
+    market = Market(volumes)
+    uni = _universe(market, max_symbols=10, vol_ttl=float('inf'))
+    first = uni.refresh()
+    assert first == {f"S{i:02d}USDT" for i in range(10)}
+
+    # 10위 밖으로 조금 밀린 기존 멤버는 유지 (제외 순위 12.5 안), 자리가 없어 11위는 못 들어옴
+    market.volumes['S09USDT'] = 1e6 * 9.5     # S10(10e6)보다 작아져 11위
+    market.volumes['S08USDT'] = 1e6 * 9.4
+    assert uni.refresh() == first
+
+    # 진입 순위(8위) 안으로 올라온 심볼은 가장 약한 멤버를 밀어냄
+    market.volumes['S15USDT'] = 1e8
+    active = uni.refresh()
+    assert 'S15USDT' in active and len(active) == 10
+    assert 'S08USDT' not in active
+
+    # 순위가 한참 밀리면 제외
+    market.volumes['S09USDT'] = 1_500
+    assert 'S09USDT' not in uni.refresh()
+
+
+def test_volume_floor_hysteresis():
+    market = Market({'AAAUSDT': 5_000, 'BBBUSDT': 5_000})
+    uni = _universe(market, min_quote_volume=4_000)
+    assert uni.refresh() == {'AAAUSDT', 'BBBUSDT'}
+    market.volumes['AAAUSDT'] = 3_500          # 하한 미만이지만 하한 * 0.8 이상
+    assert 'AAAUSDT' in uni.refresh()
+    market.volumes['AAAUSDT'] = 3_000
+    assert 'AAAUSDT' not in uni.refresh()
+
+
+def test_volatility_cached_until_ttl():
+    now = [1000.0]
+    market = Market({'AAAUSDT': 5e6, 'BBBUSDT': 6e6})
+    uni = _universe(market, vol_ttl=3600, clock=lambda: now[0])
+    uni.refresh()
+    uni.refresh()
+    assert len(market.kline_calls) == 2
+
+    now[0] += 3600
+    uni.fetch_klines = MagicMock(side_effect=Exception('timeout'))
+    uni.refresh()                                # 조회 실패 - 이전 변동성 유지
+    assert uni.fetch_klines.call_count == 2
+    assert set(uni._volatility) == {'AAAUSDT', 'BBBUSDT'}
+
+
+def test_market_stream_only_tracks_active_symbols():
+    market = Market({'AAAUSDT': 5e6})
+    uni = _universe(market)
+    uni.refresh()
+    hits = []
+    stream = MarketStream(on_anomaly=lambda s, pct: hits.append(s), threshold=3.0, symbols=uni)
+    stream.seed({'AAAUSDT': 100.0, 'ZZZUSDT': 100.0})
+    assert set(stream.prices) == {'AAAUSDT'}
+    for _ in range(2):
+        stream.on_message({'stream': '!miniTicker@arr',
+                           'data': [{'s': 'AAAUSDT', 'c': '110'}, {'s': 'ZZZUSDT', 'c': '110'}]})
+    assert hits == ['AAAUSDT']
+    assert 'ZZZUSDT' not in stream.prices
+
+
+def test_stream_drops_symbols_removed_from_universe():
+    market = Market({'AAAUSDT': 5e6, 'BBBUSDT': 4e6})
+    uni = _universe(market)
+    uni.refresh()
+    stream = MarketStream(threshold=3.0, symbols=uni)
+    uni.listeners.append(lambda added, removed: stream.discard(removed))
+    stream.seed({'AAAUSDT': 100.0, 'BBBUSDT': 50.0})
+    stream.on_message({'stream': '!markPrice@arr', 'data': [{'s': 'BBBUSDT', 'p': '50.1'}]})
+    assert len(stream.detector) == 2
+
+    market.volumes['BBBUSDT'] = 10                          # 거래대금 하한 아래로 - 감시 대상에서 제외
+    uni.refresh()
+    assert set(stream.prices) == {'AAAUSDT'}
+    assert 'BBBUSDT' not in stream.mark_prices
+    assert len(stream.detector) == 1
@@ -0,0 +1,236 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') != '0'
+METRICS_PATH = os.getenv('METRICS_PATH', 'metrics.prom')   # Prometheus textfile 형식
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))         # 0이면 HTTP 엔드포인트 없음
+EXPORT_INTERVAL = 15       # 메트릭 파일 갱신 주기 (초)
+SUMMARY_INTERVAL = 300     # 단계별 요약 로그 주기 (초)
+METRIC_NAME = 'autotrader_stage_seconds'
+# 히스토그램 버킷 상한 (초)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """고정 버킷 지연 시간 히스토그램 - 기록 O(log 버킷 수), 메모리 고정"""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """버킷 안에서 선형 보간한 분위수 (초)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                if i == len(BUCKETS):
+                    return self.max
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = min(BUCKETS[i], self.max)
+                return lo + (hi - lo) * (target - seen) / n if hi > lo else hi
+            seen += n
+        return self.max
+
+
+class _Span:
+    __slots__ = ('tracer', 'stage', 'start')
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    단계별 소요 시간(단조 시계) 수집.
+    with tracer.span('order_submit'): ... 형태로 감싸고, 비활성화되면 아무것도 기록하지 않는 빈 span을 돌려줍니다.
+    mark(key) / observe_since(key, stage)로 스레드를 넘나드는 구간(틱 감지 -> 주문 접수)도 잽니다.
+    """
+
+    def __init__(self, enabled=TRACING_ENABLED):
+        self.enabled = enabled
+        self.started = time.time()
+        self._hist = {}
+        self._marks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def span(self, stage):
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def traced(self, stage):
+        """함수 전체를 span으로 감싸는 데코레이터"""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage):
+                    return fn(*args, **kwargs)
+            return inner
+        return wrap
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._hist.get(stage)
+            if h is None:
+                h = self._hist[stage] = Histogram()
+            h.observe(seconds)
+
+    def mark(self, key, at=None):
+        """구간 시작 시각 기록 (예: 이상 징후를 감지한 심볼) - at은 perf_counter 값"""
+        if self.enabled:
+            self._marks[key] = time.perf_counter() if at is None else at
+
+    def observe_since(self, key, stage, pop=True):
+        """mark(key) 이후 경과 시간을 stage로 기록 (mark가 없으면 None)"""
+        if not self.enabled:
+            return None
+        start = self._marks.pop(key, None) if pop else self._marks.get(key)
+        if start is None:
+            return None
+        elapsed = time.perf_counter() - start
+        self.observe(stage, elapsed)
+        return elapsed
+
+    def discard(self, key):
+        self._marks.pop(key, None)
+
+    def summary(self):
+        """단계별 {count, p50_ms, p99_ms, max_ms, mean_ms}"""
+        with self._lock:
+            hists = {k: (h.count, h.sum, h.max, h.quantile(0.5), h.quantile(0.99)) for k, h in self._hist.items()}
+        return {stage: {'count': count, 'p50_ms': p50 * 1000, 'p99_ms': p99 * 1000, 'max_ms': mx * 1000,
+                        'mean_ms': total / count * 1000}
+                for stage, (count, total, mx, p50, p99) in sorted(hists.items()) if count}
+
+    def prometheus(self):
+        """Prometheus 텍스트 노출 형식 (histogram)"""
+        with self._lock:
+            hists = {k: (list(h.counts), h.count, h.sum) for k, h in self._hist.items()}
+        lines = [f"# HELP {METRIC_NAME} Time spent per trading pipeline stage.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for stage, (counts, count, total) in sorted(hists.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_PATH):
+        """메트릭 파일을 임시 파일에 쓴 뒤 교체 (수집기가 반쯤 쓴 파일을 읽지 않도록)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def log_summary(self):
+        for stage, s in self.summary().items():
+            logging.info(f"⏱️ {stage}: n={s['count']} p50={s['p50_ms']:.1f}ms p99={s['p99_ms']:.1f}ms "
+                         f"max={s['max_ms']:.1f}ms")
+
+    def serve(self, port, host='0.0.0.0'):
+        """/metrics HTTP 엔드포인트 시작 - 실제 포트 반환"""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address[1]
+
+    def _run(self, path, interval, summary_interval):
+        last_summary = time.monotonic()
+        while not self._stop.wait(interval):
+            try:
+                if path:
+                    self.write(path)
+                if time.monotonic() - last_summary >= summary_interval:
+                    self.log_summary()
+                    last_summary = time.monotonic()
+            except Exception as e:
+                logging.error(f"메트릭 내보내기 실패: {e}")
+
+    def start_exporter(self, path=METRICS_PATH, interval=EXPORT_INTERVAL, summary_interval=SUMMARY_INTERVAL,
+                       port=METRICS_PORT):
+        """주기적 메트릭 파일 갱신/요약 로그 (port가 있으면 HTTP 엔드포인트도)"""
+        if not self.enabled:
+            return
+        if port and self._server is None:
+            self.serve(port)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(path, interval, summary_interval),
+                                            name="metrics-export", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+tracer = Tracer()
+span = tracer.span
@@ -1,16 +1,123 @@
-import os
-from binance.client import Client
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from binance.exceptions import BinanceAPIException
+from http_client import binance_client
 
 load_dotenv()
-cli = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_API_SECRET'))
+cli = binance_client()
+
+MARGIN_TYPE = 'ISOLATED'
+NO_CHANGE_CODES = (-4046, -4059)  # 이미 같은 마진 타입 / 포지션 모드라 변경할 것이 없음
+BRACKET_PREFIX = 'atb'            # 브래킷 주문의 clientOrderId/clientAlgoId 접두사 (atb-<id>-e|tp|sl)
+EXIT_WORKING_TYPE = 'MARK_PRICE'  # TP/SL 트리거 기준 가격
+BRACKET_WORKERS = 12              # 브래킷 주문 동시 전송 스레드 (브래킷당 3개)
+
+# 진입/익절/손절을 동시에 보내 왕복 지연을 한 번으로 줄이는 공용 풀
+_leg_pool = ThreadPoolExecutor(max_workers=BRACKET_WORKERS, thread_name_prefix="bracket")
+
+
+def bracket_ids(bracket_id):
+    """브래킷 하나의 (진입 clientOrderId, 익절/손절 clientAlgoId)"""
+    return tuple(f"{BRACKET_PREFIX}-{bracket_id}-{leg}" for leg in ('e', 'tp', 'sl'))
+
+
+def parse_bracket_id(client_order_id):
+    """clientOrderId/clientAlgoId -> (bracket_id, leg) - 브래킷 주문이 아니면 None"""
+    parts = (client_order_id or '').split('-')
+    if len(parts) != 3 or parts[0] != BRACKET_PREFIX:
+        return None
+    return parts[1], parts[2]
+
+
+class BracketOrderError(Exception):
+    """브래킷 주문 중 일부가 거부됨 - 접수된 주문은 이미 롤백됨"""
+
+    def __init__(self, symbol, errors, rolled_back):
+        self.symbol = symbol
+        self.errors = errors            # [(leg, {'code':..., 'msg':...}), ...]
+        self.rolled_back = rolled_back  # 취소(또는 청산)한 주문 leg 목록
+        detail = ', '.join(f"{leg}: {err.get('code')} {err.get('msg')}" for leg, err in errors)
+        super().__init__(f"{symbol} bracket rejected ({detail})")
+
+
+class LeverageState:
+    """
+    심볼별 현재 마진 타입/레버리지 캐시.
+    시작 시 포지션 정보로 한 번에 채우고, 원하는 값과 다를 때만 변경 API를 호출합니다.
+    """
+
+    def __init__(self):
+        self._state = {}  # symbol -> {'margin': 'ISOLATED'|'CROSSED', 'leverage': int}
+        self._lock = threading.Lock()
+
+    def seed(self, rows):
+        """positionRisk / symbolConfig 응답으로 캐시 채움 (채운 심볼 수 반환)"""
+        state = {}
+        for r in rows:
+            if 'leverage' not in r or 'marginType' not in r:
+                continue
+            margin = r['marginType'].upper()
+            state[r['symbol']] = {'margin': 'CROSSED' if margin == 'CROSS' else margin,
+                                  'leverage': int(r['leverage'])}
+        with self._lock:
+            self._state.update(state)
+        return len(state)
+
+    def get(self, sym, key):
+        with self._lock:
+            return self._state.get(sym, {}).get(key)
+
+    def set(self, sym, key, value):
+        with self._lock:
+            self._state.setdefault(sym, {})[key] = value
+
+    def invalidate(self, sym=None):
+        """거래소 상태를 알 수 없게 되면 캐시를 버려 다음 주문에서 다시 설정"""
+        with self._lock:
+            if sym is None:
+                self._state.clear()
+            else:
+                self._state.pop(sym, None)
+
+
+# 트레이드마다 TradeExecutor를 새로 만들어도 캐시는 공유
+leverage_state = LeverageState()
+
 
 class TradeExecutor:
-    def __init__(self): self.cli=cli
+    def __init__(self, client=None, state=None):
+        self.cli = client or cli
+        self.state = leverage_state if state is None else state
+
+    def sync_state(self):
+        """포지션 정보로 마진 타입/레버리지 캐시를 일괄 갱신"""
+        rows = self.cli.futures_position_information()
+        if not rows or 'leverage' not in rows[0]:
+            # positionRisk v3는 열린 포지션만, 레버리지/마진 타입 없이 주므로 심볼 설정을 함께 조회
+            rows = self.cli.futures_symbol_config()
+        return self.state.seed(rows)
 
     def set_leverage(self, sym, lev):
-        self.cli.futures_change_margin_type(symbol=sym, marginType='ISOLATED')
-        self.cli.futures_change_leverage(symbol=sym, leverage=lev)
+        if self.state.get(sym, 'margin') != MARGIN_TYPE:
+            try:
+                self.cli.futures_change_margin_type(symbol=sym, marginType=MARGIN_TYPE)
+            except BinanceAPIException as e:
+                if e.code not in NO_CHANGE_CODES:
+                    self.state.invalidate(sym)
+                    raise
+            self.state.set(sym, 'margin', MARGIN_TYPE)
+        if self.state.get(sym, 'leverage') != lev:
+            try:
+                self.cli.futures_change_leverage(symbol=sym, leverage=lev)
+            except Exception:
+                self.state.invalidate(sym)
+                raise
+            self.state.set(sym, 'leverage', lev)
+        else:
+            logging.debug(f"{sym} 레버리지 {lev}x 유지 - 변경 호출 생략")
 
     def enter_limit(self, sym, side, qty, price):
         return self.cli.futures_create_order(
@@ -18,24 +125,77 @@ class TradeExecutor:
             quantity=qty, price=price
         )
 
-    def place_oco(self, sym, side, qty, stop, tp):
-        return self.cli.futures_place_batch_orders(
-            batchOrders=[
-                {
-                    'symbol': sym,
-                    'side': side.upper(),
-                    'type': 'LIMIT',
-                    'timeInForce': 'GTC',
-                    'quantity': qty,
-                    'price': tp
-                },
-                {
-                    'symbol': sym,
-                    'side': side.upper(),
-                    'type': 'STOP_MARKET',
-                    'timeInForce': 'GTC',
-                    'quantity': qty,
-                    'stopPrice': stop
-                }
-            ]
-        )
+    def open_bracket(self, sym, side, qty, entry, stop, tp):
+        """
+        진입 지정가(/fapi/v1/order)와 익절/손절 조건부 주문(/fapi/v1/algoOrder)을 동시에 전송.
+        (조건부 주문 타입은 /fapi/v1/order·batchOrders에서 -4120으로 거부되므로 한 번에 묶을 수 없음)
+        세 요청이 병렬로 나가므로 네트워크 대기는 한 번(가장 느린 응답)입니다. 익절/손절은 포지션 없이도
+        접수되는 closePosition 주문이라 진입과 함께 보낼 수 있지만, 접수 순서는 보장되지 않아
+        진입이 먼저 체결되면 익절/손절이 접수될 때까지 잠시 보호되지 않습니다.
+        하나라도 거부되면 접수된 주문을 취소(체결된 진입은 시장가 청산)하고 BracketOrderError를 던집니다.
+        """
+        side = side.upper()
+        exit_side = 'SELL' if side == 'BUY' else 'BUY'
+        bracket_id = uuid.uuid4().hex[:16]
+        entry_id, tp_id, sl_id = bracket_ids(bracket_id)
+        legs = [
+            ('entry', self.cli.futures_create_order,
+             {'symbol': sym, 'side': side, 'type': 'LIMIT', 'timeInForce': 'GTC',
+              'quantity': qty, 'price': entry, 'newClientOrderId': entry_id}),
+            ('tp', self.cli.futures_create_algo_order,
+             {'symbol': sym, 'side': exit_side, 'algoType': 'CONDITIONAL', 'type': 'TAKE_PROFIT_MARKET',
+              'triggerPrice': tp, 'closePosition': 'true', 'workingType': EXIT_WORKING_TYPE, 'clientAlgoId': tp_id}),
+            ('sl', self.cli.futures_create_algo_order,
+             {'symbol': sym, 'side': exit_side, 'algoType': 'CONDITIONAL', 'type': 'STOP_MARKET',
+              'triggerPrice': stop, 'closePosition': 'true', 'workingType': EXIT_WORKING_TYPE, 'clientAlgoId': sl_id}),
+        ]
+        futures = [(leg, _leg_pool.submit(send, **params)) for leg, send, params in legs]
+
+        placed, errors, failure = {}, [], None
+        for leg, future in futures:
+            try:
+                placed[leg] = future.result()
+            except BinanceAPIException as e:
+                errors.append((leg, {'code': e.code, 'msg': e.message}))
+                failure = failure or e
+            except Exception as e:
+                # 전송 자체가 실패하면 접수 여부를 알 수 없으므로 접수된 것만 취소하고 호출자에게 넘김
+                failure = e
+        if failure is None:
+            return {'id': bracket_id, **placed}
+
+        rolled_back = self._rollback(sym, exit_side, placed) if placed else []
+        if isinstance(failure, BinanceAPIException):
+            raise BracketOrderError(sym, errors, rolled_back) from failure
+        raise failure
+
+    def _rollback(self, sym, exit_side, placed):
+        """접수된 브래킷 주문 취소 - 그 사이 진입이 체결됐으면 체결분을 시장가로 청산"""
+        rolled_back = []
+        for leg, order in placed.items():
+            try:
+                if leg == 'entry':
+                    res = self.cli.futures_cancel_order(symbol=sym, orderId=order['orderId'])
+                else:
+                    res = self.cli.futures_cancel_algo_order(symbol=sym, algoId=order['algoId'])
+                rolled_back.append(leg)
+                filled = float(res.get('executedQty') or 0)
+            except Exception as e:
+                # 이미 전량 체결된 주문은 취소되지 않으므로 체결 수량을 조회
+                logging.error(f"❌ {sym} 브래킷 {leg} 주문 취소 실패: {e}")
+                filled = self._filled_qty(sym, order) if leg == 'entry' else 0
+            if leg == 'entry' and filled > 0:
+                try:
+                    self.cli.futures_create_order(symbol=sym, side=exit_side, type='MARKET',
+                                                  quantity=filled, reduceOnly='true')
+                    rolled_back.append('flatten')
+                except Exception as e:
+                    logging.error(f"❌ {sym} 체결분 {filled} 청산 실패 - 수동 확인 필요: {e}")
+        return rolled_back
+
+    def _filled_qty(self, sym, order):
+        try:
+            return float(self.cli.futures_get_order(symbol=sym, orderId=order['orderId']).get('executedQty') or 0)
+        except Exception as e:
+            logging.error(f"❌ {sym} 주문 {order['orderId']} 조회 실패: {e}")
+            return float(order.get('executedQty') or 0)
@@ -0,0 +1,96 @@
+import logging
+import queue
+import threading
+
+
+class TradePipeline:
+    """이상 징후 트리거를 병렬 처리하는 워커 풀 (심볼별 중복 제거)"""
+
+    def __init__(self, handler, max_workers=8, max_queue=100):
+        self.handler = handler
+        self.max_workers = max_workers
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = set()  # 큐 대기 중이거나 처리 중인 심볼
+        self._active = set()   # 처리 중인 심볼
+        self._lock = threading.Lock()
+        self._workers = []
+        self.stats = {'submitted': 0, 'deduped': 0, 'dropped': 0, 'completed': 0, 'failed': 0}
+
+    def start(self):
+        """워커 스레드 시작"""
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker, name=f"trade-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, symbol, on_accept=None, signal=None):
+        """심볼 분석 요청 - 이미 대기/처리 중이거나 큐가 가득 차면 False
+
+        on_accept는 접수됐을 때만 잠금 안에서 호출되므로 워커가 처리를 시작하기 전에 실행됩니다.
+        이미 확정된 신호(signal)가 있으면 handler(symbol, signal)로 넘겨 다시 계산하지 않게 합니다.
+        """
+        with self._lock:
+            if symbol in self._pending:
+                self.stats['deduped'] += 1
+                return False
+            try:
+                self._queue.put_nowait((symbol, signal))
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return False
+            self._pending.add(symbol)
+            self.stats['submitted'] += 1
+            if on_accept is not None:
+                on_accept()
+        return True
+
+    @property
+    def queue_depth(self):
+        """처리 대기 중인 트리거 수"""
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self):
+        """현재 처리 중인 트리거 수"""
+        return len(self._active)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, queue_depth=self.queue_depth, in_flight=self.in_flight)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            symbol, signal = item
+            with self._lock:
+                self._active.add(symbol)
+            try:
+                if signal is None:
+                    self.handler(symbol)
+                else:
+                    self.handler(symbol, signal)
+                ok = True
+            except Exception as e:
+                logging.exception(f"트레이드 워커 오류 ({symbol}): {e}")
+                ok = False
+            finally:
+                with self._lock:
+                    self._active.discard(symbol)
+                    self._pending.discard(symbol)
+                    self.stats['completed' if ok else 'failed'] += 1
+                self._queue.task_done()
+
+    def join(self):
+        """대기 중인 모든 트리거 처리 완료까지 대기"""
+        self._queue.join()
+
+    def stop(self, timeout=None):
+        """대기 중인 작업을 마친 뒤 워커 종료"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for t in self._workers:
+            t.join(timeout)
+        self._workers = []
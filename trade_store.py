@@ -0,0 +1,226 @@
+import csv
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+WRITE_BATCH = 500        # 트랜잭션 하나에 넣을 최대 거래 수
+BATCH_WINDOW = 0.05      # 배치를 모으기 위해 기다리는 시간 (초)
+CSV_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id     INTEGER PRIMARY KEY,
+    ts     INTEGER NOT NULL,   -- epoch ms
+    day    TEXT    NOT NULL,   -- 로컬 날짜 YYYY-MM-DD
+    symbol TEXT    NOT NULL,
+    side   TEXT    NOT NULL,
+    entry  REAL,
+    exit   REAL,
+    pnl    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_day_ts ON trades (day, ts);
+CREATE INDEX IF NOT EXISTS trades_symbol_ts ON trades (symbol, ts);
+CREATE TABLE IF NOT EXISTS daily_summary (
+    day    TEXT PRIMARY KEY,
+    trades INTEGER NOT NULL,
+    pnl    REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_SUMMARY_UPSERT = """
+INSERT INTO daily_summary (day, trades, pnl) VALUES (?, ?, ?)
+ON CONFLICT(day) DO UPDATE SET trades = trades + excluded.trades, pnl = pnl + excluded.pnl
+"""
+
+_COLUMNS = ('ts', 'day', 'symbol', 'side', 'entry', 'exit', 'pnl')
+
+
+class TradeStore:
+    """
+    SQLite(WAL) 거래 기록 저장소.
+    add()는 큐에 넣기만 하고 백그라운드 스레드가 모아서 한 트랜잭션으로 기록합니다.
+    일별 합계는 daily_summary 테이블에 함께 갱신되므로 일일 보고서는 기록 양과 무관하게 조회됩니다.
+    """
+
+    def __init__(self, path, batch_window=BATCH_WINDOW):
+        self.path = path
+        self.batch_window = batch_window
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0}
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self._thread = None
+        self._local = threading.local()
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self):
+        """스레드별 읽기 연결 (WAL이라 쓰기와 동시에 읽을 수 있음)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row(trade, ts=None):
+        if ts is None:
+            ts = trade.get('ts')
+        if ts is None:
+            ts = time.time() * 1000
+        ts = int(ts)
+        day = datetime.fromtimestamp(ts / 1000).strftime('%Y-%m-%d')
+        return (ts, day, trade['symbol'], trade['side'], trade.get('entry'), trade.get('exit'),
+                float(trade['pnl']))
+
+    def add(self, trade):
+        """거래 하나를 쓰기 큐에 넣고 바로 반환 (ts가 없으면 현재 시각)"""
+        row = self._row(trade)
+        with self._cond:
+            self._pending.append(row)
+            self.stats['queued'] += 1
+            self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trade-store", daemon=True)
+                self._thread.start()
+        return row
+
+    def _next_batch(self):
+        with self._cond:
+            while not (self._pending or self._stopping):
+                self._cond.wait()
+            if self._pending and len(self._pending) < WRITE_BATCH and not self._stopping:
+                # 동시에 들어오는 거래를 한 트랜잭션으로 묶음
+                self._cond.wait(self.batch_window)
+            batch = [self._pending.popleft() for _ in range(min(WRITE_BATCH, len(self._pending)))]
+            self._busy = bool(batch)
+            return batch
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    if self._stopping:
+                        return
+                    continue
+                try:
+                    with conn:
+                        self._write(conn, batch)
+                    self.stats['written'] += len(batch)
+                    self.stats['batches'] += 1
+                except sqlite3.Error as e:
+                    self.stats['failed'] += len(batch)
+                    logging.error(f"❌ 거래 기록 저장 실패 ({len(batch)}건): {e}")
+                finally:
+                    with self._cond:
+                        self._busy = False
+                        self._cond.notify_all()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write(conn, rows):
+        summary = {}
+        for r in rows:
+            count, pnl = summary.get(r[1], (0, 0.0))
+            summary[r[1]] = (count + 1, pnl + r[6])
+        conn.executemany(f"INSERT INTO trades ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany(_SUMMARY_UPSERT, [(d, c, p) for d, (c, p) in summary.items()])
+
+    def flush(self, timeout=None):
+        """큐에 남은 거래가 모두 기록될 때까지 대기"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def day_summary(self, day):
+        """(거래 수, 총 PnL) - daily_summary 기본 키 조회"""
+        row = self._reader().execute("SELECT trades, pnl FROM daily_summary WHERE day = ?", (day,)).fetchone()
+        return (row['trades'], row['pnl']) if row else (0, 0.0)
+
+    def recent(self, day, n=5):
+        """해당 날짜의 최근 n개 거래 (시간순)"""
+        rows = self._reader().execute(
+            "SELECT * FROM trades WHERE day = ? ORDER BY ts DESC LIMIT ?", (day, n)).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    def trades(self, day=None, symbol=None, start=None, end=None, limit=None):
+        """날짜/심볼/[start, end) 시각(ms) 조건의 거래 목록 - 인덱스 범위 조회"""
+        where, params = [], []
+        if day is not None:
+            where.append("day = ?")
+            params.append(day)
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(int(start))
+        if end is not None:
+            where.append("ts < ?")
+            params.append(int(end))
+        sql = "SELECT * FROM trades"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(r) for r in self._reader().execute(sql, params)]
+
+    def import_csv(self, csv_path):
+        """기존 trade_log.csv를 한 번만 가져옴 (이미 가져온 파일이면 0 반환)"""
+        key = f"imported:{os.path.abspath(csv_path)}"
+        if not os.path.exists(csv_path):
+            return 0
+        conn = self._connect()
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return 0
+            rows = []
+            with open(csv_path, newline='') as f:
+                for rec in csv.DictReader(f):
+                    try:
+                        ts = datetime.strptime(rec['timestamp'], CSV_TIME_FORMAT).timestamp() * 1000
+                        rows.append(self._row({**rec, 'entry': float(rec['entry']), 'exit': float(rec['exit'])}, ts))
+                    except (KeyError, ValueError) as e:
+                        logging.warning(f"trade_log.csv 행 건너뜀: {rec} ({e})")
+            with conn:  # 가져오기와 완료 표시를 한 트랜잭션으로
+                self._write(conn, rows)
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(len(rows))))
+            return len(rows)
+        finally:
+            conn.close()
@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MAX_SYMBOLS = int(os.getenv('MAX_SYMBOLS', '500'))                  # 최대 모니터링 심볼 수
+MIN_QUOTE_VOLUME = float(os.getenv('MIN_QUOTE_VOLUME', '5000000'))  # 24시간 거래대금 하한 (USDT)
+REFRESH_INTERVAL = 900     # 24시간 티커 재조회 및 순위 재계산 주기 (초)
+VOL_TTL = 3600             # 심볼별 실현 변동성 캐시 유효 시간 (초)
+VOL_INTERVAL = '1m'
+VOL_LOOKBACK = 100         # 실현 변동성 계산 캔들 수 (limit 100 이하는 요청 가중치 1)
+VOL_FETCH_WORKERS = 4      # 변동성 계산용 캔들 동시 조회 수
+CANDIDATE_FACTOR = 3       # 변동성을 조회할 후보 수 (거래대금 상위 max_symbols * 이 값)
+LIQUIDITY_WEIGHT = 0.5     # 순위 점수에서 거래대금 비중 (나머지는 변동성)
+ENTER_RANK_FACTOR = 0.8    # 순위가 max_symbols * 이 값 안이면 자리가 없어도 진입 (가장 약한 기존 멤버 제외)
+EXIT_RANK_FACTOR = 1.25    # 기존 멤버는 순위가 max_symbols * 이 값 밖으로 밀려야 제외
+EXIT_VOLUME_FACTOR = 0.8   # 기존 멤버는 거래대금이 하한 * 이 값 아래로 떨어져야 제외
+
+
+def realized_volatility(rows):
+    """캔들 행 목록의 종가 로그 수익률 표준편차 (캔들이 모자라면 None)"""
+    if len(rows) < 3:
+        return None
+    closes = np.array([float(r[4]) for r in rows])
+    if (closes <= 0).any():
+        return None
+    return float(np.std(np.diff(np.log(closes))))
+
+
+def _pct_rank(values):
+    """0(최저) ~ 1(최고) 백분위 순위 (같은 값은 같은 순위)"""
+    n = len(values)
+    if n < 2:
+        return np.full(n, 0.5)
+    s = np.sort(values)
+    return (np.searchsorted(s, values, 'left') + np.searchsorted(s, values, 'right') - 1) / 2 / (n - 1)
+
+
+class Universe:
+    """
+    24시간 거래대금과 최근 실현 변동성으로 심볼 순위를 매겨 상위 max_symbols개만 감시 대상으로 유지합니다.
+    start() 이후 refresh_interval마다 백그라운드에서 다시 계산하며, 경계에 걸친 심볼이 들락날락하지 않도록
+    진입/제외 순위와 거래대금 하한에 히스테리시스를 둡니다. 순위를 한 번도 못 냈으면 모든 심볼을 허용합니다.
+    """
+
+    def __init__(self, fetch_tickers, fetch_klines, allowed=None, max_symbols=MAX_SYMBOLS,
+                 min_quote_volume=MIN_QUOTE_VOLUME, quote='USDT', refresh_interval=REFRESH_INTERVAL,
+                 vol_ttl=VOL_TTL, clock=time.time):
+        # fetch_tickers() -> 24hr 티커 목록, fetch_klines(symbol, interval, limit) -> 캔들 행 목록
+        # allowed() -> 거래 가능한 심볼 목록 (None이면 제한 없음)
+        self.fetch_tickers = fetch_tickers
+        self.fetch_klines = fetch_klines
+        self.allowed = allowed
+        self.max_symbols = max_symbols
+        self.min_quote_volume = min_quote_volume
+        self.quote = quote
+        self.refresh_interval = refresh_interval
+        self.vol_ttl = vol_ttl
+        self.clock = clock
+        self.active = frozenset()
+        self.ranks = {}          # 심볼 -> 순위 (0이 최상위)
+        self.loaded_at = None
+        self.listeners = []      # listener(added, removed) - 갱신으로 감시 대상이 바뀌면 호출
+        self._volatility = {}    # 심볼 -> (실현 변동성, 계산 시각)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __contains__(self, symbol):
+        # 스트림 스레드가 틱마다 호출 - frozenset 참조 하나만 읽으므로 잠금 불필요
+        return self.loaded_at is None or symbol in self.active
+
+    def __len__(self):
+        return len(self.active)
+
+    def symbols(self):
+        """감시 대상 심볼 (순위 순)"""
+        return sorted(self.active, key=lambda s: self.ranks.get(s, len(self.ranks)))
+
+    def _fetch_volatility(self, symbol):
+        try:
+            return symbol, realized_volatility(self.fetch_klines(symbol, VOL_INTERVAL, VOL_LOOKBACK))
+        except Exception as e:
+            logging.warning(f"{symbol} 변동성 계산용 캔들 조회 실패: {e}")
+            return symbol, None
+
+    def volatilities(self, symbols, now=None):
+        """심볼별 실현 변동성 - vol_ttl이 지난 심볼만 다시 조회 (실패하면 이전 값 유지)"""
+        now = self.clock() if now is None else now
+        stale = [s for s in symbols if now - self._volatility.get(s, (None, -float('inf')))[1] >= self.vol_ttl]
+        if stale:
+            with ThreadPoolExecutor(max_workers=VOL_FETCH_WORKERS) as pool:
+                for sym, vol in pool.map(self._fetch_volatility, stale):
+                    if vol is not None:
+                        self._volatility[sym] = (vol, now)
+        return {s: self._volatility[s][0] if s in self._volatility else None for s in symbols}
+
+    def rank(self, volume, volatility):
+        """거래대금/변동성 백분위 순위의 가중 합으로 정렬한 심볼 목록 (변동성이 없으면 중간값)"""
+        symbols = list(volume)
+        if not symbols:
+            return []
+        liq = _pct_rank(np.array([volume[s] for s in symbols]))
+        known = [s for s in symbols if volatility.get(s) is not None]
+        vol_rank = dict(zip(known, _pct_rank(np.array([volatility[s] for s in known]))))
+        score = {s: LIQUIDITY_WEIGHT * liq[i] + (1 - LIQUIDITY_WEIGHT) * vol_rank.get(s, 0.5)
+                 for i, s in enumerate(symbols)}
+        return sorted(symbols, key=lambda s: (-score[s], -volume[s], s))
+
+    def select(self, ranked, current):
+        """히스테리시스를 적용한 새 멤버 목록 (순위 순)"""
+        cap = self.max_symbols
+        rank = {s: i for i, s in enumerate(ranked)}
+        enter, leave = cap * ENTER_RANK_FACTOR, cap * EXIT_RANK_FACTOR
+        keep = [s for s in ranked if rank[s] < enter or (s in current and rank[s] < leave)][:cap]
+        chosen = set(keep)
+        for s in ranked:
+            if len(keep) >= cap:
+                break
+            if s not in chosen:
+                keep.append(s)
+                chosen.add(s)
+        return sorted(keep, key=rank.get)
+
+    def refresh(self):
+        """24시간 티커를 다시 받아 순위와 감시 대상을 갱신하고 감시 대상을 반환"""
+        with self._lock:
+            now = self.clock()
+            tickers = self.fetch_tickers()
+            allowed = set(self.allowed()) if self.allowed else None
+            current = self.active if self.loaded_at is not None else frozenset()
+            floor = self.min_quote_volume
+            volume = {}
+            for t in tickers:
+                sym = t.get('symbol', '')
+                if not sym.endswith(self.quote) or (allowed is not None and sym not in allowed):
+                    continue
+                try:
+                    qv = float(t['quoteVolume'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                # 거래대금 하한 (기존 멤버는 더 낮은 하한으로 유지)
+                if qv >= floor or (sym in current and qv >= floor * EXIT_VOLUME_FACTOR):
+                    volume[sym] = qv
+
+            # 변동성은 거래대금 상위 후보와 기존 멤버만 조회
+            by_volume = sorted(volume, key=volume.get, reverse=True)
+            candidates = set(by_volume[:self.max_symbols * CANDIDATE_FACTOR]) | {s for s in current if s in volume}
+            volume = {s: volume[s] for s in candidates}
+            ranked = self.rank(volume, self.volatilities(sorted(candidates), now))
+            selected = self.select(ranked, current)
+
+            for sym in list(self._volatility):
+                if sym not in candidates:
+                    del self._volatility[sym]
+            added = set(selected) - current
+            removed = current - set(selected)
+            self.ranks = {s: i for i, s in enumerate(ranked)}
+            self.active = frozenset(selected)
+            self.loaded_at = now
+        if current and (added or removed):
+            logging.info(f"감시 대상 변경: +{len(added)} -{len(removed)} (총 {len(selected)}개) "
+                         f"추가={sorted(added)[:10]} 제외={sorted(removed)[:10]}")
+        elif not current:
+            logging.info(f"감시 대상 {len(selected)}개 선정 (후보 {len(candidates)}개, 최대 {self.max_symbols}개)")
+        if current and (added or removed):
+            for listener in list(self.listeners):
+                try:
+                    listener(added, removed)
+                except Exception as e:
+                    logging.error(f"감시 대상 변경 알림 실패: {e}")
+        return self.active
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"감시 대상 갱신 실패 (이전 목록 유지): {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="universe", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()